@@ -0,0 +1,14 @@
+from .greedy import GreedyAlgorithm
+from .beam_greedy import BeamGreedyAlgorithm
+from .continuous_relaxation import ContinuousRelaxationAlgorithm
+from .simulated_annealing import SimulatedAnnealingAlgorithm
+from .radon import RadonAlgorithm
+
+# Display name -> algorithm class, shared by the app and the command-line runner.
+ALGORITHMS = {
+    "Greedy Residual": GreedyAlgorithm,
+    "Beam Search Greedy": BeamGreedyAlgorithm,
+    "Continuous Relaxation + Eulerization": ContinuousRelaxationAlgorithm,
+    "Simulated Annealing": SimulatedAnnealingAlgorithm,
+    "Radon Preselection + Greedy": RadonAlgorithm,
+}
@@ -1,10 +1,159 @@
+import os
+import time
+import tracemalloc
 from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from .budget import check_memory_budget, estimate_entries
+from .checkpoint import NULL_CHECKPOINTER, Checkpointer, load_checkpoint
+from .geometry import LINE_MODEL, ChordGeometry
+from .geometry_cache import load_geometry
+from .preselection import select_chords
+
+
+class EmissionPolicy:
+    """
+    Decides at which steps an algorithm materializes a full animation frame.
+
+    Frames are due every ``every_n`` steps, or at most once per ``every_ms``
+    milliseconds when that is set. With ``final_only`` only the last step gets a
+    frame. Steps without a frame may yield a lightweight delta event instead.
+    """
+
+    def __init__(self, every_n=1, every_ms=None, final_only=False):
+        self.every_n = max(1, int(every_n))
+        self.every_ms = every_ms
+        self.final_only = final_only
+        self._last_emit = None
+
+    def due(self, step, final=False):
+        """
+        Returns whether a full frame should be emitted for this (1-based) step.
+        """
+        if final:
+            return True
+        if self.final_only:
+            return False
+        if self.every_ms is not None:
+            now = time.perf_counter()
+            if self._last_emit is not None and (now - self._last_emit) * 1000 < self.every_ms:
+                return False
+            self._last_emit = now
+            return True
+        return step % self.every_n == 0
+
+
+class Profiler:
+    """
+    Opt-in phase timers and counters for a run.
+
+    ``phase(name)`` accumulates wall time per phase, ``count(name, n)`` adds to a
+    counter. When tracemalloc is tracing, each phase also adds the memory it left
+    allocated to the ``bytes_allocated`` counter.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        tracing = tracemalloc.is_tracing()
+        before = tracemalloc.get_traced_memory()[0] if tracing else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+            if tracing:
+                self.count("bytes_allocated", max(0, tracemalloc.get_traced_memory()[0] - before))
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def wrap(self, generator, name):
+        """
+        Times a sub-generator's own work under a phase, excluding the time the
+        consumer spends between its yields. Use with ``yield from``.
+        """
+        while True:
+            with self.phase(name):
+                try:
+                    event = next(generator)
+                except StopIteration as stop:
+                    return stop.value
+            yield event
+
+    def snapshot(self):
+        """
+        Returns the phase times (seconds) and counters so far.
+        """
+        return {"phases": dict(self.phases), "counters": dict(self.counters)}
+
+    def attach(self, event, final=False):
+        """
+        Adds the profile to a yielded state dict; the final event gets the summary.
+        """
+        if final:
+            summary = self.snapshot()
+            summary["total_s"] = time.perf_counter() - self._start
+            event["profile_summary"] = summary
+        else:
+            event["profile"] = self.snapshot()
+        return event
+
+
+class NullProfiler:
+    """
+    The disabled profiler: every call is a no-op, so instrumented code costs
+    essentially nothing when profiling is off.
+    """
+
+    enabled = False
+    _null_phase = nullcontext()
+
+    def phase(self, name):
+        return self._null_phase
+
+    def count(self, name, n=1):
+        pass
+
+    def wrap(self, generator, name):
+        return generator
+
+    def attach(self, event, final=False):
+        return event
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def delta_event(line_num, chord=None, progress=None):
+    """
+    Builds the lightweight event for a step without a full frame: only the chord
+    that was added, so a consumer can draw it incrementally. Steps that add no chord,
+    such as annealing moves, leave it out; the event still lets a consumer report
+    progress and stop the run between steps.
+    """
+    event = {"event": "delta", "line_num": line_num}
+    if chord is not None:
+        event["chord"] = chord
+    if progress is not None:
+        event["progress"] = progress
+    return event
 
 class BaseStringArtAlgorithm(ABC):
     """
     Abstract base class for string art algorithms.
     """
 
+    # Largest image side, in pixels, a run may solve without a ``memory_budget``.
+    # None for no limit; algorithms whose working arrays grow well past the
+    # chord index at print sizes set one.
+    budget_required_above = None
+
     @abstractmethod
     def run(self, target_image, pin_coords, **kwargs):
         """
@@ -13,10 +162,190 @@ class BaseStringArtAlgorithm(ABC):
         Args:
             target_image (np.ndarray): The target grayscale image.
             pin_coords (np.ndarray): The coordinates of the pins.
-            **kwargs: Algorithm-specific parameters.
+            **kwargs: Algorithm-specific parameters, plus the frame emission options
+                read by ``emission_policy`` and ``profile`` (bool), which attaches phase
+                timings and counters to the yielded states and a ``profile_summary``
+                to the final one. Algorithms that support it save their state to a
+                ``checkpoint`` file and continue a run with ``resume_from``, see
+                ``checkpointer`` and ``resume_state``.
 
         Yields:
             dict: A dictionary containing the state at each step of the animation.
                   The content of the dictionary can vary depending on the algorithm.
+                  Steps without a full frame yield ``{"event": "delta", ...}`` events.
         """
         pass
+
+    def profiler(self, kwargs):
+        """
+        Returns a Profiler if the run was started with ``profile=True``, else the no-op profiler.
+        """
+        return Profiler() if kwargs.get("profile") else NULL_PROFILER
+
+    def checkpointer(self, kwargs, pin_coords, image_shape):
+        """
+        Returns a Checkpointer if the run was started with ``checkpoint`` (a file path),
+        else the no-op checkpointer. ``checkpoint_interval_s`` (float, default 30) sets
+        the time between saves.
+        """
+        path = kwargs.get("checkpoint")
+        if not path:
+            return NULL_CHECKPOINTER
+        return Checkpointer(path, type(self).__name__, len(pin_coords), image_shape,
+                            interval_s=kwargs.get("checkpoint_interval_s", 30.0))
+
+    def resume_state(self, kwargs, pin_coords, image_shape):
+        """
+        Loads the checkpoint a run resumes from.
+
+        Args:
+            kwargs (dict): The run's keyword arguments. ``resume_from`` is a checkpoint
+                path or a dict returned by ``load_checkpoint``.
+            pin_coords (np.ndarray): The coordinates of the pins.
+            image_shape (tuple): Shape of the target image.
+
+        Returns:
+            dict: The checkpoint, or None when the run starts from scratch.
+
+        Raises:
+            ValueError: If the checkpoint is from another algorithm, pin count or image size.
+        """
+        source = kwargs.get("resume_from")
+        if source is None:
+            return None
+        state = load_checkpoint(source) if isinstance(source, (str, os.PathLike)) else source
+        expected = (type(self).__name__, len(pin_coords), tuple(image_shape[:2]))
+        found = (state["algorithm"], state["num_pins"], tuple(state["image_shape"]))
+        if found != expected:
+            raise ValueError(f"Checkpoint of {found} cannot resume a run of {expected}")
+        return state
+
+    def emission_policy(self, kwargs, default_every=1):
+        """
+        Builds the frame emission policy from the run options.
+
+        Args:
+            kwargs (dict): The run's keyword arguments. ``frame_every`` (int) emits a frame
+                every N steps, ``frame_interval_ms`` (float) at most one frame per interval,
+                and ``final_only`` (bool) only the final frame.
+            default_every (int): The algorithm's default for ``frame_every``.
+
+        Returns:
+            EmissionPolicy: The policy.
+        """
+        return EmissionPolicy(
+            every_n=kwargs.get("frame_every", default_every),
+            every_ms=kwargs.get("frame_interval_ms"),
+            final_only=kwargs.get("final_only", False),
+        )
+
+    def memory_estimate(self, image_shape, num_pins, num_chords, entries, kwargs):
+        """
+        Estimates the memory a run needs before anything is allocated.
+
+        The default counts the chord index and a few image-sized working arrays;
+        algorithms with larger working sets extend it.
+
+        Args:
+            image_shape (tuple): Shape of the target image.
+            num_pins (int): Number of pins.
+            num_chords (int): Number of indexed chords.
+            entries (int): Number of (chord, pixel) entries of the index, see ``estimate_entries``.
+            kwargs (dict): The run's options.
+
+        Returns:
+            dict: Estimated bytes per component.
+        """
+        num_pixels = image_shape[0] * image_shape[1]
+        return {
+            "chord index": entries * 5 + num_chords * 16 + num_pins * num_pins * 4,
+            "image arrays": num_pixels * 8,
+        }
+
+    def prunes_chords(self, kwargs):
+        """
+        Whether a run with these options works on a Radon-pruned chord index, which
+        ``chord_geometry`` builds per image, so a full layout index is of no use to it.
+        """
+        return bool(kwargs.get("candidate_chords"))
+
+    def chord_geometry(self, target_image, pin_coords, kwargs):
+        """
+        Returns the chord index a run works on.
+
+        Args:
+            target_image (np.ndarray): The target grayscale image.
+            pin_coords (np.ndarray): The coordinates of the pins.
+            kwargs (dict): The run's keyword arguments. ``geometry`` (ChordGeometry) is used
+                as given; otherwise the index is loaded from the geometry cache, rasterized
+                with ``line_model`` (str). ``candidate_chords`` (int) prunes the index to the
+                chords with the darkest Radon line integrals, see ``select_chords``. The
+                pruned index depends on the image, so it is sliced from a given
+                ``geometry`` or rasterized, but never stored in the geometry cache. With
+                ``memory_budget`` (int or str, e.g. ``"2G"``) the run's ``memory_estimate``
+                is checked before the index is built.
+
+        Returns:
+            ChordGeometry: The chord index.
+
+        Raises:
+            MemoryBudgetError: If the estimated memory exceeds ``memory_budget``.
+        """
+        num_candidates = kwargs.get("candidate_chords")
+        geometry = kwargs.get("geometry")
+        if geometry is not None and not num_candidates:
+            self.check_memory_budget(target_image.shape, pin_coords, kwargs, geometry=geometry)
+            return geometry
+        line_model = kwargs.get("line_model", LINE_MODEL)
+        if not num_candidates:
+            self.check_memory_budget(target_image.shape, pin_coords, kwargs)
+            return load_geometry(pin_coords, target_image.shape, line_model=line_model)
+        chords = select_chords(target_image, pin_coords, num_candidates)
+        self.check_memory_budget(target_image.shape, pin_coords, kwargs, chords=chords)
+        if geometry is not None:
+            return geometry.subset(chords)
+        return ChordGeometry.from_pins(pin_coords, target_image.shape, chords=chords, line_model=line_model)
+
+    def require_memory_budget(self, image_shape, kwargs):
+        """
+        Refuses a run larger than ``budget_required_above`` that sets no ``memory_budget``.
+
+        Raises:
+            ValueError: If the run needs a budget and has none.
+        """
+        limit = self.budget_required_above
+        if limit is None or max(image_shape[:2]) <= limit or kwargs.get("memory_budget") is not None:
+            return
+        raise ValueError(f"{type(self).__name__} needs a memory_budget above {limit} px; "
+                         f"got a {image_shape[0]}x{image_shape[1]} image")
+
+    def check_memory_budget(self, image_shape, pin_coords, kwargs, chords=None, geometry=None):
+        """
+        Checks the run's ``memory_estimate`` against its ``memory_budget`` option, if set,
+        without building the chord index.
+
+        Args:
+            image_shape (tuple): Shape of the target image.
+            pin_coords (np.ndarray): The coordinates of the pins.
+            kwargs (dict): The run's options, including ``memory_budget`` and ``line_model``.
+            chords (np.ndarray, optional): (M, 2) indexed pin pairs. Defaults to all chords.
+            geometry (ChordGeometry, optional): An existing index, counted exactly.
+
+        Returns:
+            int: The estimated bytes, or None without a budget.
+
+        Raises:
+            MemoryBudgetError: If the estimate exceeds the budget.
+        """
+        budget = kwargs.get("memory_budget")
+        if budget is None:
+            return None
+        num_pins = len(pin_coords)
+        if geometry is not None:
+            num_chords, entries = geometry.num_chords, len(geometry.indices)
+        else:
+            num_chords = len(chords) if chords is not None else num_pins * (num_pins - 1) // 2
+            entries = estimate_entries(pin_coords, image_shape, chords=chords,
+                                       line_model=kwargs.get("line_model", LINE_MODEL))
+        estimate = self.memory_estimate(tuple(image_shape[:2]), num_pins, num_chords, entries, kwargs)
+        return check_memory_budget(estimate, budget)
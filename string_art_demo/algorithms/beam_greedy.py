@@ -0,0 +1,219 @@
+import numpy as np
+from .base import BaseStringArtAlgorithm, delta_event
+from .geometry import render_sequence
+from .greedy import residual_array, subtract_line
+
+# Score of the (pin, pin) slots that are not chords, low enough to never be picked.
+_EXCLUDED = np.iinfo(np.int64).min // 4
+
+
+class BeamGreedyAlgorithm(BaseStringArtAlgorithm):
+    """
+    Greedy string art with a bounded beam-search lookahead.
+
+    Before committing each line, a beam of ``beam_width`` partial paths is expanded
+    ``beam_depth`` lines ahead and the first line of the best path is committed.
+    Every chord's greedy score against the committed residual is kept up to date
+    incrementally; a beam only stores the pixels its own lines touched and their
+    added darkness, so scoring a beam's candidates costs a correction over those few
+    pixels instead of a pass over every candidate chord.
+    """
+
+    def _expand(self, beams, current_pin, geometry, scores, line_values, entry_chords, chord_pins, width, last):
+        """
+        Extends every beam by each chord leaving its end pin, scored in one batch, and
+        keeps the ``width`` best extensions.
+
+        A beam is ``(gain, chords, pixels, delta)``: the total error reduction of its
+        lines, the lines, and the darkness they add to each touched flat pixel.
+        Relative to the committed residual, a candidate chord's score drops by
+        ``2 * sum(delta * line)`` over the beam's pixels it crosses.
+
+        Returns:
+            tuple: ``(beams, candidates_scored)``. On the ``last`` level the touched
+                   pixels of the new beams are not needed and left out.
+        """
+        num_pins = geometry.num_pins
+        ends = np.array([chords[-1][1] if chords else current_pin for _, chords, _, _ in beams])
+        chord_ids = geometry.lookup[ends].astype(np.int64)
+        valid = chord_ids >= 0
+        if not valid.any():
+            return [], 0
+        gains = np.array([gain for gain, _, _, _ in beams], dtype=np.int64)
+        total = np.where(valid, gains[:, None] + scores[chord_ids], _EXCLUDED)
+
+        # Corrections for the pixels each beam has already darkened, batched over beams.
+        # A crossing chord is a candidate of the beam if it leaves the beam's end pin.
+        lengths = [len(pixels) for _, _, pixels, _ in beams]
+        if sum(lengths):
+            pixels = np.concatenate([pixels for _, _, pixels, _ in beams])
+            delta = np.concatenate([delta for _, _, _, delta in beams])
+            entries, owner = geometry.entries_crossing(pixels)
+            beam = np.repeat(np.arange(len(beams)), lengths)[owner]
+            crossing = entry_chords[entries]
+            u, v = chord_pins[0][crossing], chord_pins[1][crossing]
+            end = ends[beam]
+            leaves = (u == end) | (v == end)
+            keys = beam[leaves] * num_pins + (u + v - end)[leaves]
+            weights = 2 * delta[owner[leaves]] * line_values[entries[leaves]]
+            corrections = np.bincount(keys, weights=weights, minlength=total.size)
+            total -= np.rint(corrections).astype(np.int64).reshape(total.shape)
+
+        # A stable sort breaks ties towards the first beam and the lowest pin, like argmax.
+        flat = total.reshape(-1)
+        best = np.argsort(-flat, kind="stable")[:min(width, np.count_nonzero(valid))]
+        expanded = []
+        for i in best:
+            b, next_pin = divmod(int(i), num_pins)
+            _, chords, pixels, delta = beams[b]
+            line = (int(ends[b]), next_pin)
+            if not last:
+                # Copy-on-write: the parent's arrays are shared by its other children.
+                k = chord_ids[b, next_pin]
+                start, end = geometry.indptr[k], geometry.indptr[k + 1]
+                pixels, inverse = np.unique(np.concatenate([pixels, geometry.indices[start:end]]),
+                                            return_inverse=True)
+                delta = np.bincount(inverse, weights=np.concatenate([delta, line_values[start:end]]),
+                                    minlength=len(pixels)).astype(np.int64)
+            expanded.append((int(flat[i]), chords + [line], pixels, delta))
+        return expanded, int(np.count_nonzero(valid))
+
+    def memory_estimate(self, image_shape, num_pins, num_chords, entries, kwargs):
+        """
+        Adds the uint8 line values, cached scores and pixel index of incremental scoring.
+        """
+        estimate = super().memory_estimate(image_shape, num_pins, num_chords, entries, kwargs)
+        estimate["line values"] = entries + num_chords * 8
+        estimate["incremental scores"] = entries * 4 + num_chords * 8
+        estimate["pixel index"] = entries * 12 + image_shape[0] * image_shape[1] * 8
+        return estimate
+
+    def run(self, target_image, pin_coords, max_lines=200, line_darkness=25, beam_width=4, beam_depth=2, **kwargs):
+        """
+        Runs the beam-search greedy algorithm.
+
+        Args:
+            target_image (np.ndarray): The target grayscale image.
+            pin_coords (np.ndarray): The coordinates of the pins.
+            max_lines (int): The maximum number of lines (chords) to draw.
+            line_darkness (int): The value to add to the canvas for each line.
+            beam_width (int): Partial paths kept at each lookahead level.
+            beam_depth (int): Lines looked ahead before committing one. A width and
+                depth of 1 is plain greedy.
+            geometry (ChordGeometry, optional): Chord index of pin_coords, passed in
+                **kwargs. Loaded from the geometry cache if omitted.
+            line_model (str, optional): Line model used to rasterize the chords when the
+                geometry is loaded here, passed in **kwargs. See ``LINE_MODELS``.
+            candidate_chords (int, optional): Only consider this many chords, preselected
+                by their Radon line integrals, passed in **kwargs. See ``chord_geometry``.
+            memory_budget (int or str, optional): Fail before building the chord index
+                if the estimated memory exceeds this, passed in **kwargs. See ``chord_geometry``.
+            checkpoint (str, optional): File the committed sequence is saved to, passed
+                in **kwargs. See ``checkpointer``.
+            resume_from (str or dict, optional): Checkpoint to continue from, passed in
+                **kwargs. See ``GreedyAlgorithm.run``.
+            initial_sequence (list, optional): Lines of an earlier run of the same image and
+                options to continue, passed in **kwargs. Its last ``beam_depth - 1`` lines
+                were chosen with a lookahead cut short by that run's max_lines, so they are
+                dropped and searched again; the result then equals a run from scratch.
+
+        Yields:
+            dict: The state after each committed line, as ``GreedyAlgorithm`` yields it.
+                  Steps the emission policy skips yield a delta event with only the chord.
+        """
+        inverted_target = 255 - target_image
+        canvas_flat = np.zeros(inverted_target.size, dtype=np.uint16)
+
+        profiler = self.profiler(kwargs)
+        with profiler.phase("geometry"):
+            geometry = self.chord_geometry(target_image, pin_coords, kwargs)
+            line_values = geometry.line_values(line_darkness, dtype=np.uint8)
+            line_sq = geometry.weighted_sums(line_values)
+
+        checkpointer = self.checkpointer(kwargs, pin_coords, target_image.shape)
+        resume = self.resume_state(kwargs, pin_coords, target_image.shape)
+        current_pin = 0
+        sequence = []
+        initial = []
+        if resume is None and kwargs.get("initial_sequence"):
+            initial = [tuple(int(p) for p in line) for line in kwargs["initial_sequence"]][:max_lines]
+            initial = initial[:max(0, len(initial) - (beam_depth - 1))]
+        continued = resume is not None or bool(initial)
+        if continued:
+            with profiler.phase("resume"):
+                if resume is not None:
+                    sequence = list(resume["sequence"])
+                    current_pin = int(resume["current_pin"])
+                else:
+                    sequence = initial
+                    current_pin = sequence[-1][1]
+                canvas_flat[:] = render_sequence(sequence, geometry, line_darkness).reshape(-1)
+
+        with profiler.phase("initial_scores"):
+            residual = residual_array(inverted_target, canvas_flat)
+            scores = 2 * geometry.weighted_sums(line_values, residual) - line_sq
+            entry_chords = geometry.chord_of_entry()
+            # Contiguous copies: gathering single columns is much faster than gathering rows.
+            chord_pins = (np.ascontiguousarray(geometry.chords[:, 0]), np.ascontiguousarray(geometry.chords[:, 1]))
+            display_canvas = (255 - np.minimum(canvas_flat, 255)).astype(np.uint8).reshape(inverted_target.shape)
+            display_residual = np.clip(residual, 0, 255).astype(np.uint8).reshape(inverted_target.shape)
+
+        policy = self.emission_policy(kwargs)
+        empty = np.zeros(0, dtype=np.int64)
+        if continued:
+            yield profiler.attach({
+                "status": f"{'Resumed' if resume is not None else 'Continued'} at line {len(sequence)}",
+                "line_num": len(sequence),
+                "sequence": list(sequence),
+                "canvas": display_canvas.copy(),
+                "residual": display_residual.copy(),
+            }, final=len(sequence) >= max_lines)
+
+        for line_num in range(len(sequence), max_lines):
+            with profiler.phase("search"):
+                beams = [(0, [], empty, empty)]
+                best = None
+                depth = min(beam_depth, max_lines - line_num)
+                for level in range(depth):
+                    beams, scored = self._expand(beams, current_pin, geometry, scores, line_values,
+                                                 entry_chords, chord_pins, beam_width, last=level == depth - 1)
+                    profiler.count("candidates_scored", scored)
+                    if not beams:
+                        break
+                    best = beams[0]
+            if best is None:
+                checkpointer.save(sequence, current_pin=current_pin)
+                break
+            best_chord = best[1][0]
+            sequence.append(best_chord)
+
+            with profiler.phase("update"):
+                k = geometry.chord_id(*best_chord)
+                start, end = geometry.indptr[k], geometry.indptr[k + 1]
+                idx = geometry.indices[start:end]
+                values = line_values[start:end]
+                canvas_flat[idx] += values.astype(np.uint16)
+                residual = subtract_line(residual, idx, values)
+                entries, owner = geometry.entries_crossing(idx)
+                np.subtract.at(scores, entry_chords[entries], 2 * values[owner].astype(np.int64) * line_values[entries])
+                display_canvas.reshape(-1)[idx] = 255 - np.minimum(canvas_flat[idx], 255)
+                display_residual.reshape(-1)[idx] = np.clip(residual[idx], 0, 255)
+                current_pin = best_chord[1]
+            profiler.count("lines")
+
+            is_last = line_num + 1 == max_lines
+            if checkpointer.due(final=is_last):
+                with profiler.phase("checkpoint"):
+                    checkpointer.save(sequence, current_pin=current_pin)
+
+            if not policy.due(line_num + 1, final=is_last):
+                yield delta_event(line_num + 1, best_chord)
+                continue
+
+            profiler.count("frames")
+            yield profiler.attach({
+                "line_num": line_num + 1,
+                "chord": best_chord,
+                "canvas": display_canvas.copy(),
+                "residual": display_residual.copy(),
+            }, final=is_last)
@@ -0,0 +1,106 @@
+import re
+import numpy as np
+from .geometry import LINE_MODEL, ChordGeometry, all_chord_pairs, chord_lengths
+
+# Binary size suffixes accepted by parse_size.
+_UNITS = {"": 1, "B": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+# Number of chords rasterized to calibrate the entry estimate of non-aliased line models.
+ENTRY_SAMPLE_SIZE = 64
+
+
+def parse_size(size):
+    """
+    Parses a byte count given as a number or a string such as ``"512M"`` or ``"1.5GB"``
+    (binary units).
+
+    Raises:
+        ValueError: If the string is not a size.
+    """
+    if isinstance(size, (int, float, np.integer, np.floating)):
+        return int(size)
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMGT]?)(I?B)?\s*", str(size).upper())
+    if match is None:
+        raise ValueError(f"Not a size: {size!r}")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def format_size(num_bytes):
+    """
+    Formats a byte count with a binary unit, e.g. ``"1.5 GiB"``.
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(num_bytes) < 1024 or unit == "GiB":
+            break
+        num_bytes /= 1024
+    return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+
+
+class MemoryBudgetError(MemoryError):
+    """
+    Raised before a run allocates its arrays when its estimated memory exceeds the budget.
+    """
+
+    def __init__(self, estimate, budget):
+        """
+        Args:
+            estimate (dict): Estimated bytes per component.
+            budget (int): The budget in bytes.
+        """
+        self.estimate = dict(estimate)
+        self.budget = budget
+        parts = ", ".join(f"{name} {format_size(size)}" for name, size in
+                          sorted(self.estimate.items(), key=lambda item: -item[1]))
+        super().__init__(f"Estimated memory {format_size(sum(self.estimate.values()))} exceeds the budget "
+                         f"of {format_size(budget)} ({parts}). Use fewer pins, a smaller canvas, "
+                         f"candidate_chords or an aliased line model.")
+
+
+def estimate_entries(pin_coords, image_shape, chords=None, line_model=LINE_MODEL, sample_size=ENTRY_SAMPLE_SIZE):
+    """
+    Estimates how many (chord, pixel) entries a chord index holds without building it.
+
+    Aliased lines have exactly ``chord_lengths`` pixels. Other line models are
+    calibrated by rasterizing an evenly spaced sample of the chords.
+
+    Args:
+        pin_coords (np.ndarray): The (y, x) coordinates of the pins.
+        image_shape (tuple): The (height, width) of the target image.
+        chords (np.ndarray, optional): (M, 2) pin pairs. Defaults to all chords.
+        line_model (str): The line model, see ``LINE_MODELS``.
+        sample_size (int): Number of chords rasterized for the calibration.
+
+    Returns:
+        int: The estimated number of entries.
+    """
+    if chords is None:
+        chords = all_chord_pairs(len(pin_coords))
+    lengths = chord_lengths(pin_coords, chords)
+    if line_model == LINE_MODEL or len(chords) == 0:
+        return int(lengths.sum())
+    sample = np.unique(np.linspace(0, len(chords) - 1, min(sample_size, len(chords))).astype(np.int64))
+    sampled = ChordGeometry.from_pins(pin_coords, image_shape, chords=np.asarray(chords)[sample],
+                                      line_model=line_model)
+    ratio = len(sampled.indices) / lengths[sample].sum()
+    return int(np.ceil(ratio * lengths.sum()))
+
+
+def check_memory_budget(estimate, budget):
+    """
+    Checks a per-component memory estimate against a budget.
+
+    Args:
+        estimate (dict): Estimated bytes per component.
+        budget (int or str): The budget, see ``parse_size``.
+
+    Returns:
+        int: The estimated total in bytes.
+
+    Raises:
+        MemoryBudgetError: If the estimate exceeds the budget.
+    """
+    budget = parse_size(budget)
+    total = sum(estimate.values())
+    if total > budget:
+        raise MemoryBudgetError(estimate, budget)
+    return total
@@ -0,0 +1,144 @@
+import json
+import os
+import random
+import time
+import numpy as np
+
+# Bumped when the checkpoint layout changes; older files are rejected on load.
+CHECKPOINT_VERSION = 1
+
+
+def pin_array(sequence, num_pins):
+    """
+    Packs a sequence of (pin, pin) lines into the smallest integer array that holds
+    the pin indices.
+    """
+    dtype = np.int16 if num_pins <= np.iinfo(np.int16).max else np.int32
+    return np.asarray(sequence, dtype=dtype).reshape(-1, 2)
+
+
+def rng_state(rng):
+    """
+    Returns the state of a ``random.Random`` (or the ``random`` module) as an array.
+    """
+    version, internal, gauss_next = rng.getstate()
+    return np.array(internal + (np.nan if gauss_next is None else gauss_next,), dtype=np.float64)
+
+
+def restore_rng(state):
+    """
+    Builds a ``random.Random`` that continues from a state saved by ``rng_state``.
+    """
+    internal = tuple(int(v) for v in state[:-1])
+    gauss_next = None if np.isnan(state[-1]) else float(state[-1])
+    rng = random.Random()
+    rng.setstate((3, internal, gauss_next))
+    return rng
+
+
+def generator_state(rng):
+    """
+    Returns the state of a ``numpy.random.Generator`` as a JSON string; its integers
+    exceed 64 bits.
+    """
+    return json.dumps(rng.bit_generator.state)
+
+
+def restore_generator(state):
+    """
+    Builds a ``numpy.random.Generator`` that continues from a state saved by ``generator_state``.
+    """
+    state = json.loads(str(state))
+    rng = np.random.Generator(getattr(np.random, state["bit_generator"])())
+    rng.bit_generator.state = state
+    return rng
+
+
+def save_checkpoint(path, algorithm, num_pins, image_shape, sequence, **state):
+    """
+    Writes a checkpoint atomically, so a crash mid-write keeps the previous one.
+
+    Args:
+        path (str): The ``.npz`` file.
+        algorithm (str): Name of the algorithm class, checked on resume.
+        num_pins (int): Pin count of the run.
+        image_shape (tuple): Shape of the target image.
+        sequence (list): The (pin, pin) lines so far. Canvases and residuals are not
+            stored; they are rebuilt from the sequence.
+        **state: Further scalars or arrays of the algorithm's state.
+    """
+    arrays = {
+        "version": CHECKPOINT_VERSION,
+        "algorithm": algorithm,
+        "num_pins": num_pins,
+        "image_shape": np.asarray(image_shape[:2], dtype=np.int64),
+        "sequence": pin_array(sequence, num_pins),
+    }
+    arrays.update(state)
+    tmp = f"{path}.tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    """
+    Reads a checkpoint written by ``save_checkpoint``.
+
+    Returns:
+        dict: The header fields, ``sequence`` as a list of (pin, pin) tuples, and the
+              algorithm's state; 0-d arrays are returned as Python scalars.
+
+    Raises:
+        ValueError: If the file is from an incompatible checkpoint version.
+    """
+    with np.load(path) as data:
+        state = {name: data[name].item() if data[name].ndim == 0 else data[name] for name in data.files}
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint")
+    state["image_shape"] = tuple(int(s) for s in state["image_shape"])
+    state["sequence"] = [(int(u), int(v)) for u, v in state["sequence"]]
+    return state
+
+
+class Checkpointer:
+    """
+    Saves a run's state to one file at most once per ``interval_s`` seconds, and
+    always at the final step.
+    """
+
+    enabled = True
+
+    def __init__(self, path, algorithm, num_pins, image_shape, interval_s=30.0):
+        self.path = path
+        self.algorithm = algorithm
+        self.num_pins = num_pins
+        self.image_shape = image_shape
+        self.interval_s = interval_s
+        self._last_save = time.perf_counter()
+
+    def due(self, final=False):
+        """
+        Returns whether the state should be saved now.
+        """
+        return final or time.perf_counter() - self._last_save >= self.interval_s
+
+    def save(self, sequence, **state):
+        save_checkpoint(self.path, self.algorithm, self.num_pins, self.image_shape, sequence, **state)
+        self._last_save = time.perf_counter()
+
+
+class NullCheckpointer:
+    """
+    The disabled checkpointer: never due, saving is a no-op.
+    """
+
+    enabled = False
+
+    def due(self, final=False):
+        return False
+
+    def save(self, sequence, **state):
+        pass
+
+
+NULL_CHECKPOINTER = NullCheckpointer()
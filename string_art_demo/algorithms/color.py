@@ -0,0 +1,280 @@
+import os
+import queue
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from .base import BaseStringArtAlgorithm
+from .geometry import ChordGeometry, render_sequence
+from .shared import attach_arrays, release_arrays, share_arrays
+
+# Thread colours (name -> RGB) of the built-in palettes.
+PALETTES = {
+    "cmyk": {"cyan": (0, 255, 255), "magenta": (255, 0, 255), "yellow": (255, 255, 0), "black": (0, 0, 0)},
+    "cmy": {"cyan": (0, 255, 255), "magenta": (255, 0, 255), "yellow": (255, 255, 0)},
+}
+
+# Per-process state of channel workers, set by _init_channel_worker.
+_channel_context = {}
+
+# Seconds between progress messages a channel worker sends.
+_PROGRESS_INTERVAL = 0.2
+
+
+def parse_palette(palette):
+    """
+    Resolves a palette name from ``PALETTES``, a comma-separated list of ``#rrggbb``
+    colours, or a name -> RGB mapping.
+
+    Returns:
+        dict: Thread colour name -> (r, g, b).
+    """
+    if isinstance(palette, dict):
+        return {name: tuple(int(c) for c in rgb) for name, rgb in palette.items()}
+    if palette in PALETTES:
+        return dict(PALETTES[palette])
+    colors = {}
+    for code in palette.split(","):
+        code = code.strip().lstrip("#")
+        if len(code) != 6:
+            raise ValueError(f"Unknown palette or colour: {palette}")
+        colors["#" + code.lower()] = tuple(int(code[i:i + 2], 16) for i in (0, 2, 4))
+    return colors
+
+
+def decompose(rgb_image, colors, iterations=300, sparsity=0.02):
+    """
+    Splits an RGB image into the amount of each thread colour per pixel.
+
+    Threads darken a white canvas subtractively: a pixel's absorbance ``1 - rgb / 255``
+    is modelled as the sum of each colour's absorbance times its amount in [0, 1].
+    The amounts are fitted per pixel by projected gradient descent; the small L1
+    ``sparsity`` term prefers one dark thread over several light ones, so with CMYK
+    neutral greys go to black rather than to equal parts of cyan, magenta and yellow.
+
+    Args:
+        rgb_image (np.ndarray): (H, W, 3) uint8 image.
+        colors (list): The (r, g, b) thread colours.
+
+    Returns:
+        np.ndarray: (H, W, K) amounts, one channel per colour.
+    """
+    absorbance = (255 - rgb_image.astype(np.float64)).reshape(-1, 3) / 255
+    color_absorbance = (255 - np.asarray(colors, dtype=np.float64)) / 255
+    step = 1 / max(np.linalg.norm(color_absorbance @ color_absorbance.T, 2), 1e-9)
+    amounts = np.zeros((len(absorbance), len(colors)))
+    for _ in range(iterations):
+        gradient = (amounts @ color_absorbance - absorbance) @ color_absorbance.T + sparsity
+        amounts = np.clip(amounts - step * gradient, 0, 1)
+    return amounts.reshape(rgb_image.shape[:2] + (len(colors),))
+
+
+def interleave(sequences):
+    """
+    Merges per-colour line sequences into one plan that spreads every colour evenly
+    over the whole plan: the i-th of n lines of a colour lands at (i + 0.5) / n.
+
+    Args:
+        sequences (list): One list of (pin, pin) lines per colour.
+
+    Returns:
+        list: ``(colour_index, pin, pin)`` steps.
+    """
+    keys, plan = [], []
+    for c, sequence in enumerate(sequences):
+        for i, (u, v) in enumerate(sequence):
+            keys.append((i + 0.5) / len(sequence))
+            plan.append((c, int(u), int(v)))
+    order = np.argsort(keys, kind="stable")
+    return [plan[i] for i in order]
+
+
+def render_plan(plan, colors, geometry, line_darkness):
+    """
+    Renders a colour plan on a white canvas.
+
+    Returns:
+        np.ndarray: (H, W, 3) uint8 image.
+    """
+    steps = np.asarray(plan, dtype=np.int64).reshape(-1, 3)
+    darkness = np.stack([render_sequence(steps[steps[:, 0] == c, 1:], geometry, line_darkness)
+                         for c in range(len(colors))])
+    color_absorbance = (255 - np.asarray(colors, dtype=np.float64)) / 255
+    coverage = np.minimum(darkness, 255).astype(np.float64) / 255
+    absorbance = np.tensordot(coverage, color_absorbance, axes=(0, 0))
+    return (255 * (1 - np.clip(absorbance, 0, 1))).round().astype(np.uint8)
+
+
+def _init_channel_worker(spec, image_shape, num_pins, progress, stop):
+    """
+    Maps the shared chord geometry into a worker process.
+    """
+    blocks, arrays = attach_arrays(spec)
+    _channel_context.update(
+        blocks=blocks,
+        geometry=ChordGeometry(arrays["chords"], arrays["indptr"], arrays["indices"],
+                               arrays["weights"], image_shape, num_pins),
+        progress=progress,
+        stop=stop,
+    )
+
+
+def _solve_channel(algorithm, channel, target_image, pin_coords, params):
+    """
+    Runs the wrapped algorithm on one colour channel, reporting progress on the
+    shared queue. Stops early, between progress reports, once the run's stop flag is set.
+
+    Returns:
+        tuple: ``(channel, sequence)``.
+    """
+    ctx = _channel_context
+    max_lines = params.get("max_lines")
+    sequence, last_report = [], 0.0
+    for result in algorithm.run(target_image, pin_coords, geometry=ctx["geometry"], final_only=True, **params):
+        if result.get("error"):
+            raise RuntimeError(result["status"])
+        if "chord" in result:
+            sequence.append(tuple(int(p) for p in result["chord"]))
+        if "sequence" in result:
+            sequence = [tuple(int(p) for p in line) for line in result["sequence"]]
+        now = time.perf_counter()
+        if now - last_report >= _PROGRESS_INTERVAL:
+            last_report = now
+            if ctx["stop"].is_set():
+                break
+            progress = result.get("progress")
+            if progress is None and max_lines:
+                progress = result.get("line_num", 0) / max_lines
+            ctx["progress"].put((channel, progress or 0.0, result.get("status") or f"{len(sequence)} lines"))
+    return channel, sequence
+
+
+class ColorAlgorithm(BaseStringArtAlgorithm):
+    """
+    Coloured-thread wrapper around any string art algorithm.
+
+    The RGB target is decomposed into one amount channel per thread colour. Each
+    channel is solved by the wrapped algorithm on a process pool that maps a single
+    shared chord geometry, and the per-colour sequences are interleaved into one plan.
+    """
+
+    def __init__(self, algorithm, palette="cmyk", num_workers=None):
+        """
+        Args:
+            algorithm (BaseStringArtAlgorithm): The algorithm that solves each channel.
+            palette (str or dict): A ``PALETTES`` name, comma-separated ``#rrggbb``
+                colours, or a name -> RGB mapping. See ``parse_palette``.
+            num_workers (int, optional): Worker processes. Defaults to one per colour,
+                at most one per core.
+        """
+        self.algorithm = algorithm
+        self.colors = parse_palette(palette)
+        self.num_workers = num_workers
+
+    def run(self, target_image, pin_coords, **kwargs):
+        """
+        Runs the wrapped algorithm once per thread colour.
+
+        Args:
+            target_image (np.ndarray): The (H, W, 3) RGB target; a grayscale image is
+                treated as grey.
+            pin_coords (np.ndarray): The coordinates of the pins.
+            **kwargs: Parameters of the wrapped algorithm. ``max_lines`` is the total over
+                all colours, split in proportion to each colour's amount of ink.
+
+        Yields:
+            dict: Progress states with ``channel`` and ``channel_progress``, a ``canvas``
+                  each time a colour completes, and a final state with the RGB
+                  ``canvas``, the interleaved ``plan`` of ``(colour_index, pin, pin)``
+                  steps and the ``palette``.
+        """
+        if target_image.ndim == 2:
+            target_image = np.repeat(target_image[:, :, None], 3, axis=2)
+        names, colors = list(self.colors), list(self.colors.values())
+        line_darkness = kwargs.get("line_darkness", 25)
+
+        yield {"status": "Separating colours...", "progress": 0.0}
+        amounts = decompose(target_image, colors)
+        luminance = (255 * (1 - amounts.max(axis=2))).astype(np.uint8)
+        geometry = self.chord_geometry(luminance, pin_coords, kwargs)
+
+        params = {k: v for k, v in kwargs.items()
+                  if k not in ("geometry", "candidate_chords", "final_only", "frame_every", "frame_interval_ms",
+                               "checkpoint", "resume_from")}
+        ink = amounts.reshape(-1, len(colors)).sum(axis=0)
+        jobs = []
+        for c, name in enumerate(names):
+            channel_params = dict(params)
+            if "max_lines" in params:
+                channel_params["max_lines"] = int(round(params["max_lines"] * ink[c] / max(ink.sum(), 1e-9)))
+                if channel_params["max_lines"] == 0:
+                    continue
+            channel_target = (255 - np.round(255 * amounts[:, :, c])).astype(np.uint8)
+            jobs.append((name, channel_target, channel_params))
+
+        sequences = {name: [] for name in names}
+        channel_progress = {name: 0.0 for name, _, _ in jobs}
+        progress = multiprocessing.Queue()
+        stop = multiprocessing.Event()
+        blocks, spec = share_arrays({
+            "chords": geometry.chords,
+            "indptr": geometry.indptr,
+            "indices": geometry.indices,
+            "weights": geometry.weights,
+        })
+        pool = ProcessPoolExecutor(
+            max_workers=max(1, min(self.num_workers or len(jobs) or 1, os.cpu_count() or 1)),
+            initializer=_init_channel_worker,
+            initargs=(spec, geometry.image_shape, geometry.num_pins, progress, stop),
+        )
+        finished = False
+        try:
+            pending = {pool.submit(_solve_channel, self.algorithm, name, target, pin_coords, channel_params)
+                       for name, target, channel_params in jobs}
+            while pending:
+                done, pending = wait(pending, timeout=_PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                while True:
+                    try:
+                        name, fraction, status = progress.get_nowait()
+                    except queue.Empty:
+                        break
+                    channel_progress[name] = fraction
+                    yield {
+                        "status": f"{name.capitalize()}: {status}",
+                        "progress": 0.95 * sum(channel_progress.values()) / len(channel_progress),
+                        "channel": name,
+                        "channel_progress": fraction,
+                    }
+                for future in done:
+                    name, sequence = future.result()
+                    sequences[name] = sequence
+                    channel_progress[name] = 1.0
+                    partial = [(c, u, v) for c, n in enumerate(names) for u, v in sequences[n]]
+                    yield {
+                        "status": f"{name.capitalize()}: {len(sequence)} lines done",
+                        "progress": 0.95 * sum(channel_progress.values()) / len(channel_progress),
+                        "channel": name,
+                        "channel_progress": 1.0,
+                        "canvas": render_plan(partial, colors, geometry, line_darkness),
+                    }
+            finished = True
+        except Exception as e:
+            yield {"status": f"Error while solving colours: {e}", "progress": 1.0, "error": True}
+            return
+        finally:
+            # A run closed by its consumer, or failed, stops the other channels
+            # instead of waiting for them.
+            if not finished:
+                stop.set()
+            pool.shutdown(wait=finished, cancel_futures=not finished)
+            release_arrays(blocks)
+            progress.close()
+
+        plan = interleave([sequences[name] for name in names])
+        yield {
+            "status": "Done!",
+            "progress": 1.0,
+            "canvas": render_plan(plan, colors, geometry, line_darkness),
+            "plan": plan,
+            "palette": dict(self.colors),
+        }
@@ -1,109 +1,277 @@
 import numpy as np
-import networkx as nx
-from scipy.optimize import nnls
-from skimage.draw import line as skimage_line
-from .base import BaseStringArtAlgorithm
+from scipy import sparse
+from scipy.optimize import lsq_linear, nnls
+from .base import NULL_PROFILER, BaseStringArtAlgorithm, delta_event
+from .checkpoint import NULL_CHECKPOINTER
+from .euler import edge_count_matrix, euler_trail, eulerize
+from .geometry import FULL_WEIGHT, LINE_MODEL, ChordGeometry, render_sequence
+
+# Former solver names, still accepted by run.
+_SOLVER_ALIASES = {"lsqr": "lsmr"}
 
 class ContinuousRelaxationAlgorithm(BaseStringArtAlgorithm):
     """
     Implements the Continuous Relaxation + Eulerization algorithm.
     """
 
-    def _get_all_chords(self, num_pins):
-        chords = []
-        for i in range(num_pins):
-            for j in range(i + 1, num_pins):
-                chords.append((i, j))
-        return chords
+    # The float64 chord matrix and its transpose are several times the chord index.
+    budget_required_above = 1000
+
+    def _build_chord_matrix(self, geometry):
+        """
+        Builds the sparse (pixels, chords) matrix of chord contributions. The CSR
+        chord index already is the column-compressed layout of this matrix.
+        """
+        data = geometry.weights.astype(np.float64) / FULL_WEIGHT
+        return sparse.csc_matrix((data, geometry.indices, geometry.indptr),
+                                 shape=(geometry.num_pixels, geometry.num_chords))
+
+    def _solve_projected_gradient(self, A, b, tol, max_iter, report_every=10, profiler=NULL_PROFILER,
+                                  checkpointer=NULL_CHECKPOINTER, start=None):
+        """
+        Accelerated projected gradient (FISTA) for min ||Ax - b||^2 subject to x >= 0.
+
+        Yields progress dicts while iterating and returns the solution as the
+        generator's return value. The iterate (``x``, ``y``, ``t`` and the iteration)
+        is checkpointed as ``solver_*`` fields; ``start`` continues from such a checkpoint.
+        """
+        At = A.T.tocsr()
+        Atb = At @ b
+
+        # Lipschitz constant of the gradient: largest eigenvalue of A^T A (power iteration).
+        v = np.ones(A.shape[1])
+        lipschitz = 1.0
+        for _ in range(30):
+            w = At @ (A @ v)
+            lipschitz = np.linalg.norm(w)
+            if lipschitz == 0:
+                return np.zeros(A.shape[1])
+            v = w / lipschitz
+        step = 1.0 / (lipschitz * 1.01)
+
+        x = np.zeros(A.shape[1])
+        y = x.copy()
+        t = 1.0
+        first_iteration = 1
+        if start is not None:
+            x, y, t = start["solver_x"].copy(), start["solver_y"].copy(), start["solver_t"]
+            first_iteration = start["solver_iteration"] + 1
+        for iteration in range(first_iteration, max_iter + 1):
+            gradient = At @ (A @ y) - Atb
+            x_next = np.maximum(y - step * gradient, 0.0)
+            t_next = (1.0 + np.sqrt(1.0 + 4.0 * t * t)) / 2.0
+            y = x_next + ((t - 1.0) / t_next) * (x_next - x)
+            change = np.linalg.norm(x_next - x) / max(np.linalg.norm(x_next), 1.0)
+            x, t = x_next, t_next
+            profiler.count("solver_iterations")
+
+            converged = change <= tol
+            if not converged and checkpointer.due():
+                with profiler.phase("checkpoint"):
+                    checkpointer.save([], stage="solving", solver_x=x, solver_y=y, solver_t=t,
+                                      solver_iteration=iteration)
+            if converged or iteration % report_every == 0 or iteration == max_iter:
+                rnorm = np.linalg.norm(A @ x - b)
+                yield {
+                    "status": f"Solving: iteration {iteration}/{max_iter}, residual {rnorm:.1f}",
+                    "progress": 0.2 + 0.3 * iteration / max_iter,
+                    "solver_iteration": iteration,
+                    "residual_norm": rnorm,
+                }
+            if converged:
+                break
+        return x
+
+    def _solve_lsmr(self, A, b, tol, max_iter, profiler=NULL_PROFILER):
+        """
+        Bounded least squares with an LSMR inner solver (scipy's trust region reflective).
+
+        ``lsq_linear`` offers no way to observe its iterations, so this solver reports
+        no progress while it runs; it yields once, after the solve.
+        """
+        result = lsq_linear(A, b, bounds=(0, np.inf), method="trf", lsq_solver="lsmr",
+                            tol=tol, max_iter=max_iter)
+        rnorm = np.linalg.norm(A @ result.x - b)
+        profiler.count("solver_iterations", result.nit)
+        yield {
+            "status": f"Solving: {result.nit} iterations, residual {rnorm:.1f}",
+            "progress": 0.5,
+            "solver_iteration": result.nit,
+            "residual_norm": rnorm,
+        }
+        return result.x
+
+    def _solve_active_set(self, A, b):
+        """
+        Exact dense active-set NNLS. Only practical for small images and pin counts.
+        """
+        x, rnorm = nnls(A.toarray(), b)
+        yield {"status": f"Solved, residual {rnorm:.1f}", "progress": 0.5, "residual_norm": rnorm}
+        return x
 
-    def _draw_line_on_canvas(self, canvas, start_pin_coord, end_pin_coord, line_darkness=1):
-        rr, cc = skimage_line(start_pin_coord[0], start_pin_coord[1], end_pin_coord[0], end_pin_coord[1])
-        canvas[rr, cc] += line_darkness
+    def _render_lines(self, lines, geometry, extra):
+        """
+        Renders (pin, pin) lines, taking those the chord index lacks from ``extra``.
+        """
+        indexed = geometry.lookup[lines[:, 0], lines[:, 1]] >= 0
+        canvas = render_sequence(lines[indexed], geometry)
+        if not indexed.all():
+            canvas += render_sequence(lines[~indexed], extra)
+        return canvas
+
+    def memory_estimate(self, image_shape, num_pins, num_chords, entries, kwargs):
+        """
+        Adds the float64 chord matrix and its transpose, the solver's vectors and, for
+        the active set solver, the dense matrix.
+        """
+        estimate = super().memory_estimate(image_shape, num_pins, num_chords, entries, kwargs)
+        num_pixels = image_shape[0] * image_shape[1]
+        estimate["chord matrix"] = entries * 24 + num_chords * 16 + num_pixels * 8
+        estimate["solver vectors"] = num_chords * 8 * 6 + num_pixels * 8 * 3
+        if kwargs.get("solver") == "active_set":
+            estimate["dense matrix"] = num_pixels * num_chords * 8
+        return estimate
 
-    def run(self, target_image, pin_coords, **kwargs):
+    def run(self, target_image, pin_coords, solver="projected_gradient", tol=1e-4, max_iter=500, **kwargs):
         """
         Runs the Continuous Relaxation + Eulerization algorithm.
+
+        Args:
+            target_image (np.ndarray): The target grayscale image.
+            pin_coords (np.ndarray): The coordinates of the pins.
+            solver (str): The non-negative least squares solver, one of
+                "projected_gradient", "lsmr" or "active_set". "lsqr" is accepted as the
+                former name of "lsmr".
+            tol (float): Relative tolerance at which the iterative solvers stop.
+            max_iter (int): Iteration cap for the iterative solvers.
+            geometry (ChordGeometry, optional): Chord index of pin_coords, passed in
+                **kwargs. Loaded from the geometry cache if omitted.
+            line_model (str, optional): Line model used to rasterize the chords when the
+                geometry is loaded here, passed in **kwargs. See ``LINE_MODELS``.
+            candidate_chords (int, optional): Only consider this many chords, preselected
+                by their Radon line integrals, passed in **kwargs. See ``chord_geometry``.
+            checkpoint (str, optional): File the solver state is saved to, passed in
+                **kwargs: the projected gradient iterate while solving, and the chord
+                weights once solved. See ``checkpointer``.
+            resume_from (str or dict, optional): Checkpoint to continue from, passed in
+                **kwargs. A solved checkpoint skips the solver; a projected gradient
+                iterate continues exactly where it stopped.
+
+        Yields:
+            dict: Animation state at each step, including solver convergence progress
+                  from the projected gradient solver; the others report only their result.
+                  Drawing steps the emission policy skips yield a delta event.
         """
         num_pins = len(pin_coords)
         image_shape = target_image.shape
+        solver = _SOLVER_ALIASES.get(solver, solver)
 
         # Invert the target image
         inverted_target = 255 - target_image
         b = inverted_target.flatten().astype(float)
 
         # 1. Build matrix of chord contributions (A)
-        all_chords = self._get_all_chords(num_pins)
-        num_chords = len(all_chords)
-        A = np.zeros((image_shape[0] * image_shape[1], num_chords), dtype=np.uint8)
-
-        for k, (i, j) in enumerate(all_chords):
-            line_canvas = np.zeros(image_shape, dtype=np.uint8)
-            self._draw_line_on_canvas(line_canvas, pin_coords[i], pin_coords[j])
-            A[:, k] = line_canvas.flatten()
-
-        yield {"status": "Solving for chord weights...", "progress": 0.2}
-
-        # 2. Solve NNLS
-        # This can be very slow for large images/pin counts
-        # For a demo, we might need to downsample or use a faster solver
-        try:
-            x, rnorm = nnls(A, b)
-        except Exception as e:
-            yield {"status": f"Error during NNLS: {e}", "progress": 1.0, "error": True}
-            return
+        profiler = self.profiler(kwargs)
+        with profiler.phase("geometry"):
+            geometry = self.chord_geometry(target_image, pin_coords, dict(kwargs, solver=solver))
+            chords = geometry.chords
+        with profiler.phase("matrix"):
+            A = self._build_chord_matrix(geometry)
+
+        checkpointer = self.checkpointer(kwargs, pin_coords, image_shape)
+        resume = self.resume_state(kwargs, pin_coords, image_shape)
+
+        yield profiler.attach({"status": "Solving for chord weights...", "progress": 0.2})
+
+        # 2. Solve NNLS, unless the checkpoint already holds the solution
+        if resume is not None and resume["stage"] == "solved":
+            x = resume["solver_x"]
+        else:
+            try:
+                if resume is not None and solver != "projected_gradient":
+                    raise ValueError(f"Only the projected gradient solver resumes mid-solve, not {solver}")
+                if solver == "projected_gradient":
+                    solve = self._solve_projected_gradient(A, b, tol, max_iter, profiler=profiler,
+                                                           checkpointer=checkpointer, start=resume)
+                elif solver == "lsmr":
+                    solve = self._solve_lsmr(A, b, tol, max_iter, profiler=profiler)
+                elif solver == "active_set":
+                    solve = self._solve_active_set(A, b)
+                else:
+                    raise ValueError(f"Unknown solver: {solver}")
+                x = yield from profiler.wrap(solve, "solve")
+            except Exception as e:
+                yield {"status": f"Error during NNLS: {e}", "progress": 1.0, "error": True}
+                return
+            if checkpointer.due(final=True):
+                with profiler.phase("checkpoint"):
+                    checkpointer.save([], stage="solved", solver_x=x)
 
         yield {
             "status": "Visualizing chord weights...",
             "progress": 0.5,
             "heatmap": x,
-            "chords": all_chords
+            "chords": chords
         }
 
         # 3. Round weights to get number of wraps for each chord
         # Simple rounding for now. More complex strategies could be used.
         num_wraps = np.round(x).astype(int)
+        profiler.count("wraps", num_wraps.sum())
 
-        # 4. Construct a multigraph and find an Eulerian path
-        G = nx.MultiGraph()
-        G.add_nodes_from(range(num_pins))
-        for k, (i, j) in enumerate(all_chords):
-            if num_wraps[k] > 0:
-                for _ in range(num_wraps[k]):
-                    G.add_edge(i, j)
-
-        # Make the graph Eulerian by first connecting it, then balancing degrees
-        if G.number_of_edges() > 0 and not nx.is_connected(G):
-            components = list(nx.connected_components(G))
-            for i in range(len(components) - 1):
-                G.add_edge(next(iter(components[i])), next(iter(components[i+1])))
+        # 4. Count wraps per pin pair and make the graph Eulerian with short extra chords
+        with profiler.phase("eulerization"):
+            counts = edge_count_matrix(chords, num_wraps, num_pins)
+            start_pin = eulerize(counts, pin_coords)
 
-        odd_degree_nodes = [n for n, d in G.degree() if d % 2 != 0]
-        for i in range(0, len(odd_degree_nodes), 2):
-            if i + 1 < len(odd_degree_nodes):
-                G.add_edge(odd_degree_nodes[i], odd_degree_nodes[i+1])
-
-        yield {"status": "Building string path...", "progress": 0.8}
+        yield profiler.attach({"status": "Building string path...", "progress": 0.8})
 
         # 5. Extract Euler trail
-        path = []
-        if G.number_of_edges() > 0:
-            odd_nodes = [n for n, d in G.degree() if d % 2 != 0]
-            start_node = odd_nodes[0] if odd_nodes else list(G.nodes())[0]
-            path = list(nx.eulerian_path(G, source=start_node))
+        with profiler.phase("trail"):
+            pins = euler_trail(counts, start_pin)
+            path = list(zip(pins[:-1].tolist(), pins[1:].tolist()))
+        profiler.count("lines", len(path))
+
+        # Eulerization may connect pins whose chord a pruned index does not contain.
+        missing = sorted({(min(u, v), max(u, v)) for u, v in path if geometry.chord_id(u, v) < 0})
+        extra = None
+        if missing:
+            with profiler.phase("geometry"):
+                extra = ChordGeometry.from_pins(pin_coords, image_shape, chords=np.array(missing),
+                                                line_model=kwargs.get("line_model", LINE_MODEL))
 
-        # Yield the final animation steps from the path
+        # Yield the final animation steps from the path. Lines are only drawn when a
+        # frame is due, all lines since the previous frame in one pass.
         string_art_canvas = np.zeros(image_shape, dtype=np.uint16)
+        lines = np.array(path, dtype=np.int64).reshape(-1, 2)
         total_lines = len(path)
+        drawn = 0
+        policy = self.emission_policy(kwargs)
         for i, (u, v) in enumerate(path):
-            self._draw_line_on_canvas(string_art_canvas, pin_coords[u], pin_coords[v], 25)
-            display_canvas = np.clip(string_art_canvas, 0, 255).astype(np.uint8)
+            progress = 0.8 + 0.2 * (i / total_lines if total_lines > 0 else 1)
+            if not policy.due(i + 1):
+                yield delta_event(i + 1, (u, v), progress)
+                continue
+            with profiler.phase("drawing"):
+                string_art_canvas += self._render_lines(lines[drawn:i + 1], geometry, extra)
+                drawn = i + 1
+            with profiler.phase("frames"):
+                display_canvas = np.clip(string_art_canvas, 0, 255).astype(np.uint8)
+            profiler.count("frames")
 
-            yield {
+            yield profiler.attach({
                 "status": f"Drawing line {i+1}/{total_lines}",
-                "progress": 0.8 + 0.2 * (i / total_lines if total_lines > 0 else 1),
+                "progress": progress,
                 "canvas": 255 - display_canvas,
                 "line_num": i + 1,
                 "chord": (u, v)
-            }
+            })
+        with profiler.phase("drawing"):
+            string_art_canvas += self._render_lines(lines[drawn:], geometry, extra)
 
-        yield {"status": "Done!", "progress": 1.0, "canvas": 255 - np.clip(string_art_canvas, 0, 255).astype(np.uint8)}
+        yield profiler.attach({
+            "status": "Done!",
+            "progress": 1.0,
+            "canvas": 255 - np.clip(string_art_canvas, 0, 255).astype(np.uint8),
+            "path": pins
+        }, final=True)
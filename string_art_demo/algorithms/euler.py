@@ -0,0 +1,151 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+def pin_distances(pin_coords):
+    """
+    Returns the (P, P) matrix of Euclidean distances between pins.
+    """
+    pin_coords = np.asarray(pin_coords, dtype=np.float64)
+    diff = pin_coords[:, None, :] - pin_coords[None, :, :]
+    return np.sqrt((diff ** 2).sum(axis=-1))
+
+
+def edge_count_matrix(chords, wraps, num_pins):
+    """
+    Builds the symmetric (P, P) matrix holding how many times each chord is wrapped.
+
+    Args:
+        chords (np.ndarray): (M, 2) pin pairs.
+        wraps (np.ndarray): Number of wraps of every chord.
+        num_pins (int): The number of pins.
+
+    Returns:
+        np.ndarray: The int64 edge-count matrix.
+    """
+    chords = np.asarray(chords, dtype=np.int64).reshape(-1, 2)
+    wraps = np.asarray(wraps, dtype=np.int64)
+    used = wraps > 0
+    counts = np.zeros((num_pins, num_pins), dtype=np.int64)
+    np.add.at(counts, (chords[used, 0], chords[used, 1]), wraps[used])
+    np.add.at(counts, (chords[used, 1], chords[used, 0]), wraps[used])
+    return counts
+
+
+def _connect_components(counts, distances):
+    """
+    Joins the components that carry edges with the shortest possible chords, in place.
+    """
+    degree = counts.sum(axis=1)
+    active = np.flatnonzero(degree > 0)
+    if len(active) == 0:
+        return
+    num_components, labels = connected_components(sparse.csr_matrix(counts), directed=False)
+    labels = labels[active]
+    if len(np.unique(labels)) < 2:
+        return
+
+    # Prim-style: repeatedly attach the component closest to the connected set.
+    connected = labels == labels[0]
+    while not connected.all():
+        inside, outside = active[connected], active[~connected]
+        sub = distances[np.ix_(inside, outside)]
+        a, b = np.unravel_index(np.argmin(sub), sub.shape)
+        u, v = inside[a], outside[b]
+        counts[u, v] += 1
+        counts[v, u] += 1
+        connected |= labels == labels[~connected][b]
+
+
+def _pair_odd_nodes(counts, distances):
+    """
+    Pairs odd-degree pins with short chords, in place, leaving the most expensive
+    pair open as the two ends of the trail.
+
+    The odd pins are matched with their neighbours along the pin order (the circle);
+    of the two alternating matchings the shorter one is used.
+
+    Returns:
+        int: The pin the trail should start from, or -1 if every degree is even.
+    """
+    odd = np.flatnonzero(counts.sum(axis=1) % 2 == 1)
+    if len(odd) == 0:
+        return -1
+
+    first = np.stack([odd[0::2], odd[1::2]], axis=1)
+    second = np.stack([odd[1::2], np.roll(odd, -1)[1::2]], axis=1)
+    pairs = min(first, second, key=lambda p: distances[p[:, 0], p[:, 1]].sum())
+
+    # An Euler trail may have two odd ends, so the longest pair needs no extra chord.
+    lengths = distances[pairs[:, 0], pairs[:, 1]]
+    open_pair = int(np.argmax(lengths))
+    for n, (u, v) in enumerate(pairs):
+        if n != open_pair:
+            counts[u, v] += 1
+            counts[v, u] += 1
+    return int(pairs[open_pair, 0])
+
+
+def eulerize(counts, pin_coords):
+    """
+    Adds the chords needed for the wrapped chords to form a single Euler trail.
+
+    Components are joined by their closest pins and odd-degree pins are paired
+    along the circle, so the added chords are short.
+
+    Args:
+        counts (np.ndarray): Symmetric edge-count matrix, modified in place.
+        pin_coords (np.ndarray): The coordinates of the pins.
+
+    Returns:
+        int: A valid start pin for the trail, or -1 if there are no edges.
+    """
+    distances = pin_distances(pin_coords)
+    _connect_components(counts, distances)
+    start = _pair_odd_nodes(counts, distances)
+    if start < 0:
+        active = np.flatnonzero(counts.sum(axis=1) > 0)
+        start = int(active[0]) if len(active) else -1
+    return start
+
+
+def euler_trail(counts, start):
+    """
+    Extracts an Euler trail with an iterative Hierholzer walk.
+
+    Runs in O(edges + pins^2): every pin keeps a cursor into its row of the
+    count matrix that only ever moves forward.
+
+    Args:
+        counts (np.ndarray): Symmetric edge-count matrix of a connected graph
+            with zero or two odd-degree pins. It is not modified.
+        start (int): The start pin; must be odd-degree if any pin is.
+
+    Returns:
+        np.ndarray: The visited pins as an int32 array of length edges + 1,
+                    or an empty array if there are no edges.
+    """
+    if start < 0 or counts.sum() == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    remaining = counts.tolist()
+    num_pins = len(remaining)
+    cursor = [0] * num_pins
+    stack = [int(start)]
+    trail = []
+    while stack:
+        v = stack[-1]
+        row = remaining[v]
+        u = cursor[v]
+        while u < num_pins and row[u] == 0:
+            u += 1
+        cursor[v] = u
+        if u < num_pins:
+            row[u] -= 1
+            remaining[u][v] -= 1
+            stack.append(u)
+        else:
+            trail.append(stack.pop())
+    trail.reverse()
+    return np.array(trail, dtype=np.int32)
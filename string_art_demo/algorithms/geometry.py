@@ -0,0 +1,411 @@
+import numpy as np
+from skimage.draw import line as skimage_line
+from skimage.draw import line_aa as skimage_line_aa
+
+# Weights are stored as 8-bit coverage values; a fully covered pixel has this weight.
+FULL_WEIGHT = 255
+
+# The default rasterization used for chords. Bump RASTER_VERSION whenever the pixels
+# or weights produced for a line model change, so cached indices are rebuilt.
+LINE_MODEL = "skimage_line"
+RASTER_VERSION = 1
+
+# Thread width in pixels used by the "thread" line model unless given as "thread:<width>".
+DEFAULT_THREAD_WIDTH = 1.0
+
+
+def _rasterize_aliased(p0, p1, image_shape):
+    """
+    1-pixel Bresenham line with full coverage on every pixel.
+    """
+    rr, cc = skimage_line(int(p0[0]), int(p0[1]), int(p1[0]), int(p1[1]))
+    return rr, cc, None
+
+
+def _rasterize_antialiased(p0, p1, image_shape):
+    """
+    Xiaolin Wu style anti-aliased line: coverage is split between the two pixels
+    straddling the ideal line.
+    """
+    return skimage_line_aa(int(p0[0]), int(p0[1]), int(p1[0]), int(p1[1]))
+
+
+def _rasterize_thread(p0, p1, image_shape, width=DEFAULT_THREAD_WIDTH):
+    """
+    A thread of the given width in pixels: every pixel near the aliased line is
+    covered in proportion to how much of it lies within the thread.
+    """
+    rr, cc = skimage_line(int(p0[0]), int(p0[1]), int(p1[0]), int(p1[1]))
+    reach = int(np.ceil(width / 2 + 0.5))
+    offsets = np.arange(-reach, reach + 1)
+    dr, dc = np.meshgrid(offsets, offsets, indexing="ij")
+    rr = (rr[:, None] + dr.reshape(1, -1)).reshape(-1)
+    cc = (cc[:, None] + dc.reshape(1, -1)).reshape(-1)
+
+    # Distance of every pixel centre to the segment p0-p1.
+    p0 = np.asarray(p0, dtype=np.float64)
+    direction = np.asarray(p1, dtype=np.float64) - p0
+    length_sq = max(float(direction @ direction), 1e-12)
+    rel = np.stack([rr - p0[0], cc - p0[1]], axis=1)
+    t = np.clip(rel @ direction / length_sq, 0.0, 1.0)
+    dist = np.linalg.norm(rel - t[:, None] * direction, axis=1)
+    return rr, cc, np.clip(width / 2 + 0.5 - dist, 0.0, 1.0)
+
+
+LINE_MODELS = {
+    "skimage_line": _rasterize_aliased,
+    "antialiased": _rasterize_antialiased,
+    "thread": _rasterize_thread,
+}
+
+
+def get_line_model(name):
+    """
+    Returns the rasterizer for a line model name. ``"thread:<width>"`` selects the
+    thread model with a width in pixels.
+
+    Returns:
+        callable: ``rasterize(p0, p1, image_shape) -> (rr, cc, coverage)`` with
+                  coverage in [0, 1], or None where every pixel is fully covered.
+    """
+    base, _, arg = name.partition(":")
+    if base not in LINE_MODELS:
+        raise ValueError(f"Unknown line model: {name}")
+    rasterize = LINE_MODELS[base]
+    if arg:
+        if base != "thread":
+            raise ValueError(f"Line model {base} takes no parameter")
+        width = float(arg)
+        return lambda p0, p1, image_shape: _rasterize_thread(p0, p1, image_shape, width)
+    return rasterize
+
+
+def scale_weights(weights, line_darkness):
+    """
+    Converts 8-bit coverage weights into the integer darkness a line adds to each pixel.
+    """
+    return (weights.astype(np.int32) * int(line_darkness) + FULL_WEIGHT // 2) // FULL_WEIGHT
+
+
+def concat_ranges(starts, lengths):
+    """
+    Builds the concatenation of ``arange(start, start + length)`` for every range.
+
+    Returns:
+        tuple: ``(positions, segment_starts)``, where range ``n`` occupies
+               ``positions[segment_starts[n]:segment_starts[n] + lengths[n]]``.
+    """
+    segment_starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=segment_starts[1:])
+    positions = np.repeat(starts - segment_starts, lengths) + np.arange(lengths.sum(), dtype=np.int64)
+    return positions, segment_starts
+
+
+def all_chord_pairs(num_pins):
+    """
+    Returns every chord (i, j) with i < j as an (M, 2) int array, in the same
+    order as the nested-loop enumeration used by the algorithms.
+    """
+    i, j = np.triu_indices(num_pins, k=1)
+    return np.stack([i, j], axis=1).astype(np.int32)
+
+
+def chord_lengths(pin_coords, chords):
+    """
+    Returns the number of pixels of every chord's aliased (Bresenham) line, which
+    is ``max(|dy|, |dx|) + 1``, without rasterizing it.
+    """
+    pin_coords = np.asarray(pin_coords, dtype=np.int64)
+    chords = np.asarray(chords, dtype=np.int64).reshape(-1, 2)
+    delta = np.abs(pin_coords[chords[:, 0]] - pin_coords[chords[:, 1]])
+    return delta.max(axis=1) + 1 if len(chords) else np.zeros(0, dtype=np.int64)
+
+
+def _grown(array, size):
+    """
+    Returns a copy of ``array`` with room for ``size`` elements.
+    """
+    grown = np.empty(size, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def render_sequence(pins, geometry, line_darkness=25, dtype=np.uint16):
+    """
+    Renders lines onto an empty darkness canvas in one pass: the pixel ranges of all
+    chords are concatenated and summed with a single ``np.bincount``.
+
+    Args:
+        pins (np.ndarray): A continuous path of pins, or an (N, 2) array of (pin, pin) lines.
+        geometry (ChordGeometry): Chord index containing every line.
+        line_darkness (int): The darkness a line adds to each pixel it fully covers.
+        dtype (np.dtype): The canvas dtype. Like repeated ``draw`` calls, sums beyond
+            its range wrap around.
+
+    Returns:
+        np.ndarray: The darkness canvas of ``geometry.image_shape``; clip it to 255 for display.
+
+    Raises:
+        ValueError: If a line is not in the chord index.
+    """
+    pins = np.asarray(pins, dtype=np.int64)
+    lines = pins.reshape(-1, 2) if pins.ndim == 2 else np.stack([pins[:-1], pins[1:]], axis=1)
+    if len(lines) == 0:
+        return np.zeros(geometry.image_shape, dtype=dtype)
+    chord_ids = geometry.lookup[lines[:, 0], lines[:, 1]]
+    if (chord_ids < 0).any():
+        missing = lines[np.argmax(chord_ids < 0)]
+        raise ValueError(f"Chord {tuple(int(p) for p in missing)} is not in the chord index")
+    positions, _ = geometry.gather(chord_ids)
+    values = scale_weights(geometry.weights[positions], line_darkness)
+    canvas = np.bincount(geometry.indices[positions], weights=values, minlength=geometry.num_pixels)
+    return canvas.astype(np.int64).astype(dtype).reshape(geometry.image_shape)
+
+
+class ChordGeometry:
+    """
+    Compact, CSR-style index of the pixels covered by every chord of a pin layout.
+
+    Chord ``k`` covers the flattened pixel indices ``indices[indptr[k]:indptr[k+1]]``
+    with matching 8-bit coverage ``weights``. Memory scales with the total length
+    of all chords instead of chords x pixels.
+    """
+
+    def __init__(self, chords, indptr, indices, weights, image_shape, num_pins):
+        self.chords = np.asarray(chords, dtype=np.int32).reshape(-1, 2)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.uint8)
+        self.image_shape = tuple(int(s) for s in image_shape)
+        self.num_pins = int(num_pins)
+
+        # Pin pair -> chord index, -1 where the chord is not part of the index.
+        self.lookup = np.full((self.num_pins, self.num_pins), -1, dtype=np.int32)
+        ids = np.arange(len(self.chords), dtype=np.int32)
+        self.lookup[self.chords[:, 0], self.chords[:, 1]] = ids
+        self.lookup[self.chords[:, 1], self.chords[:, 0]] = ids
+
+    @classmethod
+    def from_pins(cls, pin_coords, image_shape, chords=None, line_model=LINE_MODEL, block_size=1024):
+        """
+        Rasterizes the chords between pins into a new index.
+
+        Args:
+            pin_coords (np.ndarray): The (y, x) coordinates of the pins.
+            image_shape (tuple): The (height, width) of the target image.
+            chords (np.ndarray, optional): (M, 2) pin pairs to index. Defaults to all chords.
+            line_model (str): The line model to rasterize with, see ``LINE_MODELS``.
+            block_size (int): Number of chords rasterized before their pixels are
+                copied into the index.
+
+        Returns:
+            ChordGeometry: The chord pixel index.
+        """
+        rasterize = get_line_model(line_model)
+        pin_coords = np.asarray(pin_coords)
+        num_pins = len(pin_coords)
+        if chords is None:
+            chords = all_chord_pairs(num_pins)
+        height, width = image_shape[:2]
+
+        # The entries are written into arrays sized from the aliased chord lengths and
+        # grown from the density of the blocks rasterized so far, so the peak stays
+        # close to the final index instead of holding a list of per-chord arrays too.
+        lengths = chord_lengths(pin_coords, chords)
+        indices = np.empty(int(lengths.sum()), dtype=np.int32)
+        weights = np.empty(len(indices), dtype=np.uint8)
+        indptr = np.zeros(len(chords) + 1, dtype=np.int64)
+        for block_start in range(0, len(chords), block_size):
+            block_end = min(block_start + block_size, len(chords))
+            pixel_lists, weight_lists = [], []
+            for k in range(block_start, block_end):
+                i, j = chords[k]
+                rr, cc, coverage = rasterize(pin_coords[i], pin_coords[j], image_shape)
+                inside = (rr >= 0) & (rr < height) & (cc >= 0) & (cc < width)
+                flat = rr[inside].astype(np.int32) * width + cc[inside]
+                if coverage is None:
+                    flat = np.unique(flat)
+                    pixel_lists.append(flat)
+                    weight_lists.append(np.full(len(flat), FULL_WEIGHT, dtype=np.uint8))
+                    indptr[k + 1] = indptr[k] + len(flat)
+                    continue
+                coverage = coverage[inside]
+                # Sort by pixel, then coverage; pixels produced more than once keep their largest coverage.
+                order = np.lexsort((coverage, flat))
+                flat, coverage = flat[order], coverage[order]
+                last = np.append(flat[1:] != flat[:-1], True)
+                flat = flat[last]
+                chord_weights = np.round(coverage[last] * FULL_WEIGHT).astype(np.uint8)
+                keep = chord_weights > 0
+                pixel_lists.append(flat[keep])
+                weight_lists.append(chord_weights[keep])
+                indptr[k + 1] = indptr[k] + keep.sum()
+
+            start, end = indptr[block_start], indptr[block_end]
+            if end > len(indices):
+                expected = int(end / lengths[:block_end].sum() * lengths.sum() * 1.05) + 1
+                indices = _grown(indices, max(expected, end))
+                weights = _grown(weights, max(expected, end))
+            indices[start:end] = np.concatenate(pixel_lists)
+            weights[start:end] = np.concatenate(weight_lists)
+
+        return cls(chords, indptr, indices[:indptr[-1]], weights[:indptr[-1]], image_shape, num_pins)
+
+    @property
+    def num_chords(self):
+        return len(self.chords)
+
+    @property
+    def num_pixels(self):
+        return self.image_shape[0] * self.image_shape[1]
+
+    @property
+    def nbytes(self):
+        return (self.chords.nbytes + self.indptr.nbytes + self.indices.nbytes
+                + self.weights.nbytes + self.lookup.nbytes)
+
+    def chord_id(self, u, v):
+        """
+        Returns the index of the chord between pins u and v, or -1 if it is not indexed.
+        """
+        return int(self.lookup[u, v])
+
+    def pixels(self, k):
+        """
+        Returns the flattened pixel indices and weights covered by chord k.
+        """
+        start, end = self.indptr[k], self.indptr[k + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def gather(self, chord_ids):
+        """
+        Concatenates the index ranges of several chords.
+
+        Args:
+            chord_ids (np.ndarray): The chords to gather.
+
+        Returns:
+            tuple: ``(positions, segment_starts)`` where ``positions`` indexes into
+                   ``indices``/``weights`` and chord ``chord_ids[n]`` occupies
+                   ``positions[segment_starts[n]:segment_starts[n+1]]``. Every chord
+                   covers at least one pixel, so the segments suit ``np.add.reduceat``.
+        """
+        chord_ids = np.asarray(chord_ids, dtype=np.int64)
+        starts = self.indptr[chord_ids]
+        return concat_ranges(starts, self.indptr[chord_ids + 1] - starts)
+
+    def subset(self, chords):
+        """
+        Builds the index of some of this index's chords by slicing it, without
+        rasterizing them again.
+
+        Args:
+            chords (np.ndarray): (M, 2) pin pairs to keep, in the order of the new index.
+
+        Returns:
+            ChordGeometry: The smaller index.
+
+        Raises:
+            ValueError: If a chord is not part of this index.
+        """
+        chords = np.asarray(chords).reshape(-1, 2)
+        chord_ids = self.lookup[chords[:, 0], chords[:, 1]].astype(np.int64)
+        if (chord_ids < 0).any():
+            raise ValueError("Chords that are not part of the index cannot be kept")
+        positions, _ = self.gather(chord_ids)
+        indptr = np.zeros(len(chords) + 1, dtype=np.int64)
+        np.cumsum(self.indptr[chord_ids + 1] - self.indptr[chord_ids], out=indptr[1:])
+        return ChordGeometry(chords, indptr, self.indices[positions], self.weights[positions],
+                             self.image_shape, self.num_pins)
+
+    def chord_of_entry(self):
+        """
+        Returns the chord index of every entry in ``indices``.
+        """
+        return np.repeat(np.arange(self.num_chords, dtype=np.int32), np.diff(self.indptr))
+
+    def pixel_index(self):
+        """
+        Returns the inverted pixel -> chords index, built on first use.
+
+        Returns:
+            tuple: ``(pixel_indptr, pixel_entries)`` where the chords crossing flat pixel
+                   ``p`` are the entries ``pixel_entries[pixel_indptr[p]:pixel_indptr[p+1]]``
+                   (positions into ``indices``/``weights``).
+        """
+        if getattr(self, "_pixel_index", None) is None:
+            counts = np.bincount(self.indices, minlength=self.num_pixels)
+            pixel_indptr = np.zeros(self.num_pixels + 1, dtype=np.int64)
+            np.cumsum(counts, out=pixel_indptr[1:])
+            pixel_entries = np.argsort(self.indices, kind="stable")
+            if len(pixel_entries) <= np.iinfo(np.int32).max:
+                pixel_entries = pixel_entries.astype(np.int32)
+            self._pixel_index = (pixel_indptr, pixel_entries)
+        return self._pixel_index
+
+    def entries_crossing(self, pixels):
+        """
+        Returns the entries of all chords that cross the given pixels, together with
+        the position in ``pixels`` each entry belongs to.
+        """
+        pixel_indptr, pixel_entries = self.pixel_index()
+        pixels = np.asarray(pixels, dtype=np.int64)
+        starts = pixel_indptr[pixels]
+        lengths = pixel_indptr[pixels + 1] - starts
+        ranges, _ = concat_ranges(starts, lengths)
+        owner = np.repeat(np.arange(len(pixels)), lengths)
+        return pixel_entries[ranges], owner
+
+    def segment_sums(self, per_pixel, dtype=np.int64):
+        """
+        Sums a per-entry array (aligned with ``indices``) over each chord.
+        """
+        if len(per_pixel) == 0:
+            return np.zeros(self.num_chords, dtype=dtype)
+        return np.add.reduceat(per_pixel, self.indptr[:-1], dtype=dtype)
+
+    def weighted_sums(self, entry_values, per_pixel=None, dtype=np.int64, block_entries=1 << 18):
+        """
+        Sums ``entry_values * per_pixel[indices]`` over each chord, a block of chords
+        at a time, so no temporary spans every entry of a large index.
+
+        Args:
+            entry_values (np.ndarray): Per-entry values aligned with ``indices``.
+            per_pixel (np.ndarray, optional): Flat per-pixel values. Defaults to
+                ``entry_values`` per entry, i.e. the sums of squares.
+            dtype (np.dtype): The dtype products are summed in.
+            block_entries (int): Roughly how many entries are multiplied at once.
+
+        Returns:
+            np.ndarray: One sum per chord.
+        """
+        sums = np.zeros(self.num_chords, dtype=dtype)
+        bounds = np.searchsorted(self.indptr, np.arange(0, self.indptr[-1], block_entries), side="right") - 1
+        bounds = np.unique(np.append(bounds, self.num_chords))
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            start, end = self.indptr[first], self.indptr[last]
+            values = entry_values[start:end].astype(dtype)
+            other = values if per_pixel is None else per_pixel[self.indices[start:end]]
+            sums[first:last] = np.add.reduceat(values * other, self.indptr[first:last] - start)
+        return sums
+
+    def line_values(self, line_darkness, dtype=np.int32):
+        """
+        Returns the integer darkness each indexed pixel receives from its chord,
+        aligned with ``indices``. A narrow ``dtype`` such as uint8 saturates at its
+        maximum instead of wrapping.
+        """
+        table = scale_weights(np.arange(FULL_WEIGHT + 1), line_darkness)
+        return np.minimum(table, np.iinfo(dtype).max).astype(dtype)[self.weights]
+
+    def draw(self, canvas, k, line_darkness, sign=1):
+        """
+        Adds chord k to the canvas in place. ``sign=-1`` removes it again.
+        """
+        idx, w = self.pixels(k)
+        flat = canvas.reshape(-1)
+        values = scale_weights(w, line_darkness).astype(canvas.dtype)
+        if sign < 0:
+            flat[idx] -= values
+        else:
+            flat[idx] += values
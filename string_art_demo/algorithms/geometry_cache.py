@@ -0,0 +1,159 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import numpy as np
+from .geometry import LINE_MODEL, RASTER_VERSION, ChordGeometry
+
+# Arrays of a ChordGeometry stored in every cache entry, one .npy file each.
+_ARRAYS = ("chords", "indptr", "indices", "weights")
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "string_art_demo", "geometry")
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def geometry_key(pin_coords, image_shape, line_model=LINE_MODEL, chords=None):
+    """
+    Hashes everything the rasterized chord index depends on.
+
+    ``RASTER_VERSION`` is part of the key, so bumping it when the rasterization
+    changes invalidates all existing entries.
+    """
+    h = hashlib.sha256()
+    h.update(f"v{RASTER_VERSION}:{line_model}:{tuple(int(s) for s in image_shape[:2])}".encode())
+    h.update(np.ascontiguousarray(pin_coords, dtype=np.int64).tobytes())
+    if chords is not None:
+        h.update(np.ascontiguousarray(chords, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+
+class ChordGeometryCache:
+    """
+    On-disk cache of chord pixel indices, keyed by pin layout, image shape and line model.
+
+    Each entry is a directory of ``.npy`` files that are memory-mapped read-only on
+    load, so a hit costs no rasterization and no copy. Entries are evicted least
+    recently used first once the cache grows beyond ``max_bytes``.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key, image_shape, num_pins):
+        """
+        Returns the cached geometry for a key, or None on a miss.
+        """
+        path = self._entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r") for name in _ARRAYS}
+        except (OSError, ValueError):
+            # A partial or corrupted entry is dropped and rebuilt.
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        os.utime(path)
+        return ChordGeometry(arrays["chords"], arrays["indptr"], arrays["indices"], arrays["weights"],
+                             image_shape, num_pins)
+
+    def store(self, key, geometry):
+        """
+        Writes a geometry as a new entry and evicts old entries beyond the size bound.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        except OSError:
+            # An unwritable cache directory only costs the caching.
+            return
+        try:
+            for name in _ARRAYS:
+                np.save(os.path.join(tmp, name + ".npy"), getattr(geometry, name))
+            # The rename is atomic, so readers never see a partial entry.
+            os.rename(tmp, self._entry_path(key))
+        except OSError:
+            # Another process stored the same entry first, or the disk is full.
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+
+    def get(self, pin_coords, image_shape, chords=None, line_model=LINE_MODEL):
+        """
+        Loads the geometry for a pin layout from the cache, rasterizing and storing it on a miss.
+
+        Args:
+            pin_coords (np.ndarray): The (y, x) coordinates of the pins.
+            image_shape (tuple): The (height, width) of the target image.
+            chords (np.ndarray, optional): (M, 2) pin pairs to index. Defaults to all chords.
+            line_model (str): The line model the chords are rasterized with.
+
+        Returns:
+            ChordGeometry: The chord pixel index.
+        """
+        key = geometry_key(pin_coords, image_shape, line_model, chords)
+        geometry = self.load(key, image_shape, len(pin_coords))
+        if geometry is None:
+            geometry = ChordGeometry.from_pins(pin_coords, image_shape, chords=chords, line_model=line_model)
+            self.store(key, geometry)
+        return geometry
+
+    def entries(self):
+        """
+        Returns ``(key, size_in_bytes, last_used)`` for every entry, least recently used first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self._entry_path(key)
+            if key.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((key, size, os.path.getmtime(path)))
+        return sorted(entries, key=lambda e: e[2])
+
+    def evict(self, keep=None):
+        """
+        Removes least recently used entries until the cache fits in ``max_bytes``.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        for key, _, _ in self.entries():
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+
+def default_cache():
+    """
+    Returns the process-wide cache, located by ``STRING_ART_CACHE_DIR``. Setting the
+    variable to an empty string disables on-disk caching.
+    """
+    directory = os.environ.get("STRING_ART_CACHE_DIR", DEFAULT_CACHE_DIR)
+    if not directory:
+        return None
+    max_bytes = int(os.environ.get("STRING_ART_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    return ChordGeometryCache(directory, max_bytes)
+
+
+def load_geometry(pin_coords, image_shape, chords=None, line_model=LINE_MODEL):
+    """
+    Returns the chord geometry for a pin layout, going through the default cache when enabled.
+    """
+    cache = default_cache()
+    if cache is None:
+        return ChordGeometry.from_pins(pin_coords, image_shape, chords=chords, line_model=line_model)
+    return cache.get(pin_coords, image_shape, chords=chords, line_model=line_model)
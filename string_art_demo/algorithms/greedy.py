@@ -1,6 +1,35 @@
+import os
 import numpy as np
 from skimage.draw import line as skimage_line
-from .base import BaseStringArtAlgorithm
+from .base import BaseStringArtAlgorithm, delta_event
+from .geometry import render_sequence
+from .parallel_scoring import ParallelScorer
+
+# An int16 residual is promoted to int32 before a pixel below this could leave its range.
+_INT16_FLOOR = np.iinfo(np.int16).min + 255
+
+
+def residual_array(inverted_target, canvas_flat):
+    """
+    Returns the flat residual ``inverted_target - canvas`` as int16, or int32 when a
+    pixel is already too dark for int16 to take further lines.
+    """
+    residual = inverted_target.astype(np.int32).reshape(-1) - canvas_flat.astype(np.int32)
+    return residual.astype(np.int16) if residual.min() >= _INT16_FLOOR else residual
+
+
+def subtract_line(residual, idx, values):
+    """
+    Subtracts a line's values (at most 255 each) from the residual pixels ``idx`` in
+    place, promoting an int16 residual to int32 first if a pixel would leave its range.
+
+    Returns:
+        np.ndarray: The residual; a new array after a promotion.
+    """
+    if residual.dtype == np.int16 and residual[idx].min() < _INT16_FLOOR:
+        residual = residual.astype(np.int32)
+    residual[idx] -= values
+    return residual
 
 def generate_pin_coords(num_pins, image_shape):
     """
@@ -44,7 +73,23 @@ class GreedyAlgorithm(BaseStringArtAlgorithm):
         canvas[rr, cc] = np.minimum(canvas[rr, cc] + line_darkness, 255)
 
 
-    def run(self, target_image, pin_coords, max_lines=200, line_darkness=25, **kwargs):
+    def memory_estimate(self, image_shape, num_pins, num_chords, entries, kwargs):
+        """
+        Adds the uint8 line values and, in incremental mode, the cached scores and the
+        inverted pixel -> chords index (transiently int64 while it is sorted).
+        """
+        estimate = super().memory_estimate(image_shape, num_pins, num_chords, entries, kwargs)
+        estimate["line values"] = entries + num_chords * 8
+        if min(kwargs.get("num_workers", 1), os.cpu_count() or 1) > 1:
+            estimate["shared memory"] = entries * 5 + num_chords * 16 + num_pins * num_pins * 4 \
+                + image_shape[0] * image_shape[1] * 4
+        if kwargs.get("incremental"):
+            estimate["incremental scores"] = entries * 4 + num_chords * 8
+            estimate["pixel index"] = entries * 12 + image_shape[0] * image_shape[1] * 8
+        return estimate
+
+    def run(self, target_image, pin_coords, max_lines=200, line_darkness=25, incremental=False, num_workers=1,
+            **kwargs):
         """
         Runs the greedy string art algorithm.
 
@@ -53,63 +98,170 @@ class GreedyAlgorithm(BaseStringArtAlgorithm):
             pin_coords (np.ndarray): The coordinates of the pins.
             max_lines (int): The maximum number of lines (chords) to draw.
             line_darkness (int): The value to add to the canvas for each line.
+            incremental (bool): If True, keep the residual and every chord's score cached
+                and update them only on the pixels of the chosen chord, so the cost of
+                a line depends on its length rather than on the image area.
+            num_workers (int): If greater than 1, score the candidates of each step on this
+                many processes sharing the chord index and residual, see ``ParallelScorer``.
+                Capped at the CPU count, as a step only waits on the slowest shard. Pays
+                off for full scoring of long chords, e.g. 400 pins at 1000 px; it does not
+                combine with ``incremental``.
+            memory_budget (int or str, optional): Fail before building the chord index
+                if the estimated memory exceeds this, passed in **kwargs. See ``chord_geometry``.
+            geometry (ChordGeometry, optional): Chord index of pin_coords, passed in
+                **kwargs. Loaded from the geometry cache if omitted.
+            line_model (str, optional): Line model used to rasterize the chords when the
+                geometry is loaded here, passed in **kwargs. See ``LINE_MODELS``.
+            candidate_chords (int, optional): Only consider this many chords, preselected
+                by their Radon line integrals, passed in **kwargs. See ``chord_geometry``.
+            checkpoint (str, optional): File the sequence and current pin are saved to,
+                passed in **kwargs. See ``checkpointer``.
+            resume_from (str or dict, optional): Checkpoint to continue from, passed in
+                **kwargs. The canvas and residual are rebuilt from its sequence, and the
+                run continues up to max_lines exactly as if it had not stopped.
+            initial_sequence (list, optional): Continuous sequence of (pin, pin) lines of an
+                earlier run to continue, passed in **kwargs. Greedy is deterministic, so
+                continuing a run of the same image and options to more lines gives the
+                same result as running them from scratch; lines beyond max_lines are dropped.
 
         Yields:
             dict: A dictionary containing the state at each step of the animation, including
                   the current line number, the chord being added, the current canvas,
-                  and the residual image.
+                  and the residual image. Steps the emission policy skips yield a
+                  delta event with only the chord. A resumed or continued run first
+                  yields the restored ``sequence``.
         """
+        if num_workers > 1 and incremental:
+            raise ValueError("Parallel scoring replaces the full scorer; incremental scoring is already per line")
         num_pins = len(pin_coords)
 
         inverted_target = 255 - target_image
         string_art_canvas = np.zeros_like(inverted_target, dtype=np.uint16)
+        canvas_flat = string_art_canvas.reshape(-1)
 
-        all_chords = self._get_all_chords(num_pins)
-
-        line_canvases = {}
-        for i, j in all_chords:
-            temp_canvas = np.zeros_like(inverted_target, dtype=np.uint16)
-            self._draw_line_on_canvas(temp_canvas, pin_coords[i], pin_coords[j], line_darkness)
-            line_canvases[(i, j)] = temp_canvas
+        profiler = self.profiler(kwargs)
+        with profiler.phase("geometry"):
+            geometry = self.chord_geometry(target_image, pin_coords, dict(kwargs, incremental=incremental,
+                                                                              num_workers=num_workers))
+            # Each chord adds a fixed darkness to its pixels, capped at 255.
+            line_values = geometry.line_values(line_darkness, dtype=np.uint8)
+            # sum(line ** 2) does not depend on the residual, so it is computed once per chord.
+            line_sq = geometry.weighted_sums(line_values)
+        pins = np.arange(num_pins)
 
+        checkpointer = self.checkpointer(kwargs, pin_coords, target_image.shape)
+        resume = self.resume_state(kwargs, pin_coords, target_image.shape)
         current_pin = 0
         sequence = []
+        continued = resume is not None or bool(kwargs.get("initial_sequence"))
+        if continued:
+            with profiler.phase("resume"):
+                if resume is not None:
+                    sequence = list(resume["sequence"])
+                    current_pin = int(resume["current_pin"])
+                else:
+                    sequence = [tuple(int(p) for p in line) for line in kwargs["initial_sequence"]][:max_lines]
+                    current_pin = sequence[-1][1]
+                canvas_flat[:] = render_sequence(sequence, geometry, line_darkness).reshape(-1)
 
-        for line_num in range(max_lines):
-            best_chord = None
-            max_score = -float('inf')
+        # The residual is kept up to date line by line in either mode.
+        residual = residual_array(inverted_target, canvas_flat)
+        if incremental:
+            with profiler.phase("initial_scores"):
+                scores = 2 * geometry.weighted_sums(line_values, residual) - line_sq
+                entry_chords = geometry.chord_of_entry()
+                display_canvas = 255 - np.minimum(string_art_canvas, 255).astype(np.uint8)
+                display_residual = np.clip(residual, 0, 255).astype(np.uint8).reshape(inverted_target.shape)
 
-            residual = inverted_target.astype(np.int32) - string_art_canvas.astype(np.int32)
+        policy = self.emission_policy(kwargs)
+        if continued:
+            yield profiler.attach({
+                "status": f"{'Resumed' if resume is not None else 'Continued'} at line {len(sequence)}",
+                "line_num": len(sequence),
+                "sequence": list(sequence),
+                "canvas": 255 - np.minimum(string_art_canvas, 255).astype(np.uint8),
+                "residual": np.clip(residual, 0, 255).astype(np.uint8).reshape(inverted_target.shape),
+            }, final=len(sequence) >= max_lines)
 
-            for next_pin in range(num_pins):
-                if next_pin == current_pin:
-                    continue
+        scorer = None
+        num_workers = min(num_workers, os.cpu_count() or 1)
+        if num_workers > 1:
+            with profiler.phase("workers"):
+                scorer = ParallelScorer(geometry, line_values, line_sq, residual, num_workers)
+        try:
+            for line_num in range(len(sequence), max_lines):
+                best_chord = None
 
-                chord = tuple(sorted((current_pin, next_pin)))
-                if chord not in line_canvases:
-                    continue
+                with profiler.phase("scoring"):
+                    # Candidates stay in next_pin order so argmax breaks ties like the scalar loop.
+                    chord_ids = geometry.lookup[current_pin, pins]
+                    valid = chord_ids >= 0
+                    candidate_pins = pins[valid]
+                    chord_ids = chord_ids[valid]
+                    if len(chord_ids) > 0 and scorer is not None:
+                        # Each worker scores a shard of the candidates and returns only its best.
+                        best_chord = (current_pin, scorer.best(current_pin))
+                    elif len(chord_ids) > 0:
+                        if incremental:
+                            candidate_scores = scores[chord_ids]
+                        else:
+                            # Score every chord leaving current_pin in one gather/segment-sum pass.
+                            positions, segments = geometry.gather(chord_ids)
+                            products = np.multiply(residual[geometry.indices[positions]], line_values[positions],
+                                                   dtype=np.int64)
+                            candidate_scores = 2 * np.add.reduceat(products, segments) - line_sq[chord_ids]
+                        best_chord = (current_pin, int(candidate_pins[np.argmax(candidate_scores)]))
+                profiler.count("candidates_scored", len(chord_ids))
 
-                line_canvas = line_canvases[chord].astype(np.int32)
-                score = 2 * np.sum(residual * line_canvas) - np.sum(line_canvas ** 2)
+                if best_chord is None:
+                    checkpointer.save(sequence, current_pin=current_pin)
+                    break
 
-                if score > max_score:
-                    max_score = score
-                    best_chord = (current_pin, next_pin)
+                sequence.append(best_chord)
+                with profiler.phase("update"):
+                    k = geometry.chord_id(*best_chord)
+                    start, end = geometry.indptr[k], geometry.indptr[k + 1]
+                    idx = geometry.indices[start:end]
+                    values = line_values[start:end]
+                    canvas_flat[idx] += values.astype(np.uint16)
+                    current_pin = best_chord[1]
+                    residual = subtract_line(residual, idx, values)
+                    if scorer is not None:
+                        scorer.update(idx, residual[idx])
 
-            if best_chord is None:
-                break
+                    if incremental:
+                        # Only chords crossing the changed pixels see their score move:
+                        # d(score_c) = 2 * sum_p d(residual_p) * line_c(p).
+                        entries, owner = geometry.entries_crossing(idx)
+                        np.subtract.at(scores, entry_chords[entries],
+                                       2 * values[owner].astype(np.int64) * line_values[entries])
+                        display_canvas.reshape(-1)[idx] = 255 - np.minimum(canvas_flat[idx], 255)
+                        display_residual.reshape(-1)[idx] = np.clip(residual[idx], 0, 255)
+                profiler.count("lines")
 
-            sequence.append(best_chord)
-            best_chord_sorted = tuple(sorted(best_chord))
-            string_art_canvas += line_canvases[best_chord_sorted]
-            current_pin = best_chord[1]
+                is_last = line_num + 1 == max_lines
+                if checkpointer.due(final=is_last):
+                    with profiler.phase("checkpoint"):
+                        checkpointer.save(sequence, current_pin=current_pin)
+
+                if not policy.due(line_num + 1, final=is_last):
+                    yield delta_event(line_num + 1, best_chord)
+                    continue
 
-            display_canvas = np.clip(string_art_canvas, 0, 255).astype(np.uint8)
-            residual = np.clip(inverted_target.astype(np.int32) - string_art_canvas.astype(np.int32), 0, 255).astype(np.uint8)
+                with profiler.phase("frames"):
+                    if incremental:
+                        canvas_frame, residual_frame = display_canvas.copy(), display_residual.copy()
+                    else:
+                        canvas_frame = 255 - np.clip(string_art_canvas, 0, 255).astype(np.uint8)
+                        residual_frame = np.clip(residual, 0, 255).astype(np.uint8).reshape(inverted_target.shape)
+                profiler.count("frames")
 
-            yield {
-                "line_num": line_num + 1,
-                "chord": best_chord,
-                "canvas": 255 - display_canvas,
-                "residual": residual
-            }
+                yield profiler.attach({
+                    "line_num": line_num + 1,
+                    "chord": best_chord,
+                    "canvas": canvas_frame,
+                    "residual": residual_frame
+                }, final=is_last)
+        finally:
+            if scorer is not None:
+                scorer.close()
@@ -0,0 +1,196 @@
+import numpy as np
+from skimage.transform import resize
+from .base import BaseStringArtAlgorithm, delta_event
+from .geometry import LINE_MODEL
+from .geometry_cache import load_geometry
+from .simulated_annealing import SimulatedAnnealingAlgorithm
+
+
+def downsample(image, scale):
+    """
+    Area-averages a grayscale image down by ``scale`` (0 < scale <= 1).
+    """
+    shape = tuple(max(2, int(round(s * scale))) for s in image.shape[:2])
+    return np.clip(resize(image, shape, anti_aliasing=True, preserve_range=True), 0, 255).astype(np.uint8)
+
+
+def scale_pins(pin_coords, from_shape, to_shape):
+    """
+    Maps pin coordinates between image sizes, keeping pin indices unchanged.
+    """
+    pin_coords = np.asarray(pin_coords, dtype=np.float64)
+    factors = (np.array(to_shape[:2]) - 1) / np.maximum(np.array(from_shape[:2]) - 1, 1)
+    scaled = np.round(pin_coords * factors).astype(int)
+    return np.clip(scaled, 0, np.array(to_shape[:2]) - 1)
+
+
+class MultiResolutionAlgorithm(BaseStringArtAlgorithm):
+    """
+    Coarse-to-fine wrapper around any string art algorithm.
+
+    The wrapped algorithm solves a downsampled copy of the target; the resulting
+    pin sequence is then refined at every finer level up to full resolution, either
+    by local greedy re-selection of each line's end pin or by a short simulated
+    annealing pass seeded with the sequence.
+    """
+
+    def __init__(self, algorithm, levels=(0.25, 0.5), refine="greedy", refine_window=4, refine_passes=1):
+        """
+        Args:
+            algorithm (BaseStringArtAlgorithm): The algorithm that solves the coarsest level.
+            levels (tuple): Increasing scales below 1. The first is solved, the rest and
+                full resolution are refined.
+            refine (str): "greedy" for local re-selection or "anneal" for a seeded SA pass.
+            refine_window (int): Greedy refinement tries end pins up to this many pins
+                away from the current one.
+            refine_passes (int): Greedy refinement sweeps over the sequence per level.
+        """
+        if refine not in ("greedy", "anneal"):
+            raise ValueError(f"Unknown refinement: {refine}")
+        self.algorithm = algorithm
+        self.levels = tuple(sorted(levels))
+        self.refine = refine
+        self.refine_window = refine_window
+        self.refine_passes = refine_passes
+        self._annealer = SimulatedAnnealingAlgorithm()
+
+    def run(self, target_image, pin_coords, **kwargs):
+        """
+        Runs the wrapped algorithm coarse-to-fine.
+
+        Args:
+            target_image (np.ndarray): The target grayscale image.
+            pin_coords (np.ndarray): The coordinates of the pins at full resolution.
+            **kwargs: Parameters of the wrapped algorithm. ``line_darkness`` is scaled
+                with the level so a thread keeps its darkness per unit length, and
+                ``geometry`` is only used at full resolution.
+
+        Yields:
+            dict: The coarse solve's states (progress 0-0.5, at the coarse size), then
+                  one state per refined level and a final state with the full
+                  resolution ``canvas`` and ``sequence``.
+        """
+        full_shape = target_image.shape
+        line_darkness = kwargs.get("line_darkness", 25)
+        line_model = kwargs.get("line_model", LINE_MODEL)
+        coarse_kwargs = {k: v for k, v in kwargs.items() if k != "geometry"}
+
+        # 1. Solve the coarsest level with the wrapped algorithm.
+        scale = self.levels[0]
+        coarse_target = downsample(target_image, scale)
+        coarse_pins = scale_pins(pin_coords, full_shape, coarse_target.shape)
+        coarse_kwargs["line_darkness"] = max(1, int(round(line_darkness * scale)))
+        sequence = []
+        for result in self.algorithm.run(coarse_target, coarse_pins, **coarse_kwargs):
+            if result.get("error"):
+                yield result
+                return
+            if "chord" in result:
+                sequence.append(tuple(int(p) for p in result["chord"]))
+            if "sequence" in result:
+                sequence = [tuple(int(p) for p in line) for line in result["sequence"]]
+            if result.get("event") == "delta":
+                continue
+            result = dict(result)
+            result["status"] = f"Level {coarse_target.shape[0]}px: {result.get('status', 'solving')}"
+            result["progress"] = 0.5 * result.get("progress", 0)
+            result.pop("profile_summary", None)
+            yield result
+
+        # 2. Refine the sequence at every finer level.
+        refine_scales = [s for s in self.levels[1:] if s < 1] + [1.0]
+        for n, scale in enumerate(refine_scales):
+            if scale < 1:
+                level_target = downsample(target_image, scale)
+                level_pins = scale_pins(pin_coords, full_shape, level_target.shape)
+                geometry = load_geometry(level_pins, level_target.shape, line_model=line_model)
+            else:
+                level_target, level_pins = target_image, pin_coords
+                geometry = kwargs.get("geometry")
+                if geometry is None:
+                    geometry = load_geometry(pin_coords, full_shape, line_model=line_model)
+            level_darkness = max(1, int(round(line_darkness * scale)))
+
+            if self.refine == "anneal":
+                for result in self._annealer.run(level_target, level_pins, geometry=geometry,
+                                                 line_darkness=level_darkness, initial_sequence=sequence,
+                                                 max_lines=len(sequence), final_only=True,
+                                                 **self._anneal_options(kwargs)):
+                    # Passed on so that a consumer can stop a long refinement pass.
+                    if result.get("event") == "delta":
+                        yield delta_event(result["line_num"],
+                                          progress=0.5 + 0.5 * (n + result["progress"]) / len(refine_scales))
+                sequence = result["sequence"]
+                canvas, error = result["canvas"], result["total_error"]
+            else:
+                state = self._annealer._init_state(sequence, geometry, 255 - level_target, level_darkness)
+                line_values = geometry.line_values(level_darkness)
+                for _ in range(self.refine_passes):
+                    if not self._reselect_pass(state, geometry, line_values):
+                        break
+                sequence = state["sequence"]
+                canvas = 255 - np.clip(state["canvas"], 0, 255).astype(np.uint8)
+                error = state["error"]
+
+            yield {
+                "status": f"Level {level_target.shape[0]}px: refined, error {error:.0f}",
+                "progress": 0.5 + 0.5 * (n + 1) / len(refine_scales),
+                "canvas": canvas,
+                "line_num": len(sequence),
+            }
+
+        yield {"status": "Done!", "progress": 1.0, "canvas": canvas, "sequence": sequence, "total_error": error}
+
+    def _anneal_options(self, kwargs):
+        """
+        Annealing schedule of the refinement pass, from the ``refine_*`` run options.
+        The defaults are short and cool so the pass polishes the seed instead of
+        scrambling it.
+        """
+        return {
+            "start_temp": kwargs.get("refine_start_temp", 100),
+            "end_temp": kwargs.get("refine_end_temp", 1),
+            "cooling_rate": kwargs.get("refine_cooling_rate", 0.995),
+        }
+
+    def _reselect_pass(self, state, geometry, line_values):
+        """
+        Sweeps the sequence once; for every line, moves its end pin to the best pin
+        within the window (the following line starts there too) if that lowers the error.
+
+        Returns:
+            bool: Whether any line changed.
+        """
+        sequence = state["sequence"]
+        residual = state["residual"]
+        num_pins = geometry.num_pins
+        offsets = [d for d in range(-self.refine_window, self.refine_window + 1) if d != 0]
+        changed = False
+        for i in range(len(sequence)):
+            a, b_old = sequence[i]
+            c = sequence[i + 1][1] if i + 1 < len(sequence) else None
+            removed = [(a, b_old)] + ([(b_old, c)] if c is not None else [])
+
+            best = (0, None, None, None)
+            for d in offsets:
+                b = (b_old + d) % num_pins
+                if b == a or b == c:
+                    continue
+                added = [(a, b)] + ([(b, c)] if c is not None else [])
+                pixels, change = self._annealer._line_changes(geometry, line_values, removed, added)
+                delta = self._annealer._delta_error(residual[pixels], change)
+                if delta < best[0]:
+                    best = (delta, added, pixels, change)
+
+            delta, added, pixels, change = best
+            if added is None:
+                continue
+            sequence[i] = added[0]
+            if c is not None:
+                sequence[i + 1] = added[1]
+            canvas_flat = state["canvas"].reshape(-1)
+            canvas_flat[pixels] = canvas_flat[pixels] + change
+            residual[pixels] -= change
+            state["error"] += delta
+            changed = True
+        return changed
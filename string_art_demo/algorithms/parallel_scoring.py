@@ -0,0 +1,147 @@
+import multiprocessing
+import numpy as np
+from .geometry import concat_ranges
+from .shared import attach_arrays, release_arrays, share_arrays
+
+# Seconds a worker gets to exit after being told to stop before it is terminated.
+_JOIN_TIMEOUT = 5.0
+
+
+def shard_best(arrays, current_pin, pins):
+    """
+    Scores the chords from ``current_pin`` to each of ``pins`` against the residual,
+    like the greedy full scorer, and returns the best one.
+
+    Args:
+        arrays (dict): ``indptr``, ``indices``, ``line_values``, ``line_sq``, ``lookup``
+            and ``residual`` as shared by ``ParallelScorer``.
+        current_pin (int): The pin the next line starts at.
+        pins (np.ndarray): The candidate end pins of this shard, ascending.
+
+    Returns:
+        tuple: ``(score, pin)`` of the best chord, the lowest pin among ties, or None
+               if no chord to these pins is indexed.
+    """
+    chord_ids = arrays["lookup"][current_pin, pins]
+    valid = chord_ids >= 0
+    if not valid.any():
+        return None
+    chord_ids = chord_ids[valid].astype(np.int64)
+    starts = arrays["indptr"][chord_ids]
+    positions, segments = concat_ranges(starts, arrays["indptr"][chord_ids + 1] - starts)
+    products = np.multiply(arrays["residual"][arrays["indices"][positions]], arrays["line_values"][positions],
+                           dtype=np.int64)
+    scores = 2 * np.add.reduceat(products, segments) - arrays["line_sq"][chord_ids]
+    k = int(np.argmax(scores))
+    return int(scores[k]), int(pins[valid][k])
+
+
+def _shard_worker(conn, spec, pins):
+    """
+    Worker loop: receives a current pin per step and answers with its shard's best
+    chord, until it receives None or the scorer's end of the pipe closes.
+    """
+    blocks, arrays = attach_arrays(spec)
+    try:
+        while True:
+            try:
+                current_pin = conn.recv()
+            except EOFError:
+                break
+            if current_pin is None:
+                break
+            conn.send(shard_best(arrays, current_pin, pins))
+    finally:
+        for block in blocks:
+            block.close()
+        conn.close()
+
+
+class ParallelScorer:
+    """
+    Picks the greedy chord from a pin on several processes.
+
+    The chord index, line values and residual are placed in shared memory once.
+    Every worker owns an interleaved shard of the candidate end pins, so chord lengths
+    balance across workers; a step sends each worker only the current pin over a
+    pipe and receives only its local best ``(score, pin)``. The caller reports the
+    residual pixels a line changed with ``update``.
+    """
+
+    def __init__(self, geometry, line_values, line_sq, residual, num_workers):
+        """
+        Args:
+            geometry (ChordGeometry): The chord index.
+            line_values (np.ndarray): Per-entry line darkness, aligned with ``geometry.indices``.
+            line_sq (np.ndarray): Per-chord sum of squared line values.
+            residual (np.ndarray): The flat residual; copied into shared memory as int32.
+            num_workers (int): Number of worker processes.
+        """
+        self._blocks, spec = share_arrays({
+            "indptr": geometry.indptr,
+            "indices": geometry.indices,
+            "line_values": line_values,
+            "line_sq": line_sq,
+            "lookup": geometry.lookup,
+            "residual": residual.astype(np.int32),
+        })
+        block_name, shape, dtype = spec["residual"]
+        block = next(block for block in self._blocks if block.name == block_name)
+        self._residual = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+        pins = np.arange(geometry.num_pins)
+        self._conns, self._workers = [], []
+        try:
+            for w in range(num_workers):
+                conn, child_conn = multiprocessing.Pipe()
+                worker = multiprocessing.Process(target=_shard_worker, args=(child_conn, spec, pins[w::num_workers]))
+                worker.start()
+                child_conn.close()
+                self._conns.append(conn)
+                self._workers.append(worker)
+        except BaseException:
+            self.close()
+            raise
+
+    def update(self, idx, values):
+        """
+        Writes new residual values of the flat pixels ``idx``.
+        """
+        self._residual[idx] = values
+
+    def best(self, current_pin):
+        """
+        Returns the end pin of the best chord from ``current_pin``, breaking ties
+        towards the lowest pin like the single-process scorer, or None.
+        """
+        for conn in self._conns:
+            conn.send(int(current_pin))
+        results = [result for result in (conn.recv() for conn in self._conns) if result is not None]
+        if not results:
+            return None
+        return max(results, key=lambda result: (result[0], -result[1]))[1]
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory.
+        """
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+        for worker in self._workers:
+            worker.join(_JOIN_TIMEOUT)
+            if worker.is_alive():
+                worker.terminate()
+        self._conns, self._workers = [], []
+        self._residual = None
+        release_arrays(self._blocks)
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
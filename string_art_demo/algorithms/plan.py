@@ -0,0 +1,168 @@
+import json
+import struct
+import numpy as np
+from .color import interleave, render_plan
+from .geometry import LINE_MODEL, ChordGeometry, render_sequence
+from .greedy import generate_pin_coords
+
+# File signature and layout version of saved plans.
+PLAN_MAGIC = b"SAPL"
+PLAN_VERSION = 1
+
+# Magic, version and header length, followed by the JSON header and the pin array.
+_PREAMBLE = struct.Struct("<4sHI")
+
+
+def _sequence_pins(sequence):
+    """
+    Returns the pins a continuous sequence of lines visits.
+
+    Raises:
+        ValueError: If a line does not start where the previous one ended.
+    """
+    lines = np.asarray(sequence, dtype=np.int64).reshape(-1, 2)
+    if len(lines) == 0:
+        return lines[:0, 0]
+    if (lines[1:, 0] != lines[:-1, 1]).any():
+        raise ValueError("A plan holds continuous threads; the sequence is not continuous")
+    return np.append(lines[:1, 0], lines[:, 1])
+
+
+class StringArtPlan:
+    """
+    A solved piece without any canvas: the pin path of every thread and what is
+    needed to render it again, so a result can be stored compactly and rendered at
+    any resolution without solving again.
+
+    On disk a plan is a short preamble, a JSON header (pin layout, solve size, line
+    darkness and model, algorithm parameters and thread colours) and all paths as
+    one int16 array.
+    """
+
+    def __init__(self, paths, num_pins, image_shape, line_darkness=25, line_model=LINE_MODEL,
+                 colors=None, algorithm=None, params=None):
+        """
+        Args:
+            paths (list): One continuous pin path per thread.
+            num_pins (int): Pin count; pins lie on the circle of ``generate_pin_coords``.
+            image_shape (tuple): The image size the plan was solved at.
+            line_darkness (int): The darkness of a line at that size.
+            line_model (str): The line model of the solve, see ``LINE_MODELS``.
+            colors (dict, optional): Thread colour name -> (r, g, b), one per path.
+                Grayscale plans have a single black thread.
+            algorithm (str, optional): Name of the algorithm that solved the plan.
+            params (dict, optional): Its JSON-serializable parameters.
+        """
+        dtype = np.int16 if num_pins <= np.iinfo(np.int16).max else np.int32
+        self.paths = [np.asarray(path, dtype=dtype) for path in paths]
+        self.num_pins = int(num_pins)
+        self.image_shape = tuple(int(s) for s in image_shape[:2])
+        self.line_darkness = int(line_darkness)
+        self.line_model = line_model
+        self.colors = {name: tuple(int(c) for c in rgb) for name, rgb in colors.items()} if colors else None
+        self.algorithm = algorithm
+        self.params = dict(params or {})
+        if self.colors is not None and len(self.colors) != len(self.paths):
+            raise ValueError("A colour plan needs one path per colour")
+
+    @classmethod
+    def from_sequence(cls, sequence, num_pins, image_shape, **kwargs):
+        """
+        Builds a single-thread plan from a continuous sequence of (pin, pin) lines.
+        """
+        return cls([_sequence_pins(sequence)], num_pins, image_shape, **kwargs)
+
+    @classmethod
+    def from_color_plan(cls, plan, palette, num_pins, image_shape, **kwargs):
+        """
+        Builds a plan from the ``(colour_index, pin, pin)`` steps and palette of a
+        ``ColorAlgorithm`` run.
+        """
+        steps = np.asarray(plan, dtype=np.int64).reshape(-1, 3)
+        paths = [_sequence_pins(steps[steps[:, 0] == c, 1:]) for c in range(len(palette))]
+        return cls(paths, num_pins, image_shape, colors=palette, **kwargs)
+
+    @property
+    def num_lines(self):
+        return sum(max(len(path) - 1, 0) for path in self.paths)
+
+    def lines(self, thread=0):
+        """
+        Returns the (pin, pin) lines of one thread as an (N, 2) array.
+        """
+        path = self.paths[thread]
+        return np.stack([path[:-1], path[1:]], axis=1)
+
+    def color_plan(self):
+        """
+        Returns the interleaved ``(colour_index, pin, pin)`` steps of a colour plan.
+        """
+        return interleave([self.lines(c).tolist() for c in range(len(self.paths))])
+
+    def to_bytes(self):
+        header = {
+            "pin_layout": "circle",
+            "num_pins": self.num_pins,
+            "image_shape": list(self.image_shape),
+            "line_darkness": self.line_darkness,
+            "line_model": self.line_model,
+            "colors": self.colors,
+            "algorithm": self.algorithm,
+            "params": self.params,
+            "dtype": np.dtype(self.paths[0].dtype if self.paths else np.int16).newbyteorder("<").str,
+            "path_lengths": [len(path) for path in self.paths],
+        }
+        encoded = json.dumps(header).encode()
+        pins = np.concatenate(self.paths) if self.paths else np.zeros(0)
+        return (_PREAMBLE.pack(PLAN_MAGIC, PLAN_VERSION, len(encoded)) + encoded
+                + pins.astype(header["dtype"]).tobytes())
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Raises:
+            ValueError: If the data is not a plan of a known version.
+        """
+        magic, version, header_length = _PREAMBLE.unpack_from(data)
+        if magic != PLAN_MAGIC or version != PLAN_VERSION:
+            raise ValueError(f"Not a version {PLAN_VERSION} string art plan")
+        offset = _PREAMBLE.size
+        header = json.loads(data[offset:offset + header_length])
+        pins = np.frombuffer(data, dtype=header["dtype"], offset=offset + header_length)
+        paths = np.split(pins, np.cumsum(header["path_lengths"])[:-1]) if header["path_lengths"] else []
+        return cls(paths, header["num_pins"], header["image_shape"], line_darkness=header["line_darkness"],
+                   line_model=header["line_model"], colors=header["colors"], algorithm=header["algorithm"],
+                   params=header["params"])
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def render(self, image_shape=None, line_darkness=None, line_model=None):
+        """
+        Renders the plan, rasterizing only the chords it uses.
+
+        Args:
+            image_shape (tuple, optional): The output size. Defaults to the solve size.
+            line_darkness (int, optional): Defaults to the plan's darkness.
+            line_model (str, optional): Defaults to the plan's line model. Widths are in
+                output pixels, so e.g. ``"thread:4"`` keeps a 1 px thread's look at 4x size.
+
+        Returns:
+            np.ndarray: The (H, W) grayscale or (H, W, 3) RGB canvas, uint8.
+        """
+        image_shape = tuple(image_shape or self.image_shape)[:2]
+        line_darkness = self.line_darkness if line_darkness is None else line_darkness
+        used = np.concatenate([self.lines(c) for c in range(len(self.paths))] + [np.zeros((0, 2), dtype=np.int64)])
+        chords = np.unique(np.sort(used, axis=1), axis=0)
+        geometry = ChordGeometry.from_pins(generate_pin_coords(self.num_pins, image_shape), image_shape,
+                                           chords=chords, line_model=line_model or self.line_model)
+        if self.colors is not None:
+            return render_plan(self.color_plan(), list(self.colors.values()), geometry, line_darkness)
+        darkness = render_sequence(self.paths[0] if self.paths else [], geometry, line_darkness)
+        return 255 - np.clip(darkness, 0, 255).astype(np.uint8)
@@ -0,0 +1,100 @@
+import numpy as np
+from scipy.ndimage import map_coordinates
+from skimage.transform import radon
+from .geometry import all_chord_pairs
+
+
+def chord_radon_coords(pin_coords, chords, size):
+    """
+    Maps chords onto the (offset, angle) axes of ``skimage.transform.radon`` for a
+    ``size`` x ``size`` image.
+
+    The projection at angle theta integrates along lines with
+    ``(x - c) cos(theta) - (y - c) sin(theta) = s``, with ``c = size // 2``.
+
+    Returns:
+        tuple: ``(offsets, angles)``: the row index ``s + c`` into the sinogram and the
+               angle in degrees in [0, 180) of every chord.
+    """
+    pin_coords = np.asarray(pin_coords, dtype=np.float64)
+    p0, p1 = pin_coords[chords[:, 0]], pin_coords[chords[:, 1]]
+    direction = np.degrees(np.arctan2(p1[:, 0] - p0[:, 0], p1[:, 1] - p0[:, 1]))
+    angles = np.mod(90 - direction, 180)
+    theta = np.radians(angles)
+    center = size // 2
+    offsets = (p0[:, 1] - center) * np.cos(theta) - (p0[:, 0] - center) * np.sin(theta)
+    return offsets + center, angles
+
+
+def radon_chord_scores(target_image, pin_coords, chords=None, num_angles=None):
+    """
+    Scores chords by the line integral of the target's darkness along them, read off
+    the Radon transform of the inverted target instead of rasterizing every chord.
+    Long dark chords score highest, as they do for the greedy algorithm.
+
+    Args:
+        target_image (np.ndarray): The target grayscale image.
+        pin_coords (np.ndarray): The (y, x) coordinates of the pins.
+        chords (np.ndarray, optional): (M, 2) pin pairs to score. Defaults to all chords.
+        num_angles (int, optional): Projection angles of the transform. Defaults to one
+            per pin, and at least 180.
+
+    Returns:
+        np.ndarray: The score of every chord, in the order of ``chords``.
+    """
+    pin_coords = np.asarray(pin_coords)
+    if chords is None:
+        chords = all_chord_pairs(len(pin_coords))
+    chords = np.asarray(chords).reshape(-1, 2)
+
+    # radon(circle=True) wants a square image that is zero outside its inscribed circle.
+    # The square is centred on the circle the pins sit on, and only the darkness inside
+    # that circle is kept, so that no chord integrates past its ends.
+    height, width = target_image.shape[:2]
+    center = np.round((pin_coords.min(axis=0) + pin_coords.max(axis=0)) / 2).astype(np.int64)
+    radius = np.hypot(*(pin_coords - center).T).max()
+    half = int(np.ceil(radius)) + 1
+    size = 2 * half + 1
+    top, left = center - half
+    y0, x0, y1, x1 = max(top, 0), max(left, 0), min(top + size, height), min(left + size, width)
+    darkness = np.zeros((size, size))
+    darkness[y0 - top:y1 - top, x0 - left:x1 - left] = 255 - target_image[y0:y1, x0:x1].astype(np.float64)
+    yy, xx = np.mgrid[:size, :size] - half
+    darkness[yy ** 2 + xx ** 2 > radius ** 2] = 0
+
+    num_angles = num_angles or max(180, len(pin_coords))
+    angles = np.arange(num_angles) * 180 / num_angles
+    sinogram = radon(darkness, theta=angles, circle=True)
+    # The projection at 180 degrees is the one at 0 with the offset axis reversed,
+    # appended so that angles just below 180 interpolate correctly.
+    sinogram = np.hstack([sinogram, sinogram[::-1, :1]])
+
+    offsets, chord_angles = chord_radon_coords(pin_coords - [top, left], chords, size)
+    return map_coordinates(sinogram, [offsets, chord_angles * num_angles / 180], order=1, mode="nearest")
+
+
+def select_chords(target_image, pin_coords, num_candidates, min_per_pin=2):
+    """
+    Picks the candidate chords with the darkest Radon line integrals.
+
+    Besides the ``num_candidates`` best chords overall, every pin keeps its
+    ``min_per_pin`` best chords so that no pin is left without a way onward.
+
+    Returns:
+        np.ndarray: The selected (i, j) pin pairs with i < j, in chord order.
+    """
+    num_pins = len(pin_coords)
+    chords = all_chord_pairs(num_pins)
+    scores = radon_chord_scores(target_image, pin_coords, chords)
+    keep = np.zeros(len(chords), dtype=bool)
+    keep[np.argsort(-scores, kind="stable")[:num_candidates]] = True
+
+    by_pin = np.full((num_pins, num_pins), -np.inf)
+    by_pin[chords[:, 0], chords[:, 1]] = scores
+    by_pin[chords[:, 1], chords[:, 0]] = scores
+    best = np.argsort(-by_pin, axis=1, kind="stable")[:, :min_per_pin]
+    pairs = np.sort(np.stack([np.repeat(np.arange(num_pins), best.shape[1]), best.reshape(-1)], axis=1), axis=1)
+    # Chord index of (i, j), i < j, in the all_chord_pairs order.
+    i, j = pairs[:, 0], pairs[:, 1]
+    keep[i * num_pins - i * (i + 1) // 2 + (j - i - 1)] = True
+    return chords[keep]
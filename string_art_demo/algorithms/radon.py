@@ -0,0 +1,37 @@
+from .greedy import GreedyAlgorithm
+
+
+class RadonAlgorithm(GreedyAlgorithm):
+    """
+    Radon / Hough preselection followed by greedy refinement.
+
+    The Radon transform of the inverted target gives every chord's line integral in
+    one pass; the chords along the darkest integrals are kept as candidates, and the
+    incremental greedy algorithm picks the sequence among them only.
+    """
+
+    def prunes_chords(self, kwargs):
+        """
+        Always: the candidates default to ten per pin.
+        """
+        return True
+
+    def run(self, target_image, pin_coords, max_lines=200, line_darkness=25, candidate_chords=None, **kwargs):
+        """
+        Runs Radon preselection and greedy refinement.
+
+        Args:
+            target_image (np.ndarray): The target grayscale image.
+            pin_coords (np.ndarray): The coordinates of the pins.
+            max_lines (int): The maximum number of lines (chords) to draw.
+            line_darkness (int): The value to add to the canvas for each line.
+            candidate_chords (int, optional): The number of chords kept. Defaults to ten
+                per pin.
+            **kwargs: Further options of ``GreedyAlgorithm.run``.
+
+        Yields:
+            dict: The states of ``GreedyAlgorithm.run``.
+        """
+        kwargs.setdefault("incremental", True)
+        yield from super().run(target_image, pin_coords, max_lines=max_lines, line_darkness=line_darkness,
+                               candidate_chords=candidate_chords or 10 * len(pin_coords), **kwargs)
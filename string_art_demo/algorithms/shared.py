@@ -0,0 +1,52 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+
+def share_arrays(arrays):
+    """
+    Copies arrays into new shared memory blocks so worker processes can map them
+    read-only instead of receiving a pickled copy with every task.
+
+    Args:
+        arrays (dict): Name -> np.ndarray.
+
+    Returns:
+        tuple: ``(blocks, spec)``. ``blocks`` are the SharedMemory handles the caller
+               owns and must ``release_arrays`` when done; ``spec`` is a small picklable
+               description to pass to ``attach_arrays`` in the workers.
+    """
+    blocks, spec = [], {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        spec[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, spec
+
+
+def attach_arrays(spec):
+    """
+    Maps the arrays described by ``share_arrays`` into this process.
+
+    Returns:
+        tuple: ``(blocks, arrays)``. The blocks must stay referenced for as long as
+               the arrays are used.
+    """
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        blocks.append(block)
+        arrays[name] = array
+    return blocks, arrays
+
+
+def release_arrays(blocks):
+    """
+    Closes and unlinks shared memory blocks created by ``share_arrays``.
+    """
+    for block in blocks:
+        block.close()
+        block.unlink()
@@ -1,28 +1,306 @@
 import numpy as np
 import random
 import math
-from skimage.draw import line as skimage_line
-from .base import BaseStringArtAlgorithm
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .base import NULL_PROFILER, BaseStringArtAlgorithm, delta_event
+from .checkpoint import NULL_CHECKPOINTER, generator_state, restore_generator, restore_rng, rng_state
+from .geometry import ChordGeometry, render_sequence
+from .shared import attach_arrays, release_arrays, share_arrays
+
+# Per-process state of parallel tempering workers, set by _init_replica_worker.
+_replica_context = {}
+
+
+def _init_replica_worker(spec, image_shape, num_pins, line_darkness):
+    """
+    Maps the shared target and chord geometry into a worker process.
+    """
+    blocks, arrays = attach_arrays(spec)
+    geometry = ChordGeometry(arrays["chords"], arrays["indptr"], arrays["indices"],
+                             arrays["weights"], image_shape, num_pins)
+    _replica_context.update(
+        blocks=blocks,
+        geometry=geometry,
+        target=arrays["target"],
+        line_darkness=line_darkness,
+        line_values=geometry.line_values(line_darkness),
+    )
+
+
+def _run_replica(pins, temp, steps, seed, proposals_per_step=1, accept="first"):
+    """
+    Anneals one replica at a fixed temperature for a number of steps, each a single
+    proposal or a batch of ``proposals_per_step``.
+
+    Returns:
+        tuple: ``(pins, error, accepted)`` of the replica after the steps.
+    """
+    ctx = _replica_context
+    algo = SimulatedAnnealingAlgorithm()
+    sequence = list(zip(pins[:-1], pins[1:]))
+    state = algo._init_state(sequence, ctx["geometry"], ctx["target"], ctx["line_darkness"])
+    if proposals_per_step > 1:
+        generator = np.random.default_rng(seed)
+        path = np.asarray(pins, dtype=np.int64)
+        accepted = sum(algo._anneal_batch(state, ctx["geometry"], ctx["line_values"], temp, generator, path,
+                                          proposals_per_step, accept)
+                       for _ in range(steps))
+    else:
+        rng = random.Random(seed)
+        accepted = sum(algo._anneal_step(state, ctx["geometry"], ctx["line_values"], temp, rng)
+                       for _ in range(steps))
+    return _sequence_pins(state["sequence"]), state["error"], accepted
+
+
+def _sequence_pins(sequence):
+    """
+    Returns the pins visited by a continuous sequence of lines.
+    """
+    return [sequence[0][0]] + [v for _, v in sequence] if sequence else []
+
 
 class SimulatedAnnealingAlgorithm(BaseStringArtAlgorithm):
     """
     Implements the Simulated Annealing string art algorithm.
     """
 
-    def _draw_line_on_canvas(self, canvas, start_pin_coord, end_pin_coord, line_darkness=25):
-        rr, cc = skimage_line(start_pin_coord[0], start_pin_coord[1], end_pin_coord[0], end_pin_coord[1])
-        canvas[rr, cc] += line_darkness
+    # Every replica keeps a full int32 canvas, residual and line values.
+    budget_required_above = 1000
 
     def _calculate_error(self, canvas, target):
         return np.sum((target.astype(np.int32) - canvas.astype(np.int32))**2)
 
-    def _get_canvas_from_sequence(self, sequence, pin_coords, image_shape, line_darkness):
-        canvas = np.zeros(image_shape, dtype=np.uint16)
-        for u, v in sequence:
-            self._draw_line_on_canvas(canvas, pin_coords[u], pin_coords[v], line_darkness)
-        return canvas
+    def _get_canvas_from_sequence(self, sequence, geometry, line_darkness):
+        return render_sequence(sequence, geometry, line_darkness)
+
+    def _line_changes(self, geometry, line_values, removed, added):
+        """
+        Collects the per-pixel canvas change of removing and adding lines.
+
+        Returns:
+            tuple: ``(pixels, change)`` with the unique flat pixels touched and the
+                   net darkness added to each of them.
+        """
+        chord_ids = [geometry.chord_id(u, v) for u, v in removed + added]
+        positions, segments = geometry.gather(chord_ids)
+        signs = np.repeat([-1] * len(removed) + [1] * len(added),
+                          np.diff(np.append(segments, len(positions))))
+        pixels, inverse = np.unique(geometry.indices[positions], return_inverse=True)
+        change = np.zeros(len(pixels), dtype=np.int64)
+        np.add.at(change, inverse, signs * line_values[positions])
+        return pixels, change
+
+    def _delta_error(self, residual, change):
+        """
+        Change of the squared error when ``change`` is added to pixels with the given
+        residual: sum((r - d)^2 - r^2) = sum(d * (d - 2r)).
+        """
+        return int(np.dot(change, change - 2 * residual))
+
+    def _init_state(self, sequence, geometry, inverted_target, line_darkness):
+        """
+        Builds the annealing state of a sequence: its canvas, residual and error.
+        """
+        canvas = self._get_canvas_from_sequence(sequence, geometry, line_darkness)
+        return {
+            "sequence": list(sequence),
+            "canvas": canvas,
+            "residual": inverted_target.astype(np.int32).reshape(-1) - canvas.reshape(-1),
+            "error": int(self._calculate_error(canvas, inverted_target)),
+        }
 
-    def run(self, target_image, pin_coords, max_lines=500, start_temp=1000, end_temp=1e-3, cooling_rate=0.99, **kwargs):
+    def _is_pruned(self, geometry):
+        """
+        Whether the chord index leaves out some pin pairs, e.g. after Radon preselection.
+        """
+        return geometry.num_chords < geometry.num_pins * (geometry.num_pins - 1) // 2
+
+    def _random_lines(self, geometry, last_pin, count, rng):
+        """
+        Draws a continuous run of up to ``count`` random indexed lines from ``last_pin``.
+
+        Returns:
+            list: The (pin, pin) lines; shorter if a pin has no indexed chord left.
+        """
+        pruned = self._is_pruned(geometry)
+        lines = []
+        for _ in range(count):
+            if pruned:
+                choices = np.flatnonzero(geometry.lookup[last_pin] >= 0)
+                if len(choices) == 0:
+                    break
+                next_pin = int(choices[rng.randint(0, len(choices) - 1)])
+            else:
+                next_pin = rng.randint(0, geometry.num_pins - 1)
+                while next_pin == last_pin:
+                    next_pin = rng.randint(0, geometry.num_pins - 1)
+            lines.append((last_pin, next_pin))
+            last_pin = next_pin
+        return lines
+
+    def _anneal_step(self, state, geometry, line_values, temp, rng):
+        """
+        Proposes moving the end pin of one random line and applies the move in place
+        if the Metropolis criterion accepts it.
+
+        Returns:
+            bool: Whether the proposal was accepted.
+        """
+        sequence = state["sequence"]
+        num_pins = geometry.num_pins
+        idx_to_modify = rng.randint(0, len(sequence) - 1)
+        old_line = sequence[idx_to_modify]
+        start_pin = old_line[0]
+        has_successor = idx_to_modify < len(sequence) - 1
+        next_end_pin = sequence[idx_to_modify + 1][1] if has_successor else None
+        if self._is_pruned(geometry):
+            # Only pins whose chords to both neighbours are indexed; a pin's chord to
+            # itself never is, which also rules out start_pin and next_end_pin.
+            allowed = geometry.lookup[start_pin] >= 0
+            if has_successor:
+                allowed &= geometry.lookup[next_end_pin] >= 0
+            choices = np.flatnonzero(allowed)
+            if len(choices) == 0:
+                return False
+            new_end_pin = int(choices[rng.randint(0, len(choices) - 1)])
+        else:
+            new_end_pin = rng.randint(0, num_pins - 1)
+            while new_end_pin == start_pin or new_end_pin == next_end_pin:
+                new_end_pin = rng.randint(0, num_pins - 1)
+
+        # Moving the end pin also moves the start of the following line.
+        removed = [old_line]
+        added = [(start_pin, new_end_pin)]
+        if has_successor:
+            removed.append(sequence[idx_to_modify + 1])
+            added.append((new_end_pin, next_end_pin))
+
+        residual = state["residual"]
+        pixels, change = self._line_changes(geometry, line_values, removed, added)
+        delta_error = self._delta_error(residual[pixels], change)
+
+        accepted = False
+        if delta_error < 0:
+            accepted = True
+        else:
+            acceptance_prob = math.exp(-delta_error / temp)
+            if rng.random() < acceptance_prob:
+                accepted = True
+
+        if accepted:
+            sequence[idx_to_modify] = added[0]
+            if has_successor:
+                sequence[idx_to_modify + 1] = added[1]
+            canvas_flat = state["canvas"].reshape(-1)
+            canvas_flat[pixels] = canvas_flat[pixels] + change
+            residual[pixels] -= change
+            state["error"] += delta_error
+        return accepted
+
+    def _anneal_batch(self, state, geometry, line_values, temp, rng, path, batch_size, accept="first"):
+        """
+        Draws ``batch_size`` end pin moves like ``_anneal_step`` from a numpy Generator,
+        evaluates all their error deltas in one pass over the chord index and applies
+        at most one of them in place.
+
+        With ``accept="first"`` the first proposal the Metropolis criterion accepts is
+        applied, which is exactly a run of single proposals at this temperature up to
+        the first acceptance. With ``"best"`` the lowest delta is applied if the
+        criterion accepts it.
+
+        Args:
+            path (np.ndarray): The pins of ``state["sequence"]``, kept in sync in place.
+
+        Returns:
+            bool: Whether a proposal was accepted.
+        """
+        num_pins, num_pixels = geometry.num_pins, geometry.num_pixels
+        num_lines = len(path) - 1
+        rows = np.arange(batch_size)
+        line_idx = rng.integers(0, num_lines, batch_size)
+        start, old_end = path[line_idx], path[line_idx + 1]
+        has_successor = line_idx < num_lines - 1
+        next_end = np.where(has_successor, path[np.minimum(line_idx + 2, num_lines)], start)
+
+        # Every pin but start_pin and next_end_pin (and, in a pruned index, those
+        # lacking a chord to either), picked uniformly via the count of allowed pins.
+        if self._is_pruned(geometry):
+            allowed = geometry.lookup[start] >= 0
+            allowed[has_successor] &= geometry.lookup[next_end[has_successor]] >= 0
+        else:
+            allowed = np.ones((batch_size, num_pins), dtype=bool)
+        allowed[rows, start] = False
+        allowed[rows, next_end] = False
+        counts = allowed.sum(axis=1)
+        valid = counts > 0
+        choice = (rng.random(batch_size) * counts).astype(np.int64)
+        new_end = np.argmax(np.cumsum(allowed, axis=1) > choice[:, None], axis=1)
+
+        # The removed and added lines of every proposal, as signed chord ranges.
+        u = np.stack([start, old_end, start, new_end], axis=1)
+        v = np.stack([old_end, next_end, new_end, next_end], axis=1)
+        used = np.stack([valid, valid & has_successor, valid, valid & has_successor], axis=1)
+        positions, segments = geometry.gather(geometry.lookup[u[used], v[used]])
+        lengths = np.diff(np.append(segments, len(positions)))
+        owners = np.repeat(np.broadcast_to(rows[:, None], used.shape)[used], lengths)
+        signs = np.repeat(np.broadcast_to(np.array([-1, -1, 1, 1]), used.shape)[used], lengths)
+
+        # Net change per (proposal, pixel), then sum(d * (d - 2r)) per proposal.
+        keys = owners * num_pixels + geometry.indices[positions]
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        firsts = np.flatnonzero(np.append(True, keys[1:] != keys[:-1]))
+        change = np.add.reduceat(signs[order] * line_values[positions[order]], firsts)
+        keys = keys[firsts]
+        owner, pixels = keys // num_pixels, keys % num_pixels
+        residual = state["residual"]
+        deltas = np.rint(np.bincount(owner, weights=change * (change - 2 * residual[pixels]),
+                                     minlength=batch_size)).astype(np.int64)
+
+        with np.errstate(over="ignore"):
+            passes = (deltas < 0) | (rng.random(batch_size) < np.exp(-np.maximum(deltas, 0) / temp))
+        passes &= valid
+        if accept == "first":
+            if not passes.any():
+                return False
+            k = int(np.argmax(passes))
+        elif accept == "best":
+            k = int(np.argmin(np.where(valid, deltas, np.iinfo(np.int64).max)))
+            if not passes[k]:
+                return False
+        else:
+            raise ValueError(f"Unknown acceptance rule: {accept}")
+
+        i, pin = int(line_idx[k]), int(new_end[k])
+        sequence = state["sequence"]
+        sequence[i] = (sequence[i][0], pin)
+        if has_successor[k]:
+            sequence[i + 1] = (pin, sequence[i + 1][1])
+        path[i + 1] = pin
+        lo, hi = np.searchsorted(owner, [k, k + 1])
+        canvas_flat = state["canvas"].reshape(-1)
+        canvas_flat[pixels[lo:hi]] = canvas_flat[pixels[lo:hi]] + change[lo:hi]
+        residual[pixels[lo:hi]] -= change[lo:hi]
+        state["error"] += int(deltas[k])
+        return True
+
+
+    def memory_estimate(self, image_shape, num_pins, num_chords, entries, kwargs):
+        """
+        Adds the int32 line values and the canvas and residual of every replica, each
+        of which also holds its own line values.
+        """
+        estimate = super().memory_estimate(image_shape, num_pins, num_chords, entries, kwargs)
+        replicas = max(1, kwargs.get("num_replicas", 1))
+        estimate["line values"] = entries * 4 * replicas
+        estimate["annealing state"] = image_shape[0] * image_shape[1] * 6 * replicas
+        if replicas > 1:
+            estimate["shared geometry"] = entries * 5 + num_chords * 16
+        return estimate
+
+    def run(self, target_image, pin_coords, max_lines=500, start_temp=1000, end_temp=1e-3, cooling_rate=0.99,
+            num_replicas=1, exchange_interval=100, proposals_per_step=1, accept="first", seed=None, **kwargs):
         """
         Runs the Simulated Annealing algorithm.
 
@@ -33,84 +311,245 @@ class SimulatedAnnealingAlgorithm(BaseStringArtAlgorithm):
             start_temp (float): The initial temperature for annealing.
             end_temp (float): The final temperature.
             cooling_rate (float): The rate at which temperature cools.
+            num_replicas (int): If greater than 1, run parallel tempering with this many
+                replicas at fixed temperatures between start_temp and end_temp, one
+                process per replica.
+            exchange_interval (int): Steps each replica makes between state exchanges.
+            proposals_per_step (int): Proposals drawn and evaluated together at each
+                temperature step. Above 1, proposals come from a ``numpy.random.Generator``
+                and their error deltas are computed in one vectorized pass; at most one
+                is applied per step, see ``accept``.
+            accept (str): Which of a step's proposals is applied: "first", the first one
+                the Metropolis criterion accepts, or "best", the lowest delta if accepted.
+            seed (int, optional): Seeds every random draw of the run, including the
+                initial sequence, so the run is reproducible. Without a seed the single
+                proposal path draws from the ``random`` module.
+            geometry (ChordGeometry, optional): Chord index of pin_coords, passed in
+                **kwargs. Loaded from the geometry cache if omitted.
+            line_model (str, optional): Line model used to rasterize the chords when the
+                geometry is loaded here, passed in **kwargs. See ``LINE_MODELS``.
+            candidate_chords (int, optional): Only consider this many chords, preselected
+                by their Radon line integrals, passed in **kwargs. See ``chord_geometry``.
+            initial_sequence (list, optional): Continuous sequence of (pin, pin) lines to
+                start from instead of a random one, passed in **kwargs, e.g. the result of
+                an earlier run as a warm start. A shorter sequence is extended with random
+                lines from its last pin up to max_lines, a longer one is truncated.
+            checkpoint (str, optional): File the sequence, temperature and random state
+                are saved to, passed in **kwargs. See ``checkpointer``.
+            resume_from (str or dict, optional): Checkpoint to continue the anneal from,
+                passed in **kwargs. The run continues with the saved temperature and
+                random state, exactly as if it had not stopped.
 
         Yields:
-            dict: Animation state at each step.
+            dict: Animation state every ``frame_every`` (default 10) iterations, or as set
+                  by the other emission options, and a final state. Iterations without a
+                  frame yield a delta event with only ``line_num`` and ``progress``, so a
+                  consumer can stop the run even when only the final state is wanted.
         """
         num_pins = len(pin_coords)
         inverted_target = 255 - target_image
         line_darkness = kwargs.get('line_darkness', 25)
 
-        # 1. Start with a random solution
-        current_sequence = []
-        last_pin = random.randint(0, num_pins - 1)
-        for _ in range(max_lines):
-            next_pin = random.randint(0, num_pins - 1)
-            while next_pin == last_pin:
-                next_pin = random.randint(0, num_pins - 1)
-            current_sequence.append((last_pin, next_pin))
-            last_pin = next_pin
+        profiler = self.profiler(kwargs)
+        with profiler.phase("geometry"):
+            geometry = self.chord_geometry(target_image, pin_coords, dict(kwargs, num_replicas=num_replicas))
+
+        checkpointer = self.checkpointer(kwargs, pin_coords, target_image.shape)
+        resume = self.resume_state(kwargs, pin_coords, target_image.shape)
+        if resume is not None and ("replica_pins" in resume) != (num_replicas > 1):
+            raise ValueError("Parallel tempering and serial annealing checkpoints are not interchangeable")
+        batched = proposals_per_step > 1 or seed is not None
+        if resume is not None and num_replicas == 1 and ("generator_state" in resume) != batched:
+            raise ValueError("Checkpoints of batched and single proposal annealing are not interchangeable")
+        # A resumed run draws from its own generators, continuing the saved random streams.
+        if resume is not None:
+            rng = restore_rng(resume["rng_state"])
+        else:
+            rng = random if seed is None else random.Random(seed)
+        generator = None
+        if batched and num_replicas == 1:
+            generator = (np.random.default_rng(seed) if resume is None
+                         else restore_generator(resume["generator_state"]))
+
+        # 1. Start with a random solution, unless a starting sequence is given
+        initial_sequence = resume["sequence"] if resume is not None else kwargs.get("initial_sequence")
+        current_sequence = [tuple(int(p) for p in line) for line in initial_sequence or []]
+        if resume is None:
+            current_sequence = current_sequence[:max_lines]
+            last_pin = current_sequence[-1][1] if current_sequence else rng.randint(0, num_pins - 1)
+            current_sequence += self._random_lines(geometry, last_pin, max_lines - len(current_sequence), rng)
+
+        if num_replicas > 1:
+            yield from self._run_parallel_tempering(
+                current_sequence, geometry, inverted_target, line_darkness,
+                start_temp, end_temp, cooling_rate, num_replicas, exchange_interval,
+                self.emission_policy(kwargs), profiler, checkpointer, resume, rng, proposals_per_step, accept)
+            return
 
-        current_canvas = self._get_canvas_from_sequence(current_sequence, pin_coords, target_image.shape, line_darkness)
-        current_error = self._calculate_error(current_canvas, inverted_target)
+        with profiler.phase("initial_state"):
+            state = self._init_state(current_sequence, geometry, inverted_target, line_darkness)
+            line_values = geometry.line_values(line_darkness)
+            path = np.array(_sequence_pins(state["sequence"]), dtype=np.int64)
 
-        temp = start_temp
-        iteration = 0
+        policy = self.emission_policy(kwargs, default_every=10)
+        temp = start_temp if resume is None else resume["temp"]
+        iteration = 0 if resume is None else resume["iteration"]
 
         while temp > end_temp:
             iteration += 1
 
-            if not current_sequence:
+            if not state["sequence"]:
                 break
 
-            idx_to_modify = random.randint(0, len(current_sequence) - 1)
-            old_line = current_sequence[idx_to_modify]
-            start_pin = old_line[0]
-            new_end_pin = random.randint(0, num_pins - 1)
-            while new_end_pin == start_pin:
-                new_end_pin = random.randint(0, num_pins - 1)
-
-            # Incremental update: subtract old line, add new line
-            new_canvas = np.array(current_canvas, copy=True)
-            rr_old, cc_old = skimage_line(pin_coords[old_line[0]][0], pin_coords[old_line[0]][1], pin_coords[old_line[1]][0], pin_coords[old_line[1]][1])
-            new_canvas[rr_old, cc_old] -= line_darkness
-            rr_new, cc_new = skimage_line(pin_coords[start_pin][0], pin_coords[start_pin][1], pin_coords[new_end_pin][0], pin_coords[new_end_pin][1])
-            new_canvas[rr_new, cc_new] += line_darkness
-
-            new_sequence = list(current_sequence)
-            new_sequence[idx_to_modify] = (start_pin, new_end_pin)
-            if idx_to_modify < len(current_sequence) - 1:
-                next_start_pin = new_end_pin
-                next_end_pin = current_sequence[idx_to_modify+1][1]
-                new_sequence[idx_to_modify+1] = (next_start_pin, next_end_pin)
-
-            new_error = self._calculate_error(new_canvas, inverted_target)
-
-            delta_error = new_error - current_error
-            accepted = False
-            if delta_error < 0:
-                accepted = True
-            else:
-                acceptance_prob = math.exp(-delta_error / temp)
-                if random.random() < acceptance_prob:
-                    accepted = True
-
-            if accepted:
-                current_sequence = new_sequence
-                current_error = new_error
-                current_canvas = new_canvas
+            with profiler.phase("proposals"):
+                if batched:
+                    accepted = self._anneal_batch(state, geometry, line_values, temp, generator, path,
+                                                  proposals_per_step, accept)
+                else:
+                    accepted = self._anneal_step(state, geometry, line_values, temp, rng)
+            profiler.count("proposals", proposals_per_step)
+            profiler.count("accepted", accepted)
 
             temp *= cooling_rate
 
-            if iteration % 10 == 0:
-                display_canvas = np.clip(current_canvas, 0, 255).astype(np.uint8)
-                yield {
-                    "status": f"Temp: {temp:.2f}, Error: {current_error:.0f}",
-                    "progress": 1 - (temp / start_temp),
-                    "canvas": 255 - display_canvas,
-                    "accepted": accepted,
-                    "line_num": iteration
-                }
-
-        final_canvas = np.clip(current_canvas, 0, 255).astype(np.uint8)
-        yield {"status": "Done!", "progress": 1.0, "canvas": 255 - final_canvas}
+            if checkpointer.due(final=temp <= end_temp):
+                with profiler.phase("checkpoint"):
+                    random_state = {"generator_state": generator_state(generator)} if batched else {}
+                    checkpointer.save(state["sequence"], temp=temp, iteration=iteration, rng_state=rng_state(rng),
+                                      **random_state)
+
+            if not policy.due(iteration):
+                yield delta_event(iteration, progress=1 - (temp / start_temp))
+                continue
+
+            with profiler.phase("frames"):
+                display_canvas = np.clip(state["canvas"], 0, 255).astype(np.uint8)
+            profiler.count("frames")
+            yield profiler.attach({
+                "status": f"Temp: {temp:.2f}, Error: {state['error']:.0f}",
+                "progress": 1 - (temp / start_temp),
+                "canvas": 255 - display_canvas,
+                "accepted": accepted,
+                "line_num": iteration
+            })
+
+        final_canvas = np.clip(state["canvas"], 0, 255).astype(np.uint8)
+        yield profiler.attach({
+            "status": "Done!",
+            "progress": 1.0,
+            "canvas": 255 - final_canvas,
+            "sequence": state["sequence"],
+            "total_error": state["error"]
+        }, final=True)
+
+    def _run_parallel_tempering(self, sequence, geometry, inverted_target, line_darkness,
+                                start_temp, end_temp, cooling_rate, num_replicas, exchange_interval, policy,
+                                profiler=NULL_PROFILER, checkpointer=NULL_CHECKPOINTER, resume=None, rng=random,
+                                proposals_per_step=1, accept="first"):
+        """
+        Runs replicas of the anneal at a geometric ladder of fixed temperatures on a
+        process pool. After every ``exchange_interval`` proposals, neighbouring replicas
+        swap states with the usual parallel tempering acceptance probability.
+
+        Each replica makes as many steps in total as the serial cooling schedule.
+        The target and chord geometry are placed in shared memory once; tasks only
+        carry the replica's pin sequence. A checkpoint holds every replica's pins and
+        error, the best sequence and the number of completed rounds.
+
+        Yields:
+            dict: The best-so-far canvas after the exchange rounds the emission policy selects,
+                  and a delta event after the other rounds.
+        """
+        if not sequence:
+            yield {"status": "Done!", "progress": 1.0, "canvas": 255 - np.zeros(geometry.image_shape, dtype=np.uint8)}
+            return
+
+        schedule_steps = max(1, math.ceil(math.log(end_temp / start_temp) / math.log(cooling_rate)))
+        num_rounds = math.ceil(schedule_steps / exchange_interval)
+        temps = [start_temp * (end_temp / start_temp) ** (n / (num_replicas - 1)) for n in range(num_replicas)]
+
+        pins = [_sequence_pins(sequence)] * num_replicas
+        errors = [int(self._calculate_error(self._get_canvas_from_sequence(sequence, geometry, line_darkness),
+                                            inverted_target))] * num_replicas
+        best_pins, best_error = pins[0], errors[0]
+        first_round = 0
+        if resume is not None:
+            pins = [[int(p) for p in replica] for replica in resume["replica_pins"]]
+            errors = [int(e) for e in resume["replica_errors"]]
+            best_pins, best_error = _sequence_pins(resume["sequence"]), resume["best_error"]
+            first_round = resume["round"]
+
+        with profiler.phase("shared_memory"):
+            blocks, spec = share_arrays({
+                "target": inverted_target,
+                "chords": geometry.chords,
+                "indptr": geometry.indptr,
+                "indices": geometry.indices,
+                "weights": geometry.weights,
+            })
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(num_replicas, os.cpu_count() or 1),
+                initializer=_init_replica_worker,
+                initargs=(spec, geometry.image_shape, geometry.num_pins, line_darkness),
+            ) as pool:
+                for round_num in range(first_round, num_rounds):
+                    steps = min(exchange_interval, schedule_steps - round_num * exchange_interval)
+                    with profiler.phase("replicas"):
+                        futures = [pool.submit(_run_replica, pins[n], temps[n], steps, rng.getrandbits(32),
+                                               proposals_per_step, accept)
+                                   for n in range(num_replicas)]
+                        results = [f.result() for f in futures]
+                    pins = [r[0] for r in results]
+                    errors = [r[1] for r in results]
+                    accepted = sum(r[2] for r in results)
+                    profiler.count("proposals", steps * num_replicas * proposals_per_step)
+                    profiler.count("accepted", accepted)
+
+                    n = int(np.argmin(errors))
+                    if errors[n] < best_error:
+                        best_pins, best_error = pins[n], errors[n]
+
+                    # Alternate between even and odd neighbour pairs each round.
+                    swaps = 0
+                    for n in range(round_num % 2, num_replicas - 1, 2):
+                        log_prob = (1 / temps[n] - 1 / temps[n + 1]) * (errors[n] - errors[n + 1])
+                        if log_prob >= 0 or rng.random() < math.exp(log_prob):
+                            pins[n], pins[n + 1] = pins[n + 1], pins[n]
+                            errors[n], errors[n + 1] = errors[n + 1], errors[n]
+                            swaps += 1
+                    profiler.count("swaps", swaps)
+
+                    if checkpointer.due(final=round_num + 1 == num_rounds):
+                        with profiler.phase("checkpoint"):
+                            checkpointer.save(list(zip(best_pins[:-1], best_pins[1:])),
+                                              replica_pins=np.array(pins), replica_errors=np.array(errors),
+                                              best_error=best_error, round=round_num + 1, rng_state=rng_state(rng))
+
+                    if not policy.due(round_num + 1):
+                        yield delta_event((round_num + 1) * exchange_interval, progress=(round_num + 1) / num_rounds)
+                        continue
+                    with profiler.phase("frames"):
+                        best_canvas = self._get_canvas_from_sequence(
+                            list(zip(best_pins[:-1], best_pins[1:])), geometry, line_darkness)
+                    profiler.count("frames")
+                    yield profiler.attach({
+                        "status": f"Round {round_num + 1}/{num_rounds}, Best error: {best_error:.0f}, Swaps: {swaps}",
+                        "progress": (round_num + 1) / num_rounds,
+                        "canvas": 255 - np.clip(best_canvas, 0, 255).astype(np.uint8),
+                        "accepted": accepted,
+                        "line_num": (round_num + 1) * exchange_interval,
+                        "total_error": best_error
+                    })
+        finally:
+            release_arrays(blocks)
+
+        best_sequence = list(zip(best_pins[:-1], best_pins[1:]))
+        final_canvas = self._get_canvas_from_sequence(best_sequence, geometry, line_darkness)
+        yield profiler.attach({
+            "status": "Done!",
+            "progress": 1.0,
+            "canvas": 255 - np.clip(final_canvas, 0, 255).astype(np.uint8),
+            "sequence": best_sequence,
+            "total_error": best_error
+        }, final=True)
@@ -3,12 +3,18 @@ import numpy as np
 import cv2
 from PIL import Image
 import io
+import os
+import sys
+import time
+import hashlib
+import subprocess
+from collections import OrderedDict
 import matplotlib.pyplot as plt
 
 # --- Algorithm Imports ---
-from algorithms.greedy import generate_pin_coords, GreedyAlgorithm
-from algorithms.continuous_relaxation import ContinuousRelaxationAlgorithm
-from algorithms.simulated_annealing import SimulatedAnnealingAlgorithm
+# Jobs run in the job service (string_art_demo/service.py); the app only needs the names.
+from algorithms import ALGORITHMS
+from service_client import DEFAULT_URL, ServiceClient, ServiceError
 
 # --- App Configuration ---
 st.set_page_config(
@@ -17,41 +23,149 @@ st.set_page_config(
     layout="wide",
 )
 
-# --- Algorithm Mapping ---
-ALGORITHMS = {
-    "Greedy Residual": GreedyAlgorithm,
-    "Continuous Relaxation + Eulerization": ContinuousRelaxationAlgorithm,
-    "Simulated Annealing": SimulatedAnnealingAlgorithm,
+# Line models offered in the sidebar, see algorithms.geometry.LINE_MODELS.
+LINE_MODEL_OPTIONS = {
+    "Aliased (1 px)": "skimage_line",
+    "Anti-aliased": "antialiased",
+    "Thread (1 px wide)": "thread",
+    "Thread (2 px wide)": "thread:2",
 }
 
+# Frame emission options passed to run(); they only affect the live preview.
+PREVIEW_POLICIES = {
+    "Every 200 ms": {"frame_interval_ms": 200},
+    "Every Step": {"frame_every": 1},
+    "Final Result Only": {"final_only": True},
+}
+
+# Refinement options of the coarse-to-fine wrapper, see algorithms.multiresolution.
+REFINE_OPTIONS = {
+    "Local Greedy Re-selection": "greedy",
+    "Short Annealing Pass": "anneal",
+}
+
+# Thread colour modes; the palettes are defined in algorithms.color.PALETTES.
+COLOR_MODES = {
+    "Grayscale": None,
+    "CMYK Threads": "cmyk",
+    "CMY Threads": "cmy",
+}
+
+# Square solve sizes in pixels; the larger ones are print-resolution previews.
+CANVAS_SIZES = [300, 600, 1000, 1500, 2000, 3000]
+
+# Memory a run may use; runs estimated to need more fail before any work.
+MEMORY_BUDGETS = {
+    "No Limit": None,
+    "1 GB": "1G",
+    "2 GB": "2G",
+    "4 GB": "4G",
+    "8 GB": "8G",
+}
+
+# Completed runs kept for instant re-display when Generate is pressed again.
+MAX_CACHED_RESULTS = 32
+
+# Algorithms whose next run with more (or fewer) lines continues from the last run of
+# the same image and options: greedy prefixes are deterministic, annealing warm-starts.
+CONTINUABLE_ALGORITHMS = {"Greedy Residual", "Beam Search Greedy", "Radon Preselection + Greedy",
+                          "Simulated Annealing"}
+
 # --- Helper Functions ---
-def load_image(image_file, target_size=(300, 300)):
-    """Loads an image, converts to grayscale, and resizes."""
+@st.cache_data(max_entries=16)
+def decode_image(image_bytes, target_size=(300, 300), color=False):
+    """Decodes image bytes, converts to grayscale unless color is set, and resizes."""
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    img_array = np.array(img)
+    if color:
+        return cv2.resize(img_array, target_size)
+    gray_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray_img, target_size)
+
+def load_image(image_file, target_size=(300, 300), color=False):
+    """Loads an image, converts to grayscale unless color is set, and resizes."""
     if image_file is not None:
         try:
-            img = Image.open(image_file).convert("RGB")
-            img_array = np.array(img)
-            gray_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-            resized_img = cv2.resize(gray_img, target_size)
-            return resized_img
+            return decode_image(image_file.getvalue(), target_size, color)
         except Exception as e:
             st.error(f"Error loading image: {e}")
             return None
     return None
 
+@st.cache_resource
+def job_service():
+    """Client of the job service, starting a local service unless one already answers."""
+    client = ServiceClient(DEFAULT_URL)
+    if not client.is_alive():
+        port = DEFAULT_URL.rsplit(":", 1)[-1].strip("/")
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.Popen([sys.executable, "-m", "string_art_demo.service", "--port", port], cwd=repo_root)
+        deadline = time.monotonic() + 30
+        while not client.is_alive():
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"The job service did not start at {DEFAULT_URL}.")
+            time.sleep(0.2)
+    return client
+
+@st.cache_resource
+def result_store():
+    """Completed results by (image hash, algorithm, pins, params), least recently used first."""
+    return OrderedDict()
+
+@st.cache_resource
+def continuation_store():
+    """Sequence of the last run per (image hash, algorithm, pins, params but max_lines)."""
+    return OrderedDict()
+
+def result_key(image_bytes, algo_name, num_pins, params):
+    return (hashlib.sha256(image_bytes).hexdigest(), algo_name, num_pins, tuple(sorted(params.items())))
+
 def get_algorithm_params(algo_name):
     params = {}
     if algo_name == "Greedy Residual":
         params["max_lines"] = st.slider("Number of Lines", 100, 5000, 1000, 100)
         params["line_darkness"] = st.slider("Line Darkness", 1, 50, 20, 1)
+        params["num_workers"] = st.slider("Scoring Processes", 1, max(os.cpu_count() or 1, 2), 1, 1,
+                                          help="Score each step's candidates on several cores. Pays off on "
+                                               "large canvases with many pins.")
+    elif algo_name == "Beam Search Greedy":
+        params["max_lines"] = st.slider("Number of Lines", 100, 5000, 1000, 100)
+        params["line_darkness"] = st.slider("Line Darkness", 1, 50, 20, 1)
+        params["beam_width"] = st.slider("Beam Width", 1, 16, 4, 1)
+        params["beam_depth"] = st.slider("Lookahead Depth", 1, 4, 2, 1,
+                                         help="Lines looked ahead before each line is committed.")
+    elif algo_name == "Radon Preselection + Greedy":
+        params["max_lines"] = st.slider("Number of Lines", 100, 5000, 1000, 100)
+        params["line_darkness"] = st.slider("Line Darkness", 1, 50, 20, 1)
     elif algo_name == "Continuous Relaxation + Eulerization":
-        st.info("This algorithm is computationally intensive and may be slow.")
-        # No specific parameters for now, but we could add some (e.g., for rounding)
+        solvers = {
+            "Projected Gradient": "projected_gradient",
+            "LSMR (bounded, no progress updates)": "lsmr",
+            "Exact Active Set (small images only)": "active_set",
+        }
+        params["solver"] = solvers[st.selectbox("NNLS Solver", list(solvers.keys()))]
+        if params["solver"] == "active_set":
+            st.info("The exact solver is computationally intensive and may be slow.")
+        else:
+            params["max_iter"] = st.slider("Solver Iterations", 50, 2000, 500, 50)
+            params["tol"] = st.select_slider("Solver Tolerance", options=[1e-2, 1e-3, 1e-4, 1e-5, 1e-6], value=1e-4)
     elif algo_name == "Simulated Annealing":
         params["max_lines"] = st.slider("Number of Lines (Sequence Length)", 100, 2000, 500, 50)
         params["start_temp"] = st.number_input("Start Temperature", value=1000)
         params["cooling_rate"] = st.slider("Cooling Rate", 0.9, 0.999, 0.99, 0.001)
         params["line_darkness"] = st.slider("Line Darkness", 1, 50, 25, 1)
+        params["num_replicas"] = st.slider("Parallel Tempering Replicas", 1, max(os.cpu_count() or 1, 2), 1, 1,
+                                           help="Above 1, anneals replicas at different temperatures in parallel processes.")
+        if params["num_replicas"] > 1:
+            params["exchange_interval"] = st.slider("Steps Between Exchanges", 10, 1000, 100, 10)
+        params["proposals_per_step"] = st.select_slider("Proposals per Step", options=[1, 8, 16, 32, 64, 128], value=1,
+                                                        help="Evaluate several moves per temperature step at once.")
+        if params["proposals_per_step"] > 1:
+            params["accept"] = st.selectbox("Accept", ["first", "best"],
+                                            help="Apply the first accepted move of a step, or the best one.")
+            seed = st.number_input("Random Seed", min_value=0, value=0, help="0 draws a fresh seed every run.")
+            if seed:
+                params["seed"] = int(seed)
     return params
 
 # --- UI Sidebar ---
@@ -76,10 +190,40 @@ with st.sidebar:
 
     st.header("3. Set Parameters")
     num_pins = st.slider("Number of Pins", 50, 400, 150, 10)
+    canvas_size = st.select_slider("Canvas Size (px)", options=CANVAS_SIZES, value=300,
+                                   help="Sizes above 1000 px are slow and memory hungry; prefer "
+                                        "Greedy Residual or candidate chords there.")
     algo_params = get_algorithm_params(algorithm_name)
+    algo_params["line_model"] = LINE_MODEL_OPTIONS[st.selectbox(
+        "Line Model", list(LINE_MODEL_OPTIONS.keys()),
+        help="Anti-aliased and thread models give smoother results at lower resolutions.")]
+    coarse_to_fine = st.checkbox("Coarse-to-Fine", help="Solve at quarter resolution, then refine the "
+                                 "sequence at half and full resolution. Much faster on large images.")
+    refine = REFINE_OPTIONS[st.selectbox("Refinement", list(REFINE_OPTIONS.keys()))] if coarse_to_fine else None
+    candidates = st.select_slider("Candidate Chords (Radon Preselection)", options=[0, 500, 1000, 2000, 5000, 10000],
+                                  value=0 if algorithm_name != "Radon Preselection + Greedy" else 1000,
+                                  help="Only consider the chords with the darkest line integrals. 0 uses all chords.")
+    if candidates:
+        algo_params["candidate_chords"] = candidates
+    palette = COLOR_MODES[st.selectbox("Thread Colours", list(COLOR_MODES.keys()),
+                                       help="Colour modes solve one thread colour per worker process.")]
+    memory_budget = MEMORY_BUDGETS[st.selectbox("Memory Budget", list(MEMORY_BUDGETS.keys()),
+                                                help="Fail fast with an estimate if a run needs more.")]
+    if memory_budget:
+        algo_params["memory_budget"] = memory_budget
+    # The service refuses print sizes of some algorithms without a budget.
+    budget_limit = ALGORITHMS[algorithm_name].budget_required_above
+    needs_budget = budget_limit is not None and canvas_size > budget_limit and not memory_budget
+    if needs_budget:
+        st.warning(f"{algorithm_name} needs a Memory Budget above {budget_limit} px.")
+    preview = st.selectbox("Preview Updates", list(PREVIEW_POLICIES.keys()))
+    profile = st.checkbox("Profile Run", help="Record per-phase timings and counters.")
 
     st.header("4. Generate")
-    generate_button = st.button("Generate String Art", type="primary", disabled=(uploaded_file is None))
+    generate_button = st.button("Generate String Art", type="primary", disabled=(uploaded_file is None or needs_budget))
+    # A running job's id is kept in the URL, so a refreshed page reattaches to it.
+    active_job = st.query_params.get("job")
+    cancel_button = st.button("Cancel", disabled=active_job is None)
 
 # --- Main App ---
 st.title("Interactive String Art Generator")
@@ -93,18 +237,26 @@ if 'generated_art' not in st.session_state:
     st.session_state.generated_art = None
 if 'extra_vis' not in st.session_state:
     st.session_state.extra_vis = None
+if 'profile_summary' not in st.session_state:
+    st.session_state.profile_summary = None
 
 # --- Image and Results Display ---
 col1, col2, col3 = st.columns(3)
 
 target_image = None
+color_image = None
 if uploaded_file:
-    target_image = load_image(uploaded_file)
+    target_image = load_image(uploaded_file, (canvas_size, canvas_size))
+    if palette:
+        color_image = load_image(uploaded_file, (canvas_size, canvas_size), color=True)
 
 with col1:
     st.header("Original Image")
     if target_image is not None:
-        st.image(target_image, caption="Grayscale Target", use_container_width=True)
+        if color_image is not None:
+            st.image(color_image, caption="Colour Target", use_container_width=True)
+        else:
+            st.image(target_image, caption="Grayscale Target", use_container_width=True)
     else:
         st.warning("Please upload an image.")
 
@@ -128,55 +280,123 @@ with col3:
     elif target_image is not None:
         extra_vis_placeholder.image(target_image, caption="Residual, heatmap, etc.", use_container_width=True)
 
+if st.session_state.profile_summary is not None:
+    with st.expander("Profile of the last run"):
+        summary = st.session_state.profile_summary
+        st.write(f"Total: {summary['total_s']:.2f} s")
+        st.table({"Phase": list(summary["phases"]),
+                  "Seconds": [round(t, 4) for t in summary["phases"].values()]})
+        st.table({"Counter": list(summary["counters"]), "Value": list(summary["counters"].values())})
+
+
+def show_result(result):
+    """Draws one progress dict of a job; returns its canvas, if any."""
+    if "profile_summary" in result:
+        st.session_state.profile_summary = result["profile_summary"]
+
+    if "residual" in result:
+        st.session_state.extra_vis = result["residual"]
+        extra_vis_placeholder.image(result["residual"], caption="Residual Error", use_container_width=True)
+
+    if "heatmap" in result:
+        # Visualize the chord weights as a bar chart
+        fig, ax = plt.subplots()
+        ax.bar(range(len(result["heatmap"])), result["heatmap"])
+        ax.set_title("Chord Weights (Heatmap)")
+        ax.set_xlabel("Chord Index")
+        ax.set_ylabel("Weight")
+        st.session_state.extra_vis = fig
+        extra_vis_placeholder.pyplot(fig)
+
+    if "canvas" in result:
+        string_art_placeholder.image(result["canvas"], use_container_width=True)
+        return result["canvas"]
+    return None
+
 # --- Generation Logic ---
+if 'job_keys' not in st.session_state:
+    st.session_state.job_keys = {}
+
+client = job_service()
+store = result_store()
+continuations = continuation_store()
+
+if cancel_button and active_job is not None:
+    try:
+        client.cancel(active_job)
+    except ServiceError:
+        pass
+
 if generate_button and target_image is not None:
+    key = result_key(uploaded_file.getvalue(), (algorithm_name, refine, palette, canvas_size), num_pins, algo_params)
+    cached = store.get(key)
+    if cached is not None:
+        store.move_to_end(key)
+        st.session_state.generated_art = cached["canvas"]
+        string_art_placeholder.image(cached["canvas"], caption="Final Result", use_container_width=True)
+        st.success("Loaded previous result.")
+    else:
+        run_params = dict(algo_params, profile=profile, **PREVIEW_POLICIES[preview])
+        continuation_key = None
+        if algorithm_name in CONTINUABLE_ALGORITHMS and refine is None and palette is None:
+            continuation_key = result_key(uploaded_file.getvalue(), (algorithm_name, canvas_size), num_pins,
+                                          {k: v for k, v in algo_params.items() if k != "max_lines"})
+            previous = continuations.get(continuation_key)
+            if previous:
+                continuations.move_to_end(continuation_key)
+                run_params["initial_sequence"] = previous
+        active_job = client.submit({
+            "algorithm": algorithm_name,
+            "image": uploaded_file.getvalue(),
+            "size": target_image.shape[0],
+            "num_pins": num_pins,
+            "params": run_params,
+            "refine": refine,
+            "palette": palette,
+        })
+        st.session_state.job_keys[active_job] = (key, continuation_key)
+        st.query_params["job"] = active_job
+
+if active_job is not None:
     progress_bar = st.progress(0)
     status_text = st.empty()
+    final_canvas = None
 
-    pin_coords = generate_pin_coords(num_pins, target_image.shape)
-
-    AlgorithmClass = ALGORITHMS[algorithm_name]
-    algorithm = AlgorithmClass()
+    try:
+        for kind, result in client.events(active_job):
+            if kind == "state":
+                status_text.text(result["state"].capitalize())
+                continue
+            if kind == "failed":
+                st.error(result.get("status", "The job failed."))
+                break
+            if kind == "cancelled":
+                st.warning("Generation cancelled.")
+                break
 
-    generator = algorithm.run(
-        target_image=target_image,
-        pin_coords=pin_coords,
-        **algo_params
-    )
+            progress_bar.progress(min(max(result.get("progress", 0), 0.0), 1.0))
+            status_text.text(result.get("status", ""))
+            canvas = show_result(result)
+            if canvas is not None:
+                final_canvas = canvas
 
-    final_canvas = None
+            if kind == "done":
+                # Colour runs: (colour index, pin, pin) steps.
+                sequence = result.get("plan", result.get("sequence", []))
+                key, continuation_key = st.session_state.job_keys.pop(active_job, (None, None))
+                if final_canvas is not None:
+                    st.session_state.generated_art = final_canvas
+                    if key is not None:
+                        store[key] = {"canvas": final_canvas, "sequence": sequence}
+                        while len(store) > MAX_CACHED_RESULTS:
+                            store.popitem(last=False)
+                    if continuation_key is not None and sequence:
+                        continuations[continuation_key] = sequence
+                        while len(continuations) > MAX_CACHED_RESULTS:
+                            continuations.popitem(last=False)
+                st.success("String art generation complete!")
+    except ServiceError:
+        st.warning("The job is no longer known to the service.")
 
-    for result in generator:
-        if result.get("error"):
-            st.error(result["status"])
-            break
-
-        progress = result.get("progress", 0)
-        progress_bar.progress(progress)
-        status_text.text(result.get("status", ""))
-
-        if "canvas" in result:
-            final_canvas = result["canvas"]
-            string_art_placeholder.image(final_canvas, use_container_width=True)
-
-        if "residual" in result:
-            st.session_state.extra_vis = result["residual"]
-            extra_vis_placeholder.image(result["residual"], caption="Residual Error", use_container_width=True)
-
-        if "heatmap" in result:
-            # Visualize the chord weights as a bar chart
-            fig, ax = plt.subplots()
-            ax.bar(range(len(result["heatmap"])), result["heatmap"])
-            ax.set_title("Chord Weights (Heatmap)")
-            ax.set_xlabel("Chord Index")
-            ax.set_ylabel("Weight")
-            st.session_state.extra_vis = fig
-            extra_vis_placeholder.pyplot(fig)
-
-    progress_bar.progress(1.0)
-    if final_canvas is not None:
-        st.session_state.generated_art = final_canvas
-        string_art_placeholder.image(final_canvas, caption="Final Result", use_container_width=True)
-
-    st.success("String art generation complete!")
+    del st.query_params["job"]
     st.rerun()
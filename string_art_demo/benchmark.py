@@ -0,0 +1,232 @@
+"""
+Benchmark suite for the string art algorithms.
+
+    python -m string_art_demo.benchmark --grid quick -o bench.json
+    python -m string_art_demo.benchmark --grid full -o new.json --compare old.json
+
+Every case runs in a fresh process and records wall time, per-step latency, peak
+RSS, peak traced allocations and the final squared error. Inputs are synthetic
+images and ``assets/einstein.jpg``, so the suite runs offline.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .algorithms import ALGORITHMS
+from .algorithms.greedy import generate_pin_coords
+# Imported for every case so the image libraries count towards every case's RSS alike.
+from .cli import load_image
+
+EINSTEIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "einstein.jpg")
+
+GRIDS = {
+    "quick": {"pins": [50], "sizes": [100], "lines": [100]},
+    "full": {"pins": [50, 150, 400], "sizes": [100, 300, 1000], "lines": [100, 1000, 5000]},
+}
+
+# Slug -> ALGORITHMS display name.
+BENCH_ALGORITHMS = {
+    "greedy": "Greedy Residual",
+    "beam_greedy": "Beam Search Greedy",
+    "simulated_annealing": "Simulated Annealing",
+    "continuous_relaxation": "Continuous Relaxation + Eulerization",
+    "radon": "Radon Preselection + Greedy",
+}
+
+# Algorithms whose run does not depend on the number of lines only run the first value.
+_LINE_INDEPENDENT = {"continuous_relaxation"}
+
+
+def synthetic_image(size):
+    """
+    A gradient with a dark disc and a bright bar: smooth areas plus hard edges.
+    """
+    yy, xx = np.mgrid[:size, :size] / max(size - 1, 1)
+    image = 40 + 180 * xx
+    image[(yy - 0.5) ** 2 + (xx - 0.45) ** 2 < 0.08] = 20
+    image[int(size * 0.7):int(size * 0.8), int(size * 0.2):int(size * 0.8)] = 245
+    return image.astype(np.uint8)
+
+
+def load_target(image_name, size):
+    if image_name == "synthetic":
+        return synthetic_image(size)
+    return load_image(EINSTEIN_PATH, size)
+
+
+def _final_error(target_image, canvas):
+    diff = target_image.astype(np.int64) - canvas.astype(np.int64)
+    return int(np.sum(diff * diff))
+
+
+def _peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(case, trace_memory=True):
+    """
+    Runs one benchmark case in the current process.
+
+    Args:
+        case (dict): ``algorithm`` (slug), ``image``, ``pins``, ``size`` and ``lines``.
+        trace_memory (bool): Whether to record peak allocations with tracemalloc, which
+            slows allocation-heavy code down somewhat.
+
+    Returns:
+        dict: The case plus its measurements.
+    """
+    target_image = load_target(case["image"], case["size"])
+    pin_coords = generate_pin_coords(case["pins"], target_image.shape)
+    params = {"max_lines": case["lines"], "final_only": True}
+    if case["algorithm"] == "simulated_annealing":
+        params["line_darkness"] = 25
+
+    algorithm = ALGORITHMS[BENCH_ALGORITHMS[case["algorithm"]]]()
+    if trace_memory:
+        tracemalloc.start()
+    step_times = []
+    final = None
+    start = last = time.perf_counter()
+    for result in algorithm.run(target_image, pin_coords, **params):
+        now = time.perf_counter()
+        step_times.append(now - last)
+        last = now
+        final = result
+    wall = time.perf_counter() - start
+    peak_traced = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    # The first interval also covers setup (rasterization, initial scoring).
+    steps = np.array(step_times[1:] or step_times) * 1000
+    measurements = {
+        "wall_s": wall,
+        "setup_s": step_times[0] if step_times else 0.0,
+        "steps": len(step_times),
+        "step_ms_mean": float(steps.mean()) if len(steps) else 0.0,
+        "step_ms_p95": float(np.percentile(steps, 95)) if len(steps) else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "peak_traced_mb": peak_traced / (1024 * 1024) if peak_traced is not None else None,
+        "final_error": _final_error(target_image, final["canvas"]) if final and "canvas" in final else None,
+        "failed": bool(final is None or final.get("error")),
+    }
+    return {**case, **measurements}
+
+
+def build_cases(algorithms, images, pins, sizes, lines):
+    cases = []
+    for algorithm, image, num_pins, size in itertools.product(algorithms, images, pins, sizes):
+        for num_lines in (lines[:1] if algorithm in _LINE_INDEPENDENT else lines):
+            cases.append({"algorithm": algorithm, "image": image, "pins": num_pins, "size": size, "lines": num_lines})
+    return cases
+
+
+def case_key(result):
+    return (result["algorithm"], result["image"], result["pins"], result["size"], result["lines"])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, results, threshold=0.1):
+    """
+    Compares wall times against a baseline report.
+
+    Returns:
+        tuple: ``(rows, regressions)``: a ``(key, baseline_s, current_s, ratio)`` row for
+               every case in both reports, and the number of cases slower than ``1 + threshold``.
+    """
+    base = {case_key(r): r for r in baseline["results"]}
+    rows, regressions = [], 0
+    for result in results:
+        old = base.get(case_key(result))
+        if old is None or not old["wall_s"]:
+            continue
+        ratio = result["wall_s"] / old["wall_s"]
+        regressions += ratio > 1 + threshold
+        rows.append((case_key(result), old["wall_s"], result["wall_s"], ratio))
+    return rows, regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m string_art_demo.benchmark",
+                                     description="Benchmark the string art algorithms over a parameter grid.")
+    parser.add_argument("--grid", choices=sorted(GRIDS), default="quick", help="Preset grid (default: quick).")
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(BENCH_ALGORITHMS), default=sorted(BENCH_ALGORITHMS))
+    parser.add_argument("--images", nargs="+", choices=["synthetic", "einstein"], default=["synthetic", "einstein"])
+    parser.add_argument("--pins", type=int, nargs="+", help="Override the grid's pin counts.")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Override the grid's image sizes.")
+    parser.add_argument("--lines", type=int, nargs="+", help="Override the grid's line counts.")
+    parser.add_argument("-o", "--output", help="Write the JSON report here.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Report to compare wall times against.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown counted as a regression (default: 0.1).")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip allocation tracing.")
+    parser.add_argument("--geometry-cache", action="store_true",
+                        help="Use the on-disk chord geometry cache (disabled by default so rasterization is measured).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    grid = GRIDS[args.grid]
+    cases = build_cases(args.algorithms, args.images, args.pins or grid["pins"],
+                        args.sizes or grid["sizes"], args.lines or grid["lines"])
+    if not args.geometry_cache:
+        os.environ["STRING_ART_CACHE_DIR"] = ""
+
+    results = []
+    for n, case in enumerate(cases, start=1):
+        # A fresh process per case keeps peak RSS and warm caches from leaking between cases.
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_case, case, not args.no_tracemalloc).result()
+        results.append(result)
+        print(f"[{n}/{len(cases)}] {result['algorithm']} {result['image']} pins={result['pins']} "
+              f"size={result['size']} lines={result['lines']}: {result['wall_s']:.2f}s, "
+              f"{result['step_ms_mean']:.2f} ms/step, {result['peak_rss_mb']:.0f} MB RSS", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(baseline, results, args.threshold)
+        for key, old, new, ratio in rows:
+            flag = "  REGRESSION" if ratio > 1 + args.threshold else ""
+            print(f"{' '.join(map(str, key))}: {old:.2f}s -> {new:.2f}s ({ratio:.2f}x){flag}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Headless batch runner: turns every image in a set of directories or globs into
+string art with one algorithm and writes a pin sequence, a binary plan and a rendered
+PNG per image.
+
+    python -m string_art_demo.cli photos/ -o out/ -a greedy_residual -p max_lines=3000
+
+Runs are resumable: images whose outputs already exist are skipped.
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .algorithms import ALGORITHMS
+from .algorithms.budget import MemoryBudgetError, parse_size
+from .algorithms.color import ColorAlgorithm
+from .algorithms.geometry import LINE_MODEL
+from .algorithms.geometry_cache import load_geometry
+from .algorithms.greedy import generate_pin_coords
+from .algorithms.plan import StringArtPlan
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Geometry of the pin layouts a worker process used last, so jobs sharing a layout
+# rasterize (or map from the disk cache) only once per process. Bounded, since the
+# service's workers live long and a large index with its pixel index takes hundreds of MB.
+_worker_geometry = OrderedDict()
+MAX_WORKER_GEOMETRIES = 4
+
+
+def algorithm_slug(name):
+    """
+    Returns the command-line name of an algorithm, e.g. "Greedy Residual" -> "greedy_residual".
+    """
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def resolve_algorithm(name):
+    """
+    Finds the ALGORITHMS entry for a display name or its slug.
+    """
+    for display_name in ALGORITHMS:
+        if name in (display_name, algorithm_slug(display_name)):
+            return display_name
+    choices = ", ".join(algorithm_slug(n) for n in ALGORITHMS)
+    raise argparse.ArgumentTypeError(f"unknown algorithm {name!r} (choose from {choices})")
+
+
+def parse_param(text):
+    """
+    Parses a KEY=VALUE parameter; values are Python literals, or strings otherwise.
+    """
+    key, sep, value = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    try:
+        return key, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return key, value
+
+
+def find_images(inputs):
+    """
+    Expands directories and glob patterns into a sorted list of image paths.
+    """
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        for path in glob.glob(pattern):
+            if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                paths.add(path)
+    return sorted(paths)
+
+
+def output_paths(image_path, output_dir):
+    """
+    Returns the (sequence JSON, rendered PNG, binary plan) paths for an input image.
+    """
+    stem = os.path.join(output_dir, os.path.splitext(os.path.basename(image_path))[0])
+    return stem + ".json", stem + ".png", stem + ".plan"
+
+
+def output_collisions(images):
+    """
+    Groups the images whose outputs would share a file name, such as ``a/x.jpg`` and
+    ``b/x.jpg`` or ``x.jpg`` and ``x.png``.
+
+    Returns:
+        dict: The shared name for each group of two or more images.
+    """
+    by_name = {}
+    for path in images:
+        by_name.setdefault(os.path.splitext(os.path.basename(path))[0], []).append(path)
+    return {name: paths for name, paths in by_name.items() if len(paths) > 1}
+
+
+def checkpoint_path(image_path, output_dir):
+    """
+    Returns the path of the checkpoint an unfinished run of an image leaves behind.
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(output_dir, stem + ".checkpoint.npz")
+
+
+def is_done(image_path, output_dir):
+    return all(os.path.exists(p) for p in output_paths(image_path, output_dir))
+
+
+def load_image(path, size, color=False):
+    """
+    Loads an image as a size x size grayscale (or RGB with ``color``) array, the same
+    way the app does.
+    """
+    img_array = np.array(Image.open(path).convert("RGB"))
+    if color:
+        return cv2.resize(img_array, (size, size))
+    gray_img = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray_img, (size, size))
+
+
+def _geometry_for(num_pins, image_shape, line_model):
+    key = (num_pins, image_shape, line_model)
+    if key in _worker_geometry:
+        _worker_geometry.move_to_end(key)
+    else:
+        _worker_geometry[key] = load_geometry(generate_pin_coords(num_pins, image_shape), image_shape,
+                                              line_model=line_model)
+        while len(_worker_geometry) > MAX_WORKER_GEOMETRIES:
+            _worker_geometry.popitem(last=False)
+    return _worker_geometry[key]
+
+
+def _dump_json(record, path):
+    with open(path, "w") as f:
+        json.dump(record, f)
+
+
+def _write_atomic(path, write):
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def process_image(image_path, output_dir, algorithm_name, num_pins, size, params, palette=None,
+                  checkpoint_interval=None):
+    """
+    Runs one image and writes its outputs. The JSON sequence is written last, so an
+    image only counts as done once all files are complete.
+
+    With ``checkpoint_interval`` (seconds), grayscale runs save their state next to the
+    outputs and an interrupted run continues from its checkpoint.
+
+    Returns:
+        tuple: ``(image_path, error_message or None, seconds)``.
+    """
+    start = time.perf_counter()
+    try:
+        target_image = load_image(image_path, size, color=bool(palette))
+        image_shape = target_image.shape[:2]
+        algorithm = ALGORITHMS[algorithm_name]()
+        run_options = {}
+        # A pruned run builds its own index for this image; the full layout would go unused.
+        if not algorithm.prunes_chords(params):
+            run_options["geometry"] = _geometry_for(num_pins, image_shape, params.get("line_model", LINE_MODEL))
+        if palette:
+            # Channels run one after another; the images are already spread over the cores.
+            algorithm = ColorAlgorithm(algorithm, palette=palette, num_workers=1)
+        checkpoint = checkpoint_path(image_path, output_dir)
+        if checkpoint_interval is not None and not palette:
+            run_options.update(checkpoint=checkpoint, checkpoint_interval_s=checkpoint_interval)
+            if os.path.exists(checkpoint):
+                run_options["resume_from"] = checkpoint
+        generator = algorithm.run(
+            target_image=target_image,
+            pin_coords=generate_pin_coords(num_pins, image_shape),
+            final_only=True,
+            **run_options,
+            **params
+        )
+
+        sequence, canvas, plan = [], None, None
+        for result in generator:
+            if result.get("error"):
+                raise RuntimeError(result["status"])
+            if "chord" in result:
+                sequence.append(tuple(int(p) for p in result["chord"]))
+            if "sequence" in result:
+                sequence = [tuple(int(p) for p in chord) for chord in result["sequence"]]
+            if "canvas" in result:
+                canvas = result["canvas"]
+            if "plan" in result:
+                plan, colors = result["plan"], result["palette"]
+        if canvas is None:
+            raise RuntimeError("the algorithm produced no canvas")
+
+        json_path, png_path, plan_path = output_paths(image_path, output_dir)
+        _write_atomic(png_path, lambda p: Image.fromarray(canvas).save(p, format="PNG"))
+        plan_options = {
+            "line_darkness": params.get("line_darkness", 25),
+            "line_model": params.get("line_model", LINE_MODEL),
+            "algorithm": algorithm_name,
+            "params": params,
+        }
+        if plan is not None:
+            string_art_plan = StringArtPlan.from_color_plan(plan, colors, num_pins, image_shape, **plan_options)
+        else:
+            string_art_plan = StringArtPlan.from_sequence(sequence, num_pins, image_shape, **plan_options)
+        _write_atomic(plan_path, string_art_plan.save)
+        record = {
+            "image": image_path,
+            "algorithm": algorithm_name,
+            "num_pins": num_pins,
+            "image_size": size,
+            "params": params,
+            "pins": [sequence[0][0]] + [v for _, v in sequence] if sequence else [],
+        }
+        if plan is not None:
+            record["palette"] = colors
+            record["plan"] = [list(step) for step in plan]
+        _write_atomic(json_path, lambda p: _dump_json(record, p))
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+    except Exception as e:
+        return image_path, f"{type(e).__name__}: {e}", time.perf_counter() - start
+    return image_path, None, time.perf_counter() - start
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m string_art_demo.cli",
+        description="Generate string art for every image in directories or glob patterns.",
+    )
+    parser.add_argument("inputs", nargs="+", help="Image directories or glob patterns.")
+    parser.add_argument("-o", "--output", required=True, help="Directory for sequences and renders.")
+    parser.add_argument("-a", "--algorithm", type=resolve_algorithm, default="Greedy Residual",
+                        help="Algorithm name or slug (default: greedy_residual).")
+    parser.add_argument("-p", "--param", type=parse_param, action="append", default=[], metavar="KEY=VALUE",
+                        help="Algorithm parameter, e.g. -p max_lines=2000. May be repeated.")
+    parser.add_argument("--pins", type=int, default=150, help="Number of pins (default: 150).")
+    parser.add_argument("--size", type=int, default=300, help="Square image size in pixels (default: 300).")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: all cores).")
+    parser.add_argument("--palette", help="Coloured threads: cmyk, cmy or comma-separated #rrggbb colours.")
+    parser.add_argument("--checkpoint-interval", type=float, metavar="SECONDS",
+                        help="Save each grayscale run's state every SECONDS, and resume interrupted "
+                             "images from it.")
+    parser.add_argument("--memory-budget", type=parse_size, metavar="SIZE",
+                        help="Memory a single run may use, e.g. 2G. Fails before any work with an "
+                             "estimate if the run would need more.")
+    parser.add_argument("--overwrite", action="store_true", help="Re-run images that already have outputs.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    params = dict(args.param)
+    if args.memory_budget is not None:
+        params["memory_budget"] = args.memory_budget
+    os.makedirs(args.output, exist_ok=True)
+
+    images = find_images(args.inputs)
+    collisions = output_collisions(images)
+    if collisions:
+        for name, paths in collisions.items():
+            print(f"error: {', '.join(paths)} would all write {name}.*; rename or run them separately",
+                  file=sys.stderr)
+        return 1
+    todo = [p for p in images if args.overwrite or not is_done(p, args.output)]
+    print(f"{len(images)} images, {len(images) - len(todo)} already done, {len(todo)} to run", file=sys.stderr)
+    if not todo:
+        return 0
+
+    # Rasterize the shared pin layout once up front, unless the runs prune it per image;
+    # workers then map it from the disk cache.
+    image_shape = (args.size, args.size)
+    pin_coords = generate_pin_coords(args.pins, image_shape)
+    algorithm = ALGORITHMS[args.algorithm]()
+    try:
+        algorithm.check_memory_budget(image_shape, pin_coords, params)
+    except MemoryBudgetError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    if not algorithm.prunes_chords(params):
+        load_geometry(pin_coords, image_shape, line_model=params.get("line_model", LINE_MODEL))
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(process_image, path, args.output, args.algorithm, args.pins, args.size, params,
+                               args.palette, args.checkpoint_interval)
+                   for path in todo]
+        for n, future in enumerate(as_completed(futures), start=1):
+            path, error, seconds = future.result()
+            if error:
+                failures += 1
+                print(f"[{n}/{len(todo)}] {path}: FAILED ({error})", file=sys.stderr)
+            else:
+                print(f"[{n}/{len(todo)}] {path}: done in {seconds:.1f}s", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+"""
+Local HTTP job service: runs string art jobs on a bounded process pool and streams
+their progress as server-sent events.
+
+    python -m string_art_demo.service --port 8765 --workers 2
+
+    POST   /jobs              queue a job (see ``ServiceClient``), returns {"id": ...}
+    GET    /jobs              all known jobs
+    GET    /jobs/<id>         state, status and progress of a job
+    GET    /jobs/<id>/events  server-sent events until the job ends
+    DELETE /jobs/<id>         cancel a queued or running job
+
+Jobs live in the service process, so a client can disconnect (or a browser page be
+refreshed) and reattach to the event stream later.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from .algorithms import ALGORITHMS
+from .algorithms.color import ColorAlgorithm
+from .algorithms.geometry import LINE_MODEL
+from .algorithms.greedy import generate_pin_coords
+from .algorithms.multiresolution import MultiResolutionAlgorithm
+from .cli import _geometry_for, load_image, resolve_algorithm
+from .service_client import TERMINAL_STATES, encode_value
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Seconds between a worker's cancellation checks and between forwarded delta progress updates.
+_POLL_INTERVAL = 0.2
+
+# Events buffered per event stream subscriber; slow readers lose the oldest progress.
+_SUBSCRIBER_BUFFER = 64
+
+
+def build_algorithm(name, refine=None, palette=None):
+    """
+    Instantiates an ``ALGORITHMS`` entry, optionally wrapped for coarse-to-fine
+    refinement and coloured threads.
+    """
+    algorithm = ALGORITHMS[resolve_algorithm(name)]()
+    if refine:
+        algorithm = MultiResolutionAlgorithm(algorithm, refine=refine)
+    if palette:
+        algorithm = ColorAlgorithm(algorithm, palette=palette)
+    return algorithm
+
+
+def _run_job(job_id, request, messages, cancelled):
+    """
+    Runs one job in a worker process, posting ``(job_id, kind, data)`` messages.
+
+    Full frames are forwarded one behind, so that the last one can go out as the
+    ``done`` message together with the collected sequence.
+    """
+    messages.put((job_id, "state", {"state": "running"}))
+    try:
+        palette = request.get("palette")
+        size = int(request.get("size", 300))
+        target_image = load_image(io.BytesIO(base64.b64decode(request["image"])), size, color=bool(palette))
+        image_shape = target_image.shape[:2]
+        num_pins = int(request.get("num_pins", 150))
+        pin_coords = generate_pin_coords(num_pins, image_shape)
+        params = dict(request.get("params") or {})
+        # Check a memory budget before the shared geometry is built for the run.
+        base_algorithm = ALGORITHMS[resolve_algorithm(request["algorithm"])]()
+        base_algorithm.check_memory_budget(image_shape, pin_coords, params)
+        if not base_algorithm.prunes_chords(params):
+            params["geometry"] = _geometry_for(num_pins, image_shape, params.get("line_model", LINE_MODEL))
+        algorithm = build_algorithm(request["algorithm"], request.get("refine"), palette)
+        generator = algorithm.run(target_image, pin_coords, **params)
+
+        sequence, plan, pending = [], None, None
+        last_poll = time.perf_counter()
+        for event in generator:
+            now = time.perf_counter()
+            poll = now - last_poll >= _POLL_INTERVAL
+            if poll:
+                last_poll = now
+                if job_id in cancelled:
+                    generator.close()
+                    messages.put((job_id, "cancelled", {"status": "Cancelled."}))
+                    return
+            if event.get("error"):
+                messages.put((job_id, "failed", encode_value(event)))
+                return
+            if "chord" in event:
+                sequence.append(tuple(int(p) for p in event["chord"]))
+            if "sequence" in event:
+                sequence = [tuple(int(p) for p in line) for line in event["sequence"]]
+            if "plan" in event:
+                plan = event["plan"]
+            if event.get("event") == "delta":
+                if poll and "line_num" in event:
+                    messages.put((job_id, "progress", encode_value(
+                        {k: event[k] for k in ("line_num", "progress") if k in event})))
+                continue
+            if pending is not None:
+                messages.put((job_id, "progress", encode_value(pending)))
+            pending = event
+
+        done = dict(pending or {})
+        done["sequence"] = sequence
+        if plan is not None:
+            done["plan"] = plan
+        messages.put((job_id, "done", encode_value(done)))
+    except Exception as e:
+        messages.put((job_id, "failed", {"status": f"{type(e).__name__}: {e}", "error": True}))
+
+
+class Job:
+    """
+    A submitted job and what the service knows about its progress.
+    """
+
+    def __init__(self, job_id, request):
+        self.id = job_id
+        self.request = request
+        self.state = "queued"
+        self.status = "Queued"
+        self.progress = 0.0
+        self.future = None
+        self.frame = None        # The latest progress event with a canvas.
+        self.terminal = None     # (kind, data) once the job has ended.
+        self.subscribers = set()
+
+    def summary(self):
+        return {"id": self.id, "state": self.state, "status": self.status, "progress": self.progress,
+                "algorithm": self.request.get("algorithm")}
+
+
+class JobService:
+    """
+    Owns the worker pool and the jobs, and serves the HTTP API on an asyncio loop.
+
+    Workers post their messages to one manager queue; a reader thread hands them to
+    the loop, which updates the job and fans the event out to its subscribers.
+    """
+
+    def __init__(self, workers=None, max_queued=32, max_finished=64):
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self._loop = None
+        self._server = None
+        # Spawned workers: the service process already runs threads, which do not mix with fork.
+        self._context = multiprocessing.get_context("spawn")
+        self._manager = self._context.Manager()
+        self._messages = self._manager.Queue()
+        self._cancelled = self._manager.dict()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context)
+        self._reader = None
+
+    # --- Jobs ---
+
+    def submit(self, request):
+        """
+        Queues a job.
+
+        Raises:
+            ValueError: For an unknown algorithm, a request without an image, or a
+                print-size request that the algorithm only solves with a memory budget.
+            OverflowError: When ``max_queued`` jobs are already waiting or running.
+        """
+        algorithm = ALGORITHMS[resolve_algorithm(request.get("algorithm", ""))]()
+        if "image" not in request:
+            raise ValueError("the request has no image")
+        size = int(request.get("size", 300))
+        algorithm.require_memory_budget((size, size), request.get("params") or {})
+        active = sum(job.state in ("queued", "running") for job in self.jobs.values())
+        if active >= self.max_queued:
+            raise OverflowError("too many queued jobs")
+        job = Job(uuid.uuid4().hex[:12], request)
+        self.jobs[job.id] = job
+        self._start(job)
+        self._prune()
+        return job
+
+    def _start(self, job):
+        """
+        Hands a job to the pool, replacing the pool first if a worker died and broke it.
+        """
+        try:
+            job.future = self._pool.submit(_run_job, job.id, job.request, self._messages, self._cancelled)
+        except BrokenProcessPool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context)
+            job.future = self._pool.submit(_run_job, job.id, job.request, self._messages, self._cancelled)
+        job.future.add_done_callback(partial(self._job_ended, job.id))
+
+    def _job_ended(self, job_id, future):
+        """
+        Done callback of a job's future, called on a pool thread. Posts an ``ended``
+        message behind the worker's own messages, so that a job whose worker died
+        without a final message, e.g. killed for running out of memory, still ends.
+        """
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            data = {"status": "The job ended without a result.", "error": True}
+        else:
+            data = {"status": f"The worker stopped: {error}", "error": True,
+                    "broken": isinstance(error, BrokenProcessPool)}
+        try:
+            self._messages.put((job_id, "ended", data))
+        except (OSError, EOFError):
+            pass  # The service is shutting down.
+
+    def cancel(self, job_id):
+        """
+        Cancels a job: a queued job never starts, a running one stops at its worker's
+        next check.
+        """
+        job = self.jobs[job_id]
+        if job.state in TERMINAL_STATES:
+            return job
+        if job.future.cancel():
+            self._finish(job, "cancelled", {"status": "Cancelled."})
+        else:
+            self._cancelled[job_id] = True
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.state in TERMINAL_STATES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def _dispatch(self, job_id, kind, data):
+        job = self.jobs.get(job_id)
+        if job is None or job.state in TERMINAL_STATES:
+            return
+        if kind == "state":
+            job.state = data["state"]
+            job.status = data["state"].capitalize()
+            self._publish(job, kind, data)
+        elif kind == "progress":
+            job.progress = data.get("progress", job.progress)
+            job.status = data.get("status", job.status)
+            if "canvas" in data:
+                job.frame = data
+            self._publish(job, kind, data)
+        elif kind == "ended":
+            # The job's worker is gone. A job that never started only lost its pool.
+            if data.pop("broken", False) and job.state == "queued":
+                self._start(job)
+            else:
+                self._finish(job, "failed", data)
+        else:
+            self._finish(job, kind, data)
+
+    def _finish(self, job, kind, data):
+        job.state = kind
+        job.status = data.get("status", kind.capitalize())
+        if kind == "done":
+            job.progress = 1.0
+        job.terminal = (kind, data)
+        self._cancelled.pop(job.id, None)
+        self._publish(job, kind, data)
+
+    def _publish(self, job, kind, data):
+        for queue in job.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((kind, data))
+
+    def _read_messages(self):
+        while True:
+            message = self._messages.get()
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, *message)
+
+    # --- HTTP ---
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode()
+            if not request_line.strip():
+                return
+            method, target = request_line.split()[:2]
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode()
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+            await self._route(method, target.split("?")[0].rstrip("/"), body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body, writer):
+        parts = [p for p in path.split("/") if p]
+        if method == "GET" and parts == ["health"]:
+            return self._respond(writer, 200, {"ok": True, "workers": self.workers})
+        if parts == ["jobs"] and method == "POST":
+            try:
+                job = self.submit(json.loads(body))
+            except OverflowError as e:
+                return self._respond(writer, 503, {"error": str(e)})
+            except Exception as e:
+                return self._respond(writer, 400, {"error": str(e)})
+            return self._respond(writer, 201, job.summary())
+        if parts == ["jobs"] and method == "GET":
+            return self._respond(writer, 200, [job.summary() for job in self.jobs.values()])
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return self._respond(writer, 404, {"error": "unknown job"})
+            if len(parts) == 3 and parts[2] == "events" and method == "GET":
+                return await self._stream(job, writer)
+            if len(parts) == 2 and method == "GET":
+                return self._respond(writer, 200, job.summary())
+            if len(parts) == 2 and method == "DELETE":
+                return self._respond(writer, 200, self.cancel(job.id).summary())
+        return self._respond(writer, 404, {"error": "not found"})
+
+    def _respond(self, writer, code, payload):
+        body = json.dumps(payload).encode()
+        reason = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+                  503: "Service Unavailable"}[code]
+        writer.write(f"HTTP/1.1 {code} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+
+    async def _stream(self, job, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        queue = asyncio.Queue(maxsize=_SUBSCRIBER_BUFFER)
+        # Catch up: the current state and latest frame first, then live events.
+        backlog = [("state", {"state": job.state})]
+        if job.frame is not None:
+            backlog.append(("progress", job.frame))
+        if job.terminal is not None:
+            backlog.append(job.terminal)
+        else:
+            job.subscribers.add(queue)
+        for event in backlog:
+            queue.put_nowait(event)
+        try:
+            while True:
+                kind, data = await queue.get()
+                writer.write(f"event: {kind}\ndata: {json.dumps(data)}\n\n".encode())
+                await writer.drain()
+                if kind in TERMINAL_STATES:
+                    break
+        finally:
+            job.subscribers.discard(queue)
+
+    # --- Lifecycle ---
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening; returns the asyncio server.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._reader = threading.Thread(target=self._read_messages, daemon=True)
+        self._reader.start()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    def start_in_thread(self, host=DEFAULT_HOST, port=0):
+        """
+        Runs the service on its own event loop thread, e.g. for tests.
+
+        Returns:
+            str: The base URL, with the actual port when ``port`` is 0.
+        """
+        started = threading.Event()
+        address = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            server = loop.run_until_complete(self.serve(host, port))
+            address["port"] = server.sockets[0].getsockname()[1]
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        started.wait()
+        return f"http://{host}:{address['port']}"
+
+    def shutdown(self):
+        """
+        Cancels every job and stops the workers and the message reader.
+        """
+        for job_id in list(self.jobs):
+            self._cancelled[job_id] = True
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._messages.put(None)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._manager.shutdown()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m string_art_demo.service",
+                                     description="Run the string art job service.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Interface to bind (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT}).")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: half the cores).")
+    parser.add_argument("--max-queued", type=int, default=32, help="Jobs queued or running at most (default: 32).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    service = JobService(workers=args.workers, max_queued=args.max_queued)
+
+    async def run():
+        server = await service.serve(args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port} with {service.workers} workers", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
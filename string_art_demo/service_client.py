@@ -0,0 +1,146 @@
+"""
+Client of the string art job service (``python -m string_art_demo.service``) and the
+JSON encoding of the progress dicts it streams.
+
+Only depends on the standard library, numpy and Pillow, so the Streamlit app can
+import it as a plain module.
+"""
+import base64
+import io
+import json
+import os
+import urllib.error
+import urllib.request
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_URL = os.environ.get("STRING_ART_SERVICE_URL", "http://127.0.0.1:8765")
+
+# Job states after which no more events follow.
+TERMINAL_STATES = ("done", "failed", "cancelled")
+
+
+def encode_value(value):
+    """
+    Makes an event value JSON-serializable. uint8 images become base64 PNGs, other
+    arrays and numpy scalars plain lists and numbers.
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype == np.uint8 and value.ndim in (2, 3):
+            buffer = io.BytesIO()
+            Image.fromarray(value).save(buffer, format="PNG")
+            return {"__png__": base64.b64encode(buffer.getvalue()).decode("ascii")}
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(k): encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    return value
+
+
+def decode_value(value):
+    """
+    Reverses ``encode_value`` for images; lists stay lists.
+    """
+    if isinstance(value, dict):
+        if set(value) == {"__png__"}:
+            return np.array(Image.open(io.BytesIO(base64.b64decode(value["__png__"]))))
+        return {k: decode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    return value
+
+
+class ServiceError(RuntimeError):
+    """
+    An error response of the job service.
+    """
+
+
+class ServiceClient:
+    """
+    Submits jobs to the job service, follows their progress and cancels them.
+
+    A job request is a dict with ``algorithm`` (display name or slug), ``image``
+    (the image file's bytes), and optionally ``size``, ``num_pins``, ``params``
+    (algorithm keyword arguments, including the frame emission options), ``refine``
+    (coarse-to-fine refinement) and ``palette`` (coloured threads).
+    """
+
+    def __init__(self, url=DEFAULT_URL, timeout=10):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            raise ServiceError(f"{e.code}: {e.read().decode(errors='replace')}") from None
+
+    def is_alive(self):
+        """
+        Returns whether the service answers.
+        """
+        try:
+            self._request("GET", "/health")
+            return True
+        except (OSError, ServiceError):
+            return False
+
+    def submit(self, request):
+        """
+        Queues a job and returns its id.
+        """
+        body = dict(request)
+        body["image"] = base64.b64encode(body["image"]).decode("ascii")
+        return self._request("POST", "/jobs", encode_value(body))["id"]
+
+    def status(self, job_id):
+        """
+        Returns the job's ``state``, latest ``status`` and ``progress``.
+        """
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued or running job.
+        """
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def events(self, job_id):
+        """
+        Follows a job's server-sent events until it ends. A client that connects late
+        first receives the latest frame, so reconnecting after a page refresh resumes
+        the display.
+
+        Yields:
+            tuple: ``(kind, data)``: ``"state"`` with the new ``state``, ``"progress"``
+                   with a decoded progress dict of the algorithm, or a terminal
+                   ``"done"`` (with ``sequence``, and ``plan`` for colour runs),
+                   ``"failed"`` or ``"cancelled"``.
+        """
+        request = urllib.request.Request(f"{self.url}/jobs/{job_id}/events")
+        try:
+            response = urllib.request.urlopen(request)
+        except urllib.error.HTTPError as e:
+            raise ServiceError(f"{e.code}: {e.read().decode(errors='replace')}") from None
+        with response:
+            kind, data = "message", []
+            for raw in response:
+                line = raw.decode().rstrip("\r\n")
+                if line.startswith("event:"):
+                    kind = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    yield kind, decode_value(json.loads("\n".join(data)))
+                    if kind in TERMINAL_STATES:
+                        return
+                    kind, data = "message", []
@@ -0,0 +1,16 @@
+import os
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_geometry_cache(tmp_path_factory):
+    """
+    Points the on-disk chord geometry cache at a temporary directory for the test session.
+    """
+    previous = os.environ.get("STRING_ART_CACHE_DIR")
+    os.environ["STRING_ART_CACHE_DIR"] = str(tmp_path_factory.mktemp("geometry_cache"))
+    yield
+    if previous is None:
+        del os.environ["STRING_ART_CACHE_DIR"]
+    else:
+        os.environ["STRING_ART_CACHE_DIR"] = previous
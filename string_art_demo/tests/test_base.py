@@ -0,0 +1,72 @@
+from string_art_demo.algorithms import base
+from string_art_demo.algorithms.base import EmissionPolicy, delta_event
+
+
+def test_emission_policy_every_n_and_final_only():
+    """
+    Tests step-count based emission and the final-only mode.
+    """
+    policy = EmissionPolicy(every_n=3)
+    assert [step for step in range(1, 10) if policy.due(step)] == [3, 6, 9]
+
+    final_only = EmissionPolicy(final_only=True)
+    assert not any(final_only.due(step) for step in range(1, 10))
+    assert final_only.due(10, final=True)
+
+
+def test_emission_policy_every_ms(monkeypatch):
+    """
+    Tests that time based emission skips frames within the interval.
+    """
+    clock = iter([0.0, 0.05, 0.12, 0.15, 0.3])
+    monkeypatch.setattr(base.time, "perf_counter", lambda: next(clock))
+    policy = EmissionPolicy(every_ms=100)
+    assert [policy.due(step) for step in range(1, 6)] == [True, False, True, False, True]
+
+
+def test_delta_event_carries_only_the_chord():
+    """
+    Tests the shape of the lightweight delta event.
+    """
+    assert delta_event(4, (1, 7)) == {"event": "delta", "line_num": 4, "chord": (1, 7)}
+    assert delta_event(4, (1, 7), 0.5)["progress"] == 0.5
+
+
+def test_profiler_phases_counters_and_wrap():
+    """
+    Tests phase timing, counters and timing of a wrapped sub-generator.
+    """
+    profiler = base.Profiler()
+    with profiler.phase("work"):
+        pass
+    profiler.count("items", 3)
+    profiler.count("items")
+
+    def solver():
+        yield {"step": 1}
+        return "solution"
+
+    def consumer():
+        result = yield from profiler.wrap(solver(), "solve")
+        yield {"result": result}
+
+    assert list(consumer()) == [{"step": 1}, {"result": "solution"}]
+    snapshot = profiler.snapshot()
+    assert set(snapshot["phases"]) == {"work", "solve"}
+    assert snapshot["counters"] == {"items": 4}
+
+    event = profiler.attach({}, final=True)
+    assert event["profile_summary"]["total_s"] >= sum(snapshot["phases"].values())
+
+
+def test_null_profiler_leaves_events_untouched():
+    """
+    Tests that the disabled profiler adds nothing.
+    """
+    profiler = base.BaseStringArtAlgorithm.profiler(None, {})
+    assert profiler is base.NULL_PROFILER
+    gen = iter([1, 2])
+    assert profiler.wrap(gen, "x") is gen
+    with profiler.phase("x"):
+        profiler.count("y")
+    assert profiler.attach({"a": 1}, final=True) == {"a": 1}
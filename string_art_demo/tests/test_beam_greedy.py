@@ -0,0 +1,89 @@
+import numpy as np
+from string_art_demo.algorithms.beam_greedy import BeamGreedyAlgorithm
+from string_art_demo.algorithms.greedy import GreedyAlgorithm, generate_pin_coords
+from string_art_demo.algorithms.geometry import ChordGeometry
+
+
+def _target(size=60):
+    target = np.full((size, size), 255, dtype=np.uint8)
+    target[size // 4:3 * size // 4, size // 3:2 * size // 3] = 0
+    target[size // 2, :] = 40
+    return target
+
+
+def _squared_error(target, sequence, geometry, line_darkness):
+    canvas = np.zeros(target.shape, dtype=np.int64)
+    for u, v in sequence:
+        geometry.draw(canvas, geometry.chord_id(u, v), line_darkness)
+    return int(np.sum((255 - target.astype(np.int64) - canvas) ** 2))
+
+
+def test_width_and_depth_one_match_greedy():
+    target = _target()
+    pin_coords = generate_pin_coords(24, target.shape)
+    geometry = ChordGeometry.from_pins(pin_coords, target.shape)
+
+    greedy = [r["chord"] for r in GreedyAlgorithm().run(target, pin_coords, max_lines=60, geometry=geometry)]
+    beam = [r["chord"] for r in BeamGreedyAlgorithm().run(target, pin_coords, max_lines=60, geometry=geometry,
+                                                           beam_width=1, beam_depth=1)]
+    assert beam == greedy
+
+
+def test_beam_search_yields_a_continuous_sequence():
+    target = _target()
+    pin_coords = generate_pin_coords(24, target.shape)
+    geometry = ChordGeometry.from_pins(pin_coords, target.shape)
+
+    results = list(BeamGreedyAlgorithm().run(target, pin_coords, max_lines=40, geometry=geometry,
+                                             beam_width=6, beam_depth=3))
+    sequence = [r["chord"] for r in results]
+    assert len(sequence) == 40
+    for (_, end), (start, _) in zip(sequence, sequence[1:]):
+        assert end == start
+    assert results[-1]["canvas"].shape == target.shape
+    # The incremental display canvas matches a canvas drawn from scratch.
+    expected = np.zeros(target.shape, dtype=np.int64)
+    for u, v in sequence:
+        geometry.draw(expected, geometry.chord_id(u, v), 25)
+    assert np.array_equal(results[-1]["canvas"], 255 - np.minimum(expected, 255))
+
+
+def test_lookahead_scores_match_the_true_error_reduction():
+    target = _target()
+    pin_coords = generate_pin_coords(24, target.shape)
+    geometry = ChordGeometry.from_pins(pin_coords, target.shape)
+    algo = BeamGreedyAlgorithm()
+    line_values = geometry.line_values(25).astype(np.int64)
+    scores = 2 * geometry.segment_sums((255 - target.astype(np.int64)).reshape(-1)[geometry.indices]
+                                       * line_values) - geometry.segment_sums(line_values ** 2)
+    chord_pins = (np.ascontiguousarray(geometry.chords[:, 0]), np.ascontiguousarray(geometry.chords[:, 1]))
+    empty = np.zeros(0, dtype=np.int64)
+
+    beams = [(0, [], empty, empty)]
+    for level in range(3):
+        beams, _ = algo._expand(beams, 0, geometry, scores, line_values, geometry.chord_of_entry(),
+                                chord_pins, 5, last=level == 2)
+
+    base_error = _squared_error(target, [], geometry, 25)
+    for gain, chords, _, _ in beams:
+        assert base_error - _squared_error(target, chords, geometry, 25) == gain
+
+
+def test_beam_search_continues_an_earlier_run():
+    # A shorter run of this target ends differently from the first lines of a longer one.
+    yy, xx = np.mgrid[:60, :60] / 60
+    target = (255 * np.clip(np.hypot(yy - 0.5, xx - 0.45) * 2.3, 0, 1)).astype(np.uint8)
+    pin_coords = generate_pin_coords(24, target.shape)
+    geometry = ChordGeometry.from_pins(pin_coords, target.shape)
+    options = dict(geometry=geometry, beam_width=4, beam_depth=3)
+
+    full = [r["chord"] for r in BeamGreedyAlgorithm().run(target, pin_coords, max_lines=30, **options)]
+    short = [r["chord"] for r in BeamGreedyAlgorithm().run(target, pin_coords, max_lines=20, **options)]
+    continued = list(BeamGreedyAlgorithm().run(target, pin_coords, max_lines=30, initial_sequence=short, **options))
+
+    assert short != full[:20]
+    # The last beam_depth - 1 lines of the shorter run looked ahead less far and are redone.
+    assert continued[0]["sequence"] == short[:18]
+    assert short[:18] + [r["chord"] for r in continued[1:]] == full
+    shorter = list(BeamGreedyAlgorithm().run(target, pin_coords, max_lines=20, initial_sequence=full, **options))
+    assert full[:18] + [r["chord"] for r in shorter[1:]] == short
@@ -0,0 +1,40 @@
+import pytest
+from string_art_demo import benchmark
+
+
+@pytest.mark.parametrize("algorithm", sorted(benchmark.BENCH_ALGORITHMS))
+def test_run_case_records_measurements(algorithm):
+    """
+    Tests that a tiny case runs in-process and reports every measurement.
+    """
+    case = {"algorithm": algorithm, "image": "synthetic", "pins": 12, "size": 40, "lines": 20}
+    result = benchmark.run_case(case, trace_memory=True)
+
+    assert not result["failed"]
+    assert result["wall_s"] > 0
+    assert result["steps"] >= 1
+    assert result["peak_rss_mb"] > 0
+    assert result["peak_traced_mb"] > 0
+    assert result["final_error"] > 0
+
+
+def test_build_cases_skips_line_grid_for_line_independent_algorithms():
+    """
+    Tests that the grid is expanded per algorithm.
+    """
+    cases = benchmark.build_cases(["greedy", "continuous_relaxation"], ["synthetic"], [50], [100], [100, 1000])
+    assert [(c["algorithm"], c["lines"]) for c in cases] == [
+        ("greedy", 100), ("greedy", 1000), ("continuous_relaxation", 100)]
+
+
+def test_compare_flags_regressions():
+    """
+    Tests that slower cases beyond the threshold count as regressions.
+    """
+    case = {"algorithm": "greedy", "image": "synthetic", "pins": 50, "size": 100, "lines": 100}
+    baseline = {"results": [{**case, "wall_s": 1.0}]}
+    rows, regressions = benchmark.compare(baseline, [{**case, "wall_s": 1.5}], threshold=0.1)
+    assert rows[0][3] == pytest.approx(1.5)
+    assert regressions == 1
+    _, regressions = benchmark.compare(baseline, [{**case, "wall_s": 1.05}], threshold=0.1)
+    assert regressions == 0
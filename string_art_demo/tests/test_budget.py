@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from PIL import Image
+from string_art_demo import cli
+from string_art_demo.algorithms import base
+from string_art_demo.algorithms.budget import MemoryBudgetError, estimate_entries, parse_size
+from string_art_demo.algorithms.continuous_relaxation import ContinuousRelaxationAlgorithm
+from string_art_demo.algorithms.geometry import ChordGeometry
+from string_art_demo.algorithms.greedy import GreedyAlgorithm, generate_pin_coords, residual_array, subtract_line
+
+
+def _target(size=48):
+    yy, xx = np.mgrid[:size, :size] / size
+    return (255 * np.clip(np.hypot(yy - 0.5, xx - 0.45) * 2.3, 0, 1)).astype(np.uint8)
+
+
+def test_parse_size():
+    assert parse_size(1000) == 1000
+    assert parse_size("512M") == 512 << 20
+    assert parse_size("1.5GB") == 3 << 29
+    assert parse_size("2 GiB") == 2 << 30
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+@pytest.mark.parametrize("line_model, tolerance", [("skimage_line", 0), ("antialiased", 0.1), ("thread:2", 0.1)])
+def test_entry_estimate_matches_the_index(line_model, tolerance):
+    image_shape = (80, 80)
+    pin_coords = generate_pin_coords(40, image_shape)
+    entries = len(ChordGeometry.from_pins(pin_coords, image_shape, line_model=line_model).indices)
+    assert estimate_entries(pin_coords, image_shape, line_model=line_model) == pytest.approx(entries, rel=tolerance)
+
+
+def test_blocked_rasterization_matches_a_single_block():
+    image_shape = (50, 50)
+    pin_coords = generate_pin_coords(24, image_shape)
+    # The thread model covers more pixels than the aliased lengths the buffers start from.
+    whole = ChordGeometry.from_pins(pin_coords, image_shape, line_model="thread:2", block_size=10 ** 6)
+    blocked = ChordGeometry.from_pins(pin_coords, image_shape, line_model="thread:2", block_size=7)
+
+    assert np.array_equal(blocked.indptr, whole.indptr)
+    assert np.array_equal(blocked.indices, whole.indices)
+    assert np.array_equal(blocked.weights, whole.weights)
+
+
+def test_weighted_sums_in_blocks():
+    image_shape = (40, 40)
+    geometry = ChordGeometry.from_pins(generate_pin_coords(20, image_shape), image_shape, line_model="antialiased")
+    values = geometry.line_values(60, dtype=np.uint8)
+    per_pixel = np.random.default_rng(3).integers(-300, 300, geometry.num_pixels).astype(np.int16)
+
+    expected = geometry.segment_sums(values.astype(np.int64) * per_pixel[geometry.indices])
+    assert np.array_equal(geometry.weighted_sums(values, per_pixel, block_entries=50), expected)
+    assert np.array_equal(geometry.weighted_sums(values, block_entries=50),
+                          geometry.segment_sums(values.astype(np.int64) ** 2))
+
+
+def test_residual_is_promoted_before_it_overflows():
+    residual = residual_array(np.zeros(4, dtype=np.uint8), np.array([0, 30000, 0, 0], dtype=np.uint16))
+    assert residual.dtype == np.int16
+    idx = np.array([1, 2])
+    for _ in range(12):
+        residual = subtract_line(residual, idx, np.array([255, 255], dtype=np.uint8))
+    assert residual.dtype == np.int32
+    assert residual.tolist() == [0, -30000 - 12 * 255, -12 * 255, 0]
+
+
+def test_budget_fails_before_the_index_is_built(monkeypatch):
+    def unexpected(*args, **kwargs):
+        raise AssertionError("the chord index was built")
+    monkeypatch.setattr(base, "load_geometry", unexpected)
+    target = _target()
+
+    with pytest.raises(MemoryBudgetError, match="chord index"):
+        list(GreedyAlgorithm().run(target, generate_pin_coords(30, target.shape), memory_budget="100K"))
+    # Incremental scoring and the active set solver need more than their plain counterparts.
+    assert sum(GreedyAlgorithm().memory_estimate((48, 48), 30, 435, 10 ** 4, {"incremental": True}).values()) > \
+        sum(GreedyAlgorithm().memory_estimate((48, 48), 30, 435, 10 ** 4, {}).values())
+    with pytest.raises(MemoryBudgetError, match="dense matrix"):
+        ContinuousRelaxationAlgorithm().check_memory_budget((200, 200), generate_pin_coords(100, (200, 200)),
+                                                            {"memory_budget": "1G", "solver": "active_set"})
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_greedy_is_unchanged_within_the_budget(incremental):
+    target = _target()
+    pin_coords = generate_pin_coords(30, target.shape)
+    plain = list(GreedyAlgorithm().run(target, pin_coords, max_lines=40, incremental=incremental))
+    budgeted = list(GreedyAlgorithm().run(target, pin_coords, max_lines=40, incremental=incremental,
+                                          memory_budget="1G"))
+
+    assert [r["chord"] for r in budgeted] == [r["chord"] for r in plain]
+    assert np.array_equal(budgeted[-1]["residual"], plain[-1]["residual"])
+
+
+def test_cli_rejects_a_run_over_budget(tmp_path, capsys):
+    inputs, output = tmp_path / "in", tmp_path / "out"
+    inputs.mkdir()
+    Image.fromarray(_target(40)).save(inputs / "face.png")
+
+    assert cli.main([str(inputs), "-o", str(output), "--pins", "40", "--size", "40", "-j", "1",
+                     "--memory-budget", "64K"]) == 1
+    assert "exceeds the budget" in capsys.readouterr().err
+    assert not (output / "face.json").exists()
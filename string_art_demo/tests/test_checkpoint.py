@@ -0,0 +1,133 @@
+import random
+import numpy as np
+import pytest
+from string_art_demo.algorithms.beam_greedy import BeamGreedyAlgorithm
+from string_art_demo.algorithms.checkpoint import load_checkpoint, restore_rng, rng_state
+from string_art_demo.algorithms.continuous_relaxation import ContinuousRelaxationAlgorithm
+from string_art_demo.algorithms.greedy import GreedyAlgorithm, generate_pin_coords
+from string_art_demo.algorithms.simulated_annealing import SimulatedAnnealingAlgorithm
+
+
+def _target(size=48):
+    yy, xx = np.mgrid[:size, :size] / size
+    return (255 * np.clip(np.hypot(yy - 0.4, xx - 0.55) * 2.2, 0, 1)).astype(np.uint8)
+
+
+def _interrupt(generator, events):
+    """Consumes a number of events, then drops the generator like a killed process would."""
+    for _, _ in zip(range(events), generator):
+        pass
+    generator.close()
+
+
+def _chords(results):
+    sequence = []
+    for result in results:
+        if "sequence" in result:
+            sequence = [tuple(line) for line in result["sequence"]]
+        if "chord" in result:
+            sequence.append(tuple(result["chord"]))
+    return sequence
+
+
+def test_rng_state_round_trips():
+    rng = random.Random(11)
+    rng.random()
+    restored = restore_rng(rng_state(rng))
+    assert [restored.random() for _ in range(5)] == [rng.random() for _ in range(5)]
+
+
+@pytest.mark.parametrize("algorithm, options", [
+    (GreedyAlgorithm(), {"incremental": False}),
+    (GreedyAlgorithm(), {"incremental": True}),
+    (BeamGreedyAlgorithm(), {"beam_width": 3}),
+])
+def test_greedy_resumes_exactly(tmp_path, algorithm, options):
+    target = _target()
+    pin_coords = generate_pin_coords(20, target.shape)
+    path = str(tmp_path / "run.npz")
+    full = list(algorithm.run(target, pin_coords, max_lines=30, **options))
+
+    _interrupt(algorithm.run(target, pin_coords, max_lines=30, checkpoint=path, checkpoint_interval_s=0, **options), 12)
+    checkpoint = load_checkpoint(path)
+    assert len(checkpoint["sequence"]) == 12
+    assert checkpoint["current_pin"] == checkpoint["sequence"][-1][1]
+
+    resumed = list(algorithm.run(target, pin_coords, max_lines=30, resume_from=path, **options))
+
+    assert resumed[0]["line_num"] == 12
+    assert _chords(resumed) == _chords(full)
+    assert np.array_equal(resumed[-1]["canvas"], full[-1]["canvas"])
+    assert np.array_equal(resumed[-1]["residual"], full[-1]["residual"])
+
+
+def test_annealing_resumes_with_its_temperature_and_random_state(tmp_path):
+    target = _target()
+    pin_coords = generate_pin_coords(20, target.shape)
+    path = str(tmp_path / "anneal.npz")
+    options = dict(max_lines=25, cooling_rate=0.98, frame_every=1)
+
+    random.seed(7)
+    full = list(SimulatedAnnealingAlgorithm().run(target, pin_coords, **options))
+    random.seed(7)
+    _interrupt(SimulatedAnnealingAlgorithm().run(target, pin_coords, checkpoint=path, checkpoint_interval_s=0,
+                                                 **options), 200)
+    checkpoint = load_checkpoint(path)
+    assert checkpoint["iteration"] == 200
+    assert checkpoint["temp"] == pytest.approx(1000 * 0.98 ** 200)
+
+    random.seed(99)  # The resumed run must not depend on the global random state.
+    resumed = list(SimulatedAnnealingAlgorithm().run(target, pin_coords, resume_from=path, **options))
+
+    assert resumed[-1]["sequence"] == full[-1]["sequence"]
+    assert resumed[-1]["total_error"] == full[-1]["total_error"]
+    assert len(resumed) == len(full) - 200
+
+
+def test_batched_annealing_resumes_its_generator(tmp_path):
+    target = _target()
+    pin_coords = generate_pin_coords(20, target.shape)
+    path = str(tmp_path / "anneal.npz")
+    options = dict(max_lines=25, cooling_rate=0.98, frame_every=1, proposals_per_step=8, seed=3)
+    full = list(SimulatedAnnealingAlgorithm().run(target, pin_coords, **options))
+
+    _interrupt(SimulatedAnnealingAlgorithm().run(target, pin_coords, checkpoint=path, checkpoint_interval_s=0,
+                                                 **options), 150)
+    resumed = list(SimulatedAnnealingAlgorithm().run(target, pin_coords, resume_from=path, **options))
+
+    assert resumed[-1]["sequence"] == full[-1]["sequence"]
+    assert resumed[-1]["total_error"] == full[-1]["total_error"]
+    with pytest.raises(ValueError):
+        list(SimulatedAnnealingAlgorithm().run(target, pin_coords, resume_from=path, max_lines=25))
+
+
+def test_relaxation_resumes_the_solver_iterate(tmp_path):
+    target = _target(32)
+    pin_coords = generate_pin_coords(16, target.shape)
+    path = str(tmp_path / "relaxation.npz")
+    options = dict(max_iter=60, tol=0, final_only=True)
+    full = list(ContinuousRelaxationAlgorithm().run(target, pin_coords, **options))
+
+    # The first event precedes the solver; the next two are progress reports at iterations 10 and 20.
+    _interrupt(ContinuousRelaxationAlgorithm().run(target, pin_coords, checkpoint=path, checkpoint_interval_s=0,
+                                                   **options), 3)
+    assert load_checkpoint(path)["solver_iteration"] == 20
+
+    resumed = list(ContinuousRelaxationAlgorithm().run(target, pin_coords, resume_from=path, checkpoint=path,
+                                                       **options))
+
+    assert np.array_equal(resumed[-1]["path"], full[-1]["path"])
+    assert load_checkpoint(path)["stage"] == "solved"
+    solved = list(ContinuousRelaxationAlgorithm().run(target, pin_coords, resume_from=path, **options))
+    assert np.array_equal(solved[-1]["canvas"], full[-1]["canvas"])
+
+
+def test_resume_rejects_another_run(tmp_path):
+    target = _target()
+    path = str(tmp_path / "run.npz")
+    list(GreedyAlgorithm().run(target, generate_pin_coords(20, target.shape), max_lines=5, checkpoint=path))
+
+    with pytest.raises(ValueError):
+        list(GreedyAlgorithm().run(target, generate_pin_coords(24, target.shape), max_lines=5, resume_from=path))
+    with pytest.raises(ValueError):
+        list(BeamGreedyAlgorithm().run(target, generate_pin_coords(20, target.shape), max_lines=5, resume_from=path))
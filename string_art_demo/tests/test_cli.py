@@ -0,0 +1,127 @@
+import json
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from string_art_demo import cli
+from string_art_demo.algorithms.greedy import GreedyAlgorithm, generate_pin_coords
+
+
+def _write_images(directory, count):
+    yy, xx = np.mgrid[:64, :64]
+    for n in range(count):
+        Image.fromarray(((xx * (n + 1) + yy) % 256).astype(np.uint8)).save(directory / f"img{n}.png")
+
+
+def test_resolve_algorithm_accepts_name_or_slug():
+    """
+    Tests that algorithms can be named by display name or slug.
+    """
+    assert cli.resolve_algorithm("greedy_residual") == "Greedy Residual"
+    assert cli.resolve_algorithm("Simulated Annealing") == "Simulated Annealing"
+    assert cli.resolve_algorithm("continuous_relaxation_eulerization") == "Continuous Relaxation + Eulerization"
+    with pytest.raises(Exception):
+        cli.resolve_algorithm("nope")
+
+
+def test_parse_param_literals():
+    """
+    Tests that parameter values are parsed as Python literals where possible.
+    """
+    assert cli.parse_param("max_lines=20") == ("max_lines", 20)
+    assert cli.parse_param("incremental=True") == ("incremental", True)
+    assert cli.parse_param("solver=lsmr") == ("solver", "lsmr")
+
+
+def test_cli_writes_outputs_and_resumes(tmp_path, capsys):
+    """
+    Tests that a batch run writes a sequence and render per image and that a
+    second run skips the finished images.
+    """
+    inputs, output = tmp_path / "in", tmp_path / "out"
+    inputs.mkdir()
+    _write_images(inputs, 2)
+    argv = [str(inputs), "-o", str(output), "--pins", "12", "--size", "40", "-j", "1", "-p", "max_lines=15"]
+
+    assert cli.main(argv) == 0
+    for n in range(2):
+        record = json.loads((output / f"img{n}.json").read_text())
+        assert record["algorithm"] == "Greedy Residual"
+        assert len(record["pins"]) == 16
+        assert np.array(Image.open(output / f"img{n}.png")).shape == (40, 40)
+
+    os.remove(output / "img1.json")
+    capsys.readouterr()
+    assert cli.main(argv) == 0
+    assert "1 already done, 1 to run" in capsys.readouterr().err
+    assert (output / "img1.json").exists()
+
+
+def test_cli_continues_from_a_checkpoint(tmp_path):
+    """
+    Tests that an image with a checkpoint continues from it and that the checkpoint
+    is removed once the outputs are written.
+    """
+    inputs, output = tmp_path / "in", tmp_path / "out"
+    inputs.mkdir()
+    output.mkdir()
+    _write_images(inputs, 1)
+    image = cli.load_image(str(inputs / "img0.png"), 40)
+    checkpoint = cli.checkpoint_path(str(inputs / "img0.png"), str(output))
+    partial = GreedyAlgorithm().run(image, generate_pin_coords(12, image.shape), max_lines=8,
+                                    checkpoint=checkpoint, checkpoint_interval_s=0)
+    first_lines = [next(partial)["chord"] for _ in range(5)]
+    partial.close()
+
+    argv = [str(inputs), "-o", str(output), "--pins", "12", "--size", "40", "-j", "1", "-p", "max_lines=15",
+            "--checkpoint-interval", "60"]
+    assert cli.main(argv) == 0
+
+    record = json.loads((output / "img0.json").read_text())
+    assert len(record["pins"]) == 16
+    assert record["pins"][:6] == [first_lines[0][0]] + [v for _, v in first_lines]
+    assert not os.path.exists(checkpoint)
+
+
+def test_worker_geometry_cache_is_bounded(monkeypatch):
+    loads = []
+    monkeypatch.setattr(cli, "_worker_geometry", cli.OrderedDict())
+    monkeypatch.setattr(cli, "load_geometry", lambda pin_coords, image_shape, line_model: loads.append(
+        len(pin_coords)) or object())
+
+    first = cli._geometry_for(10, (20, 20), "skimage_line")
+    for num_pins in range(11, 11 + cli.MAX_WORKER_GEOMETRIES):
+        cli._geometry_for(num_pins, (20, 20), "skimage_line")
+        # The first layout stays the most recently used.
+        assert cli._geometry_for(10, (20, 20), "skimage_line") is first
+
+    assert len(cli._worker_geometry) == cli.MAX_WORKER_GEOMETRIES
+    assert (11, (20, 20), "skimage_line") not in cli._worker_geometry
+    assert loads == list(range(10, 11 + cli.MAX_WORKER_GEOMETRIES))
+
+
+def test_cli_refuses_images_with_the_same_output_name(tmp_path, capsys):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    for path in (tmp_path / "a" / "x.png", tmp_path / "b" / "x.jpg", tmp_path / "b" / "y.png"):
+        Image.fromarray(np.full((20, 20), 128, dtype=np.uint8)).save(path)
+    output = tmp_path / "out"
+
+    assert cli.main([str(tmp_path / "a"), str(tmp_path / "b"), "-o", str(output), "--size", "20", "-j", "1"]) == 1
+    assert "would all write x.*" in capsys.readouterr().err
+    assert not list(output.iterdir())
+
+
+@pytest.mark.parametrize("argv", [["-a", "radon_preselection_greedy"], ["-p", "candidate_chords=30"]])
+def test_pruned_runs_skip_the_full_layout_index(tmp_path, monkeypatch, argv):
+    def unexpected(*args, **kwargs):
+        raise AssertionError("the full layout index was loaded")
+    monkeypatch.setattr(cli, "_geometry_for", unexpected)
+    monkeypatch.setattr(cli, "load_geometry", unexpected)
+    inputs, output = tmp_path / "in", tmp_path / "out"
+    inputs.mkdir()
+    _write_images(inputs, 1)
+
+    assert cli.main([str(inputs), "-o", str(output), "--pins", "12", "--size", "40", "-j", "1",
+                     "-p", "max_lines=10", *argv]) == 0
+    assert (output / "img0.json").exists()
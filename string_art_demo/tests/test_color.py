@@ -0,0 +1,94 @@
+import json
+import multiprocessing
+import time
+import numpy as np
+import pytest
+from PIL import Image
+from string_art_demo import cli
+from string_art_demo.algorithms.color import ColorAlgorithm, PALETTES, decompose, interleave, parse_palette
+from string_art_demo.algorithms.greedy import GreedyAlgorithm, generate_pin_coords
+from string_art_demo.algorithms.simulated_annealing import SimulatedAnnealingAlgorithm
+
+
+def _color_image(size=48):
+    image = np.full((size, size, 3), 255, dtype=np.uint8)
+    image[:size // 2, :, 1] = 40     # magenta-ish red band on top
+    image[:size // 2, :, 2] = 40
+    image[size // 2:, :size // 2] = 60  # dark grey bottom left
+    return image
+
+
+def test_parse_palette():
+    assert parse_palette("cmyk") == PALETTES["cmyk"]
+    assert parse_palette("#FF0000, #000000") == {"#ff0000": (255, 0, 0), "#000000": (0, 0, 0)}
+    with pytest.raises(ValueError):
+        parse_palette("rainbow")
+
+
+def test_decompose_sends_greys_to_black():
+    amounts = decompose(_color_image(), list(PALETTES["cmyk"].values()))
+    cyan, magenta, yellow, black = np.moveaxis(amounts, 2, 0)
+    grey = (slice(30, 40), slice(5, 15))
+    assert black[grey].mean() > 0.6
+    assert max(cyan[grey].mean(), magenta[grey].mean(), yellow[grey].mean()) < 0.1
+    red = (slice(5, 15), slice(5, 40))
+    assert magenta[red].mean() > 0.6 and yellow[red].mean() > 0.6 and cyan[red].mean() < 0.1
+    assert np.allclose(amounts[-2:, -2:], 0, atol=0.02)
+
+
+def test_interleave_spreads_colours_over_the_plan():
+    plan = interleave([[(0, 1)] * 4, [(2, 3)] * 2])
+    assert [c for c, _, _ in plan] == [0, 1, 0, 0, 1, 0]
+    assert len(interleave([[], [(0, 1)]])) == 1
+
+
+def test_color_run_streams_channels_and_combines_a_plan():
+    image = _color_image()
+    pin_coords = generate_pin_coords(24, image.shape[:2])
+
+    results = list(ColorAlgorithm(GreedyAlgorithm(), palette="cmyk", num_workers=2).run(
+        image, pin_coords, max_lines=60, line_darkness=40))
+
+    final = results[-1]
+    assert final["status"] == "Done!"
+    assert final["canvas"].shape == image.shape
+    assert len(final["plan"]) == pytest.approx(60, abs=2)
+    colours_used = {c for c, _, _ in final["plan"]}
+    assert {1, 2, 3} <= colours_used
+    assert {r["channel"] for r in results if "channel" in r} == {list(PALETTES["cmyk"])[c] for c in colours_used}
+    # Each colour's lines form a continuous thread.
+    for c in colours_used:
+        lines = [(u, v) for k, u, v in final["plan"] if k == c]
+        for (_, end), (start, _) in zip(lines, lines[1:]):
+            assert end == start
+
+
+def test_cli_palette_writes_plan(tmp_path):
+    inputs, output = tmp_path / "in", tmp_path / "out"
+    inputs.mkdir()
+    Image.fromarray(_color_image(40)).save(inputs / "color.png")
+
+    argv = [str(inputs), "-o", str(output), "--pins", "12", "--size", "40", "-j", "1",
+            "-p", "max_lines=20", "--palette", "cmy"]
+    assert cli.main(argv) == 0
+
+    record = json.loads((output / "color.json").read_text())
+    assert set(record["palette"]) == {"cyan", "magenta", "yellow"}
+    assert all(len(step) == 3 for step in record["plan"])
+    assert np.array(Image.open(output / "color.png")).shape == (40, 40, 3)
+
+
+def test_closing_a_color_run_stops_its_channels():
+    image = _color_image()
+    run = ColorAlgorithm(SimulatedAnnealingAlgorithm(), palette="cmy", num_workers=2).run(
+        image, generate_pin_coords(16, image.shape[:2]), max_lines=60, cooling_rate=0.999999)
+    # Wait for a channel to report, so the solves are under way.
+    next(result for result in run if "channel" in result)
+
+    start = time.perf_counter()
+    run.close()
+    assert time.perf_counter() - start < 5
+    deadline = time.monotonic() + 5
+    while multiprocessing.active_children() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not multiprocessing.active_children()
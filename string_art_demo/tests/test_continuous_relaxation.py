@@ -1,6 +1,7 @@
 import numpy as np
 import pytest
 from string_art_demo.algorithms.continuous_relaxation import ContinuousRelaxationAlgorithm
+from string_art_demo.algorithms.geometry import ChordGeometry
 from string_art_demo.algorithms.greedy import generate_pin_coords
 
 @pytest.mark.slow  # Mark this test as slow
@@ -41,3 +42,89 @@ def test_continuous_relaxation_run():
         assert final_result["canvas"].shape == image_shape
         # Check that the canvas is not all white
         assert np.sum(final_result["canvas"]) < np.sum(np.full(image_shape, 255))
+
+def _run_solver(generator):
+    """
+    Drains a solver generator and returns its result.
+    """
+    try:
+        while True:
+            next(generator)
+    except StopIteration as stop:
+        return stop.value
+
+def test_chord_matrix_matches_dense_construction():
+    """
+    Tests that the sparse chord matrix has a unit entry on every pixel of every chord.
+    """
+    algo = ContinuousRelaxationAlgorithm()
+    image_shape = (40, 40)
+    geometry = ChordGeometry.from_pins(generate_pin_coords(10, image_shape), image_shape)
+    A = algo._build_chord_matrix(geometry)
+
+    dense = np.zeros((geometry.num_pixels, geometry.num_chords))
+    for k in range(geometry.num_chords):
+        idx, _ = geometry.pixels(k)
+        dense[idx, k] = 1
+    np.testing.assert_array_equal(A.toarray(), dense)
+
+def test_iterative_solvers_match_active_set():
+    """
+    Tests that the iterative solvers reach the exact NNLS residual and stay non-negative.
+    """
+    algo = ContinuousRelaxationAlgorithm()
+    image_shape = (40, 40)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[15:25, 15:25] = 0
+    geometry = ChordGeometry.from_pins(generate_pin_coords(12, image_shape), image_shape)
+    A = algo._build_chord_matrix(geometry)
+    b = (255 - target_image).flatten().astype(float)
+
+    exact = np.linalg.norm(A @ _run_solver(algo._solve_active_set(A, b)) - b)
+    for x in (_run_solver(algo._solve_projected_gradient(A, b, 1e-8, 5000)),
+              _run_solver(algo._solve_lsmr(A, b, 1e-10, 500))):
+        assert np.all(x >= 0)
+        assert np.linalg.norm(A @ x - b) == pytest.approx(exact, rel=1e-3)
+
+def test_projected_gradient_reports_progress():
+    """
+    Tests that the default solver streams convergence progress and honours max_iter.
+    """
+    algo = ContinuousRelaxationAlgorithm()
+    image_shape = (40, 40)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[15:25, 15:25] = 0
+
+    results = list(algo.run(target_image, generate_pin_coords(12, image_shape), tol=0, max_iter=30))
+    solver_steps = [r for r in results if "solver_iteration" in r]
+
+    assert [r["solver_iteration"] for r in solver_steps] == [10, 20, 30]
+    assert all(r["residual_norm"] >= 0 for r in solver_steps)
+    assert results[-1]["progress"] == 1.0
+
+def test_lsqr_is_the_former_name_of_lsmr():
+    """
+    Tests that runs saved with the former solver name still use the LSMR solver.
+    """
+    algo = ContinuousRelaxationAlgorithm()
+    image_shape = (30, 30)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[10:20, 10:20] = 0
+    pin_coords = generate_pin_coords(10, image_shape)
+
+    lsmr = list(algo.run(target_image, pin_coords, solver="lsmr"))[-1]
+    lsqr = list(algo.run(target_image, pin_coords, solver="lsqr"))[-1]
+
+    assert not lsqr.get("error")
+    np.testing.assert_array_equal(lsqr["canvas"], lsmr["canvas"])
+
+def test_unknown_solver_reports_error():
+    """
+    Tests that an unknown solver name ends the run with an error state.
+    """
+    image_shape = (30, 30)
+    target_image = np.zeros(image_shape, dtype=np.uint8)
+    results = list(ContinuousRelaxationAlgorithm().run(
+        target_image, generate_pin_coords(8, image_shape), solver="bogus"))
+
+    assert results[-1]["error"]
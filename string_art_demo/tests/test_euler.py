@@ -0,0 +1,81 @@
+import numpy as np
+from string_art_demo.algorithms.euler import edge_count_matrix, euler_trail, eulerize, pin_distances
+from string_art_demo.algorithms.geometry import all_chord_pairs
+from string_art_demo.algorithms.greedy import generate_pin_coords
+
+
+def _trail_counts(pins, num_pins):
+    """
+    Counts how often the trail walks each pin pair.
+    """
+    counts = np.zeros((num_pins, num_pins), dtype=np.int64)
+    for u, v in zip(pins[:-1], pins[1:]):
+        counts[u, v] += 1
+        counts[v, u] += 1
+    return counts
+
+
+def test_edge_count_matrix_is_symmetric():
+    """
+    Tests that wraps are counted on both sides of the pin pair.
+    """
+    chords = all_chord_pairs(4)
+    counts = edge_count_matrix(chords, [2, 0, 1, 0, 0, 3], 4)
+    assert counts[0, 1] == counts[1, 0] == 2
+    assert counts[0, 3] == counts[3, 0] == 1
+    assert counts[2, 3] == counts[3, 2] == 3
+    assert counts.sum() == 2 * 6
+
+
+def test_euler_trail_uses_every_edge_once():
+    """
+    Tests that the trail of an eulerized random multigraph walks exactly its edges.
+    """
+    rng = np.random.default_rng(0)
+    num_pins = 30
+    pin_coords = generate_pin_coords(num_pins, (100, 100))
+    chords = all_chord_pairs(num_pins)
+    wraps = rng.integers(0, 4, size=len(chords)) * (rng.random(len(chords)) < 0.05)
+
+    counts = edge_count_matrix(chords, wraps, num_pins)
+    start = eulerize(counts, pin_coords)
+    pins = euler_trail(counts, start)
+
+    assert pins.dtype == np.int32
+    assert pins[0] == start
+    assert len(pins) == counts.sum() // 2 + 1
+    np.testing.assert_array_equal(_trail_counts(pins, num_pins), counts)
+    assert np.all(counts >= edge_count_matrix(chords, wraps, num_pins))
+
+
+def test_eulerize_pairs_odd_pins_with_neighbours():
+    """
+    Tests that odd pins are joined to their neighbours on the circle and that the
+    longest pair is left open as the ends of the trail.
+    """
+    num_pins = 12
+    pin_coords = generate_pin_coords(num_pins, (100, 100))
+    counts = edge_count_matrix([(0, 6), (1, 7), (3, 9)], [1, 1, 1], num_pins)
+    original = counts.copy()
+
+    start = eulerize(counts, pin_coords)
+    added = counts - original
+    # The three disjoint diameters are first joined by two short chords, then the
+    # remaining odd pins are matched around the circle.
+    odd = np.flatnonzero(counts.sum(axis=1) % 2 == 1)
+    assert len(odd) == 2
+    assert start in odd
+    distances = pin_distances(pin_coords)
+    assert (added * distances).sum() / 2 < distances[0, 6]
+    pins = euler_trail(counts, start)
+    np.testing.assert_array_equal(_trail_counts(pins, num_pins), counts)
+
+
+def test_euler_trail_empty_graph():
+    """
+    Tests that a graph without wraps yields an empty trail.
+    """
+    counts = np.zeros((5, 5), dtype=np.int64)
+    start = eulerize(counts, generate_pin_coords(5, (50, 50)))
+    assert start == -1
+    assert len(euler_trail(counts, start)) == 0
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from skimage.draw import line as skimage_line
+from string_art_demo.algorithms.geometry import ChordGeometry, all_chord_pairs
+from string_art_demo.algorithms.greedy import generate_pin_coords
+
+
+def test_all_chord_pairs_order():
+    """
+    Tests that chords are enumerated in nested-loop order without duplicates.
+    """
+    chords = all_chord_pairs(4)
+    assert chords.tolist() == [[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]]
+
+
+def test_geometry_matches_rasterized_lines():
+    """
+    Tests that every chord in the index covers exactly the pixels of its line.
+    """
+    image_shape = (40, 60)
+    pin_coords = generate_pin_coords(12, image_shape)
+    geometry = ChordGeometry.from_pins(pin_coords, image_shape)
+
+    assert geometry.num_chords == 12 * 11 // 2
+    for k, (i, j) in enumerate(geometry.chords):
+        rr, cc = skimage_line(pin_coords[i][0], pin_coords[i][1], pin_coords[j][0], pin_coords[j][1])
+        idx, weights = geometry.pixels(k)
+        assert set(idx.tolist()) == set((rr * image_shape[1] + cc).tolist())
+        assert np.all(weights == 255)
+        assert geometry.chord_id(i, j) == k
+        assert geometry.chord_id(j, i) == k
+
+
+def test_geometry_draw_and_remove():
+    """
+    Tests that drawing and removing a chord restores the canvas.
+    """
+    image_shape = (30, 30)
+    geometry = ChordGeometry.from_pins(generate_pin_coords(8, image_shape), image_shape)
+    canvas = np.zeros(image_shape, dtype=np.uint16)
+
+    geometry.draw(canvas, 3, 25)
+    idx, _ = geometry.pixels(3)
+    assert np.all(canvas.reshape(-1)[idx] == 25)
+    assert canvas.sum() == 25 * len(idx)
+
+    geometry.draw(canvas, 3, 25, sign=-1)
+    assert canvas.sum() == 0
+
+
+def test_antialiased_model_weights_and_bounds():
+    """
+    Tests that the anti-aliased model stays in the image, keeps partial coverage
+    and covers the aliased line's endpoints fully.
+    """
+    image_shape = (40, 40)
+    pin_coords = generate_pin_coords(10, image_shape)
+    aliased = ChordGeometry.from_pins(pin_coords, image_shape)
+    smooth = ChordGeometry.from_pins(pin_coords, image_shape, line_model="antialiased")
+
+    assert smooth.indices.min() >= 0 and smooth.indices.max() < smooth.num_pixels
+    assert np.any((smooth.weights > 0) & (smooth.weights < 255))
+    for k, (i, j) in enumerate(smooth.chords):
+        idx, weights = smooth.pixels(k)
+        assert np.all(np.diff(idx) > 0)
+        coverage = dict(zip(idx.tolist(), weights.tolist()))
+        for pin in (i, j):
+            y, x = pin_coords[pin]
+            assert coverage[y * image_shape[1] + x] == 255
+    assert smooth.indices.size > aliased.indices.size
+
+
+def test_thread_model_width():
+    """
+    Tests that a wider thread covers more pixels with more total coverage.
+    """
+    image_shape = (40, 40)
+    pin_coords = generate_pin_coords(8, image_shape)
+    thin = ChordGeometry.from_pins(pin_coords, image_shape, line_model="thread")
+    wide = ChordGeometry.from_pins(pin_coords, image_shape, line_model="thread:3")
+
+    assert wide.indices.size > thin.indices.size
+    assert wide.segment_sums(wide.weights).sum() > thin.segment_sums(thin.weights).sum()
+    # A horizontal-ish chord of a 1 px thread carries roughly one full pixel per step.
+    k = thin.chord_id(0, 4)
+    _, weights = thin.pixels(k)
+    length = np.hypot(*(pin_coords[0] - pin_coords[4]))
+    assert abs(weights.sum() / 255 - length) < 0.25 * length
+
+
+def test_unknown_line_model():
+    """
+    Tests that unknown line models are rejected.
+    """
+    with pytest.raises(ValueError):
+        ChordGeometry.from_pins(generate_pin_coords(4, (20, 20)), (20, 20), line_model="crayon")
@@ -0,0 +1,86 @@
+import os
+import numpy as np
+from string_art_demo.algorithms import geometry_cache
+from string_art_demo.algorithms.geometry import ChordGeometry
+from string_art_demo.algorithms.geometry_cache import ChordGeometryCache, geometry_key
+from string_art_demo.algorithms.greedy import generate_pin_coords
+
+
+def test_cache_hit_is_memory_mapped_and_identical(tmp_path):
+    """
+    Tests that a second lookup loads the stored index zero-copy with identical contents.
+    """
+    cache = ChordGeometryCache(str(tmp_path))
+    image_shape = (40, 40)
+    pin_coords = generate_pin_coords(10, image_shape)
+
+    built = cache.get(pin_coords, image_shape)
+    loaded = cache.get(pin_coords, image_shape)
+
+    assert isinstance(loaded.indices.base, np.memmap) or isinstance(loaded.indices, np.memmap)
+    for name in ("chords", "indptr", "indices", "weights"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(built, name))
+    assert loaded.chord_id(3, 7) == built.chord_id(3, 7)
+    assert len(cache.entries()) == 1
+
+
+def test_cache_key_depends_on_layout_and_raster_version(monkeypatch):
+    """
+    Tests that the key changes with the pins, the image shape and the rasterization version.
+    """
+    pin_coords = generate_pin_coords(10, (40, 40))
+    key = geometry_key(pin_coords, (40, 40))
+
+    assert geometry_key(pin_coords, (40, 41)) != key
+    assert geometry_key(pin_coords[::-1], (40, 40)) != key
+    assert geometry_key(pin_coords, (40, 40), chords=[(0, 1)]) != key
+    monkeypatch.setattr(geometry_cache, "RASTER_VERSION", 2)
+    assert geometry_key(pin_coords, (40, 40)) != key
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """
+    Tests that the size bound evicts the entry that was used longest ago.
+    """
+    cache = ChordGeometryCache(str(tmp_path))
+    layouts = [generate_pin_coords(10, (40, 40)) + offset for offset in (0, 1, 2)]
+    for pin_coords in layouts[:2]:
+        cache.get(pin_coords, (44, 44))
+    first, second = (geometry_key(p, (44, 44)) for p in layouts[:2])
+    os.utime(tmp_path / first, (1, 1))
+    os.utime(tmp_path / second, (2, 2))
+
+    # Room for two entries of similar size, but not three.
+    cache.max_bytes = int(2.5 * max(size for _, size, _ in cache.entries()))
+    cache.get(layouts[2], (44, 44))
+
+    keys = [key for key, _, _ in cache.entries()]
+    assert first not in keys
+    assert second in keys
+    assert geometry_key(layouts[2], (44, 44)) in keys
+
+
+def test_corrupt_entry_is_rebuilt(tmp_path):
+    """
+    Tests that a damaged entry is discarded and rasterized again.
+    """
+    cache = ChordGeometryCache(str(tmp_path))
+    image_shape = (30, 30)
+    pin_coords = generate_pin_coords(8, image_shape)
+    cache.get(pin_coords, image_shape)
+    (tmp_path / geometry_key(pin_coords, image_shape) / "indices.npy").write_bytes(b"broken")
+
+    geometry = cache.get(pin_coords, image_shape)
+    expected = ChordGeometry.from_pins(pin_coords, image_shape)
+    np.testing.assert_array_equal(geometry.indices, expected.indices)
+
+
+def test_load_geometry_can_be_disabled(monkeypatch):
+    """
+    Tests that an empty cache directory setting bypasses the disk cache.
+    """
+    monkeypatch.setenv("STRING_ART_CACHE_DIR", "")
+    assert geometry_cache.default_cache() is None
+    image_shape = (30, 30)
+    geometry = geometry_cache.load_geometry(generate_pin_coords(8, image_shape), image_shape)
+    assert geometry.num_chords == 28
@@ -1,5 +1,7 @@
+import multiprocessing
 import numpy as np
 import pytest
+from string_art_demo.algorithms import greedy
 from string_art_demo.algorithms.greedy import (
     generate_pin_coords,
     GreedyAlgorithm
@@ -98,3 +100,174 @@ def test_greedy_algorithm_run():
     # Check that the final canvas is not blank (i.e., not all white)
     final_canvas = results[-1]["canvas"]
     assert np.sum(final_canvas) < np.sum(np.full(image_shape, 255))
+
+def _reference_greedy_sequence(target_image, pin_coords, max_lines, line_darkness):
+    """
+    Scalar re-implementation of the greedy loop using one dense canvas per chord.
+    """
+    algo = GreedyAlgorithm()
+    num_pins = len(pin_coords)
+    inverted_target = 255 - target_image
+    canvas = np.zeros_like(inverted_target, dtype=np.uint16)
+    line_canvases = {}
+    for i, j in algo._get_all_chords(num_pins):
+        temp_canvas = np.zeros_like(inverted_target, dtype=np.uint16)
+        algo._draw_line_on_canvas(temp_canvas, pin_coords[i], pin_coords[j], line_darkness)
+        line_canvases[(i, j)] = temp_canvas
+
+    current_pin = 0
+    sequence = []
+    for _ in range(max_lines):
+        residual = inverted_target.astype(np.int32) - canvas.astype(np.int32)
+        best_chord, max_score = None, -float('inf')
+        for next_pin in range(num_pins):
+            if next_pin == current_pin:
+                continue
+            line_canvas = line_canvases[tuple(sorted((current_pin, next_pin)))].astype(np.int32)
+            score = 2 * np.sum(residual * line_canvas) - np.sum(line_canvas ** 2)
+            if score > max_score:
+                max_score, best_chord = score, (current_pin, next_pin)
+        sequence.append(best_chord)
+        canvas += line_canvases[tuple(sorted(best_chord))]
+        current_pin = best_chord[1]
+    return sequence
+
+def test_greedy_matches_reference_sequence():
+    """
+    Tests that batched candidate scoring picks exactly the same chords as the scalar loop.
+    """
+    image_shape = (60, 60)
+    yy, xx = np.mgrid[:image_shape[0], :image_shape[1]]
+    target_image = ((xx * 3 + yy * 2) % 256).astype(np.uint8)
+    pin_coords = generate_pin_coords(16, image_shape)
+
+    expected = _reference_greedy_sequence(target_image, pin_coords, 30, 25)
+    results = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=30, line_darkness=25))
+
+    assert [r["chord"] for r in results] == expected
+
+def test_greedy_incremental_matches_full_rescoring():
+    """
+    Tests that the incremental score cache produces the same run as full rescoring.
+    """
+    image_shape = (60, 60)
+    yy, xx = np.mgrid[:image_shape[0], :image_shape[1]]
+    target_image = ((xx * 3 + yy * 2) % 256).astype(np.uint8)
+    pin_coords = generate_pin_coords(18, image_shape)
+
+    full = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=40))
+    incremental = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=40, incremental=True))
+
+    assert [r["chord"] for r in incremental] == [r["chord"] for r in full]
+    np.testing.assert_array_equal(incremental[-1]["canvas"], full[-1]["canvas"])
+    np.testing.assert_array_equal(incremental[-1]["residual"], full[-1]["residual"])
+
+def test_greedy_emission_policy():
+    """
+    Tests that skipped steps yield chord-only delta events and that the final
+    step always carries a full frame.
+    """
+    image_shape = (60, 60)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[20:40, 20:40] = 0
+    pin_coords = generate_pin_coords(16, image_shape)
+
+    every_frame = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=12))
+    sparse = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=12, frame_every=5))
+    final_only = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=12, final_only=True))
+
+    assert [r["chord"] for r in sparse] == [r["chord"] for r in every_frame]
+    assert [r["line_num"] for r in sparse if "canvas" in r] == [5, 10, 12]
+    assert all(r["event"] == "delta" and set(r) == {"event", "line_num", "chord"}
+               for r in sparse if "canvas" not in r)
+    assert [r["line_num"] for r in final_only if "canvas" in r] == [12]
+    np.testing.assert_array_equal(final_only[-1]["canvas"], every_frame[-1]["canvas"])
+
+def test_greedy_profile_summary():
+    """
+    Tests that profiling attaches phase timings and counters, summarized at the end.
+    """
+    image_shape = (60, 60)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[20:40, 20:40] = 0
+    pin_coords = generate_pin_coords(16, image_shape)
+
+    results = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=8, frame_every=4, profile=True))
+    summary = results[-1]["profile_summary"]
+
+    assert {"geometry", "scoring", "update", "frames"} <= set(summary["phases"])
+    assert summary["counters"]["lines"] == 8
+    assert summary["counters"]["candidates_scored"] == 8 * 15
+    assert summary["counters"]["frames"] == 2
+    assert "profile" in results[3] and "profile" not in results[0]
+    assert all("profile" not in r and "profile_summary" not in r
+               for r in GreedyAlgorithm().run(target_image, pin_coords, max_lines=8))
+
+def test_greedy_incremental_matches_full_rescoring_antialiased():
+    """
+    Tests that weighted (anti-aliased) chords keep incremental and full scoring in step.
+    """
+    image_shape = (60, 60)
+    yy, xx = np.mgrid[:image_shape[0], :image_shape[1]]
+    target_image = ((xx * 3 + yy * 2) % 256).astype(np.uint8)
+    pin_coords = generate_pin_coords(18, image_shape)
+
+    full = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=30, line_model="antialiased"))
+    incremental = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=30, incremental=True,
+                                             line_model="antialiased"))
+
+    assert [r["chord"] for r in incremental] == [r["chord"] for r in full]
+    np.testing.assert_array_equal(incremental[-1]["canvas"], full[-1]["canvas"])
+
+def test_greedy_parallel_scoring_matches_single_process(monkeypatch):
+    """
+    Tests that sharding the candidates over worker processes picks the same chords,
+    including ties, which a flat target produces in every step.
+    """
+    # Workers are capped at the CPU count; shard even on a single-core host.
+    monkeypatch.setattr(greedy.os, "cpu_count", lambda: 4)
+    image_shape = (60, 60)
+    yy, xx = np.mgrid[:image_shape[0], :image_shape[1]]
+    pin_coords = generate_pin_coords(18, image_shape)
+    for target_image in (((xx * 3 + yy * 2) % 256).astype(np.uint8), np.zeros(image_shape, dtype=np.uint8)):
+        single = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=25))
+        parallel = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=25, num_workers=3))
+
+        assert [r["chord"] for r in parallel] == [r["chord"] for r in single]
+        np.testing.assert_array_equal(parallel[-1]["residual"], single[-1]["residual"])
+
+    with pytest.raises(ValueError):
+        list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=5, incremental=True, num_workers=2))
+
+    # Dropping the run stops its workers.
+    generator = GreedyAlgorithm().run(target_image, pin_coords, max_lines=25, num_workers=2)
+    next(generator)
+    generator.close()
+    assert not multiprocessing.active_children()
+
+    # A single core scores in process.
+    monkeypatch.setattr(greedy.os, "cpu_count", lambda: 1)
+    generator = GreedyAlgorithm().run(target_image, pin_coords, max_lines=25, num_workers=2)
+    next(generator)
+    assert not multiprocessing.active_children()
+    generator.close()
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_greedy_continues_an_earlier_run(incremental):
+    """
+    Tests that continuing a shorter run to more lines matches running them all at once.
+    """
+    image_shape = (60, 60)
+    yy, xx = np.mgrid[:image_shape[0], :image_shape[1]]
+    target_image = ((xx * 3 + yy * 2) % 256).astype(np.uint8)
+    pin_coords = generate_pin_coords(18, image_shape)
+
+    full = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=50, incremental=incremental))
+    short = [r["chord"] for r in GreedyAlgorithm().run(target_image, pin_coords, max_lines=30)]
+    continued = list(GreedyAlgorithm().run(target_image, pin_coords, max_lines=50, incremental=incremental,
+                                           initial_sequence=short))
+
+    assert continued[0]["sequence"] == short and continued[0]["status"] == "Continued at line 30"
+    assert short + [r["chord"] for r in continued[1:]] == [r["chord"] for r in full]
+    np.testing.assert_array_equal(continued[-1]["canvas"], full[-1]["canvas"])
+    np.testing.assert_array_equal(continued[-1]["residual"], full[-1]["residual"])
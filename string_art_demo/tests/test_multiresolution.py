@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from string_art_demo.algorithms.greedy import GreedyAlgorithm, generate_pin_coords
+from string_art_demo.algorithms.multiresolution import MultiResolutionAlgorithm, downsample, scale_pins
+from string_art_demo.algorithms.simulated_annealing import SimulatedAnnealingAlgorithm
+from string_art_demo.algorithms.geometry import ChordGeometry
+
+
+def _target(size=80):
+    target = np.full((size, size), 255, dtype=np.uint8)
+    target[size // 4:3 * size // 4, size // 3:2 * size // 3] = 0
+    return target
+
+
+def test_scale_pins_keeps_pins_in_bounds():
+    pins = generate_pin_coords(40, (300, 300))
+    scaled = scale_pins(pins, (300, 300), (75, 75))
+    assert scaled.shape == pins.shape
+    assert scaled.min() >= 0 and scaled.max() <= 74
+    assert downsample(_target(300), 0.25).shape == (75, 75)
+
+
+@pytest.mark.parametrize("refine", ["greedy", "anneal"])
+def test_multiresolution_produces_full_resolution_sequence(refine):
+    target = _target()
+    pin_coords = generate_pin_coords(30, target.shape)
+    algo = MultiResolutionAlgorithm(GreedyAlgorithm(), levels=(0.5,), refine=refine)
+
+    results = list(algo.run(target, pin_coords, max_lines=40, line_darkness=40, final_only=True))
+
+    final = results[-1]
+    assert final["progress"] == 1.0
+    assert final["canvas"].shape == target.shape
+    sequence = final["sequence"]
+    assert len(sequence) == 40
+    for (_, end), (start, _) in zip(sequence, sequence[1:]):
+        assert end == start
+
+
+def test_greedy_refinement_never_increases_error():
+    target = _target()
+    pin_coords = generate_pin_coords(30, target.shape)
+    geometry = ChordGeometry.from_pins(pin_coords, target.shape)
+    algo = MultiResolutionAlgorithm(GreedyAlgorithm(), levels=(0.5,))
+    walk = [(7 * i) % 30 for i in range(20)]
+    coarse = list(zip(walk, walk[1:]))
+
+    annealer = SimulatedAnnealingAlgorithm()
+    state = annealer._init_state(coarse, geometry, 255 - target, 30)
+    before = state["error"]
+    algo._reselect_pass(state, geometry, geometry.line_values(30).astype(np.int64))
+
+    assert state["error"] <= before
+    recomputed = annealer._init_state(state["sequence"], geometry, 255 - target, 30)
+    assert recomputed["error"] == state["error"]
@@ -0,0 +1,90 @@
+import json
+import numpy as np
+import pytest
+from PIL import Image
+from string_art_demo import cli
+from string_art_demo.algorithms.color import ColorAlgorithm
+from string_art_demo.algorithms.geometry import ChordGeometry, render_sequence
+from string_art_demo.algorithms.greedy import GreedyAlgorithm, generate_pin_coords
+from string_art_demo.algorithms.plan import StringArtPlan
+
+
+def _target(size=48):
+    yy, xx = np.mgrid[:size, :size] / size
+    return (255 * np.clip(np.hypot(yy - 0.5, xx - 0.4) * 2.4, 0, 1)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("line_model", ["skimage_line", "thread:2"])
+def test_render_sequence_matches_drawing_line_by_line(line_model):
+    pin_coords = generate_pin_coords(24, (40, 40))
+    geometry = ChordGeometry.from_pins(pin_coords, (40, 40), line_model=line_model)
+    pins = [0, 7, 15, 3, 20, 7, 0, 12]
+    expected = np.zeros((40, 40), dtype=np.uint16)
+    for u, v in zip(pins[:-1], pins[1:]):
+        geometry.draw(expected, geometry.chord_id(u, v), 30)
+
+    assert np.array_equal(render_sequence(pins, geometry, 30), expected)
+    assert np.array_equal(render_sequence(list(zip(pins[:-1], pins[1:])), geometry, 30), expected)
+    assert not render_sequence([], geometry).any()
+
+
+def test_render_sequence_rejects_unindexed_chords():
+    pin_coords = generate_pin_coords(12, (30, 30))
+    geometry = ChordGeometry.from_pins(pin_coords, (30, 30), chords=np.array([[0, 5]]))
+    with pytest.raises(ValueError):
+        render_sequence([0, 5, 6], geometry)
+
+
+def test_plan_round_trips_and_renders_the_solved_canvas(tmp_path):
+    target = _target()
+    pin_coords = generate_pin_coords(30, target.shape)
+    results = list(GreedyAlgorithm().run(target, pin_coords, max_lines=40, line_darkness=30))
+    sequence = [r["chord"] for r in results]
+
+    plan = StringArtPlan.from_sequence(sequence, 30, target.shape, line_darkness=30, algorithm="Greedy Residual",
+                                       params={"max_lines": 40})
+    plan.save(tmp_path / "piece.plan")
+    loaded = StringArtPlan.load(tmp_path / "piece.plan")
+
+    assert loaded.paths[0].dtype == np.int16
+    assert loaded.paths[0].tolist() == [sequence[0][0]] + [v for _, v in sequence]
+    assert loaded.params == {"max_lines": 40} and loaded.num_lines == 40
+    assert np.array_equal(loaded.render(), results[-1]["canvas"])
+    large = loaded.render((144, 144), line_model="thread:3")
+    assert large.shape == (144, 144) and large.min() < 255
+
+
+def test_plan_rejects_broken_input():
+    with pytest.raises(ValueError):
+        StringArtPlan.from_sequence([(0, 1), (2, 3)], 10, (20, 20))
+    with pytest.raises(ValueError):
+        StringArtPlan.from_bytes(b"PNG?" + bytes(20))
+
+
+def test_colour_plan_round_trips():
+    image = np.full((40, 40, 3), 255, dtype=np.uint8)
+    image[:20, :, 0] = 30
+    image[20:, :20] = 50
+    pin_coords = generate_pin_coords(16, image.shape[:2])
+    final = list(ColorAlgorithm(GreedyAlgorithm(), palette="cmy", num_workers=1).run(
+        image, pin_coords, max_lines=30, line_darkness=40))[-1]
+
+    plan = StringArtPlan.from_color_plan(final["plan"], final["palette"], 16, image.shape, line_darkness=40)
+    loaded = StringArtPlan.from_bytes(plan.to_bytes())
+
+    assert loaded.colors == final["palette"]
+    assert loaded.color_plan() == final["plan"]
+    assert np.array_equal(loaded.render(), final["canvas"])
+
+
+def test_cli_writes_a_plan(tmp_path):
+    inputs, output = tmp_path / "in", tmp_path / "out"
+    inputs.mkdir()
+    Image.fromarray(_target(40)).save(inputs / "face.png")
+
+    assert cli.main([str(inputs), "-o", str(output), "--pins", "12", "--size", "40", "-j", "1",
+                     "-p", "max_lines=20"]) == 0
+
+    plan = StringArtPlan.load(output / "face.plan")
+    assert plan.paths[0].tolist() == json.loads((output / "face.json").read_text())["pins"]
+    assert np.array_equal(plan.render(), np.array(Image.open(output / "face.png")))
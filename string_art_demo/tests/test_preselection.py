@@ -0,0 +1,127 @@
+import numpy as np
+from skimage.draw import line
+from string_art_demo.algorithms import geometry_cache
+from string_art_demo.algorithms.continuous_relaxation import ContinuousRelaxationAlgorithm
+from string_art_demo.algorithms.geometry import ChordGeometry, all_chord_pairs
+from string_art_demo.algorithms.greedy import generate_pin_coords
+from string_art_demo.algorithms.preselection import radon_chord_scores, select_chords
+from string_art_demo.algorithms.radon import RadonAlgorithm
+from string_art_demo.algorithms.simulated_annealing import SimulatedAnnealingAlgorithm
+
+
+def _portrait(size=64):
+    yy, xx = np.mgrid[:size, :size] / size
+    target = (255 * np.clip(np.hypot(yy - 0.45, xx - 0.5) * 2.5, 0, 1)).astype(np.uint8)
+    target[size // 2:size // 2 + 3, :] = 30
+    return target
+
+
+def test_radon_scores_match_rasterized_line_integrals():
+    target = _portrait()
+    pin_coords = generate_pin_coords(30, target.shape)
+    chords = all_chord_pairs(30)
+    geometry = ChordGeometry.from_pins(pin_coords, target.shape)
+    darkness = (255 - target.astype(np.float64)).reshape(-1)
+    exact = np.add.reduceat(darkness[geometry.indices], geometry.indptr[:-1])
+
+    scores = radon_chord_scores(target, pin_coords, chords)
+
+    long_chords = np.diff(geometry.indptr) > 20
+    assert np.corrcoef(scores[long_chords], exact[long_chords])[0, 1] > 0.98
+
+
+def test_radon_scores_find_a_dark_chord():
+    target = np.full((81, 81), 255, dtype=np.uint8)
+    pin_coords = generate_pin_coords(24, target.shape)
+    rr, cc = line(*pin_coords[3], *pin_coords[14])
+    target[rr, cc] = 0
+
+    scores = radon_chord_scores(target, pin_coords)
+
+    assert tuple(all_chord_pairs(24)[np.argmax(scores)]) == (3, 14)
+
+
+def test_radon_scores_ignore_darkness_outside_the_pin_circle():
+    # On a wide image the pins sit on the circle inscribed in the middle square.
+    target = np.full((80, 120), 255, dtype=np.uint8)
+    target[:, 20:100] = _portrait(80)
+    pin_coords = generate_pin_coords(40, target.shape)
+    # The transform's interpolation lets the pixels right next to the circle bleed in.
+    dark_sides = target.copy()
+    dark_sides[:, :19] = dark_sides[:, 101:] = 0
+
+    np.testing.assert_allclose(radon_chord_scores(dark_sides, pin_coords), radon_chord_scores(target, pin_coords))
+    np.testing.assert_allclose(radon_chord_scores(target, pin_coords),
+                               radon_chord_scores(target[:, 20:100], pin_coords - [0, 20]))
+
+
+def test_select_chords_keeps_candidates_and_every_pin_connected():
+    target = _portrait()
+    pin_coords = generate_pin_coords(40, target.shape)
+
+    chords = select_chords(target, pin_coords, 60, min_per_pin=2)
+
+    assert 60 <= len(chords) <= 60 + 2 * 40
+    assert np.all(chords[:, 0] < chords[:, 1])
+    degree = np.bincount(chords.reshape(-1), minlength=40)
+    assert degree.min() >= 2
+
+
+def test_pruned_annealing_only_uses_indexed_chords():
+    target = _portrait()
+    pin_coords = generate_pin_coords(30, target.shape)
+    candidates = {tuple(c) for c in select_chords(target, pin_coords, 80)}
+
+    results = list(SimulatedAnnealingAlgorithm().run(target, pin_coords, max_lines=40, cooling_rate=0.95,
+                                                     candidate_chords=80, final_only=True))
+
+    sequence = results[-1]["sequence"]
+    assert len(sequence) == 40
+    for (_, end), (start, _) in zip(sequence, sequence[1:]):
+        assert end == start
+    assert all((min(u, v), max(u, v)) in candidates for u, v in sequence)
+
+
+def test_pruned_relaxation_draws_eulerization_chords():
+    target = _portrait()
+    pin_coords = generate_pin_coords(30, target.shape)
+
+    results = list(ContinuousRelaxationAlgorithm().run(target, pin_coords, max_iter=50, candidate_chords=60,
+                                                       final_only=True))
+
+    final = results[-1]
+    assert final["status"] == "Done!"
+    expected = np.zeros(target.shape, dtype=np.int64)
+    full = ChordGeometry.from_pins(pin_coords, target.shape)
+    pins = final["path"]
+    for u, v in zip(pins[:-1], pins[1:]):
+        full.draw(expected, full.chord_id(u, v), 25)
+    assert np.array_equal(final["canvas"], 255 - np.clip(expected, 0, 255).astype(np.uint8))
+
+
+def test_radon_algorithm_draws_from_its_candidates():
+    target = _portrait()
+    pin_coords = generate_pin_coords(30, target.shape)
+    candidates = {tuple(c) for c in select_chords(target, pin_coords, 100)}
+
+    results = list(RadonAlgorithm().run(target, pin_coords, max_lines=50, candidate_chords=100))
+
+    assert len(results) == 50
+    assert all((min(u, v), max(u, v)) in candidates for u, v in (r["chord"] for r in results))
+
+
+def test_pruned_indices_stay_out_of_the_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("STRING_ART_CACHE_DIR", str(tmp_path))
+    target = _portrait()
+    pin_coords = generate_pin_coords(30, target.shape)
+    chords = select_chords(target, pin_coords, 80)
+    full = ChordGeometry.from_pins(pin_coords, target.shape)
+
+    sliced = full.subset(chords)
+    rasterized = ChordGeometry.from_pins(pin_coords, target.shape, chords=chords)
+    for name in ("chords", "indptr", "indices", "weights", "lookup"):
+        np.testing.assert_array_equal(getattr(sliced, name), getattr(rasterized, name))
+
+    for geometry in (None, full):
+        list(RadonAlgorithm().run(target, pin_coords, max_lines=20, candidate_chords=80, geometry=geometry))
+    assert geometry_cache.default_cache().entries() == []
@@ -0,0 +1,114 @@
+import io
+import os
+import signal
+import numpy as np
+import pytest
+from PIL import Image
+from string_art_demo.service import JobService
+from string_art_demo.service_client import ServiceClient, ServiceError, decode_value, encode_value
+
+
+@pytest.fixture(scope="module")
+def client():
+    service = JobService(workers=2)
+    client = ServiceClient(service.start_in_thread(), timeout=30)
+    yield client
+    service.shutdown()
+
+
+def _image_bytes(size=40):
+    yy, xx = np.mgrid[:size, :size]
+    image = (255 * (np.hypot(yy - size / 2, xx - size / 2) > size / 4)).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_encode_value_round_trips_images():
+    canvas = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    event = {"canvas": canvas, "chord": (np.int64(2), np.int64(5)), "heatmap": np.array([0.5, 1.0])}
+
+    decoded = decode_value(encode_value(event))
+
+    assert np.array_equal(decoded["canvas"], canvas)
+    assert decoded["chord"] == [2, 5]
+    assert decoded["heatmap"] == [0.5, 1.0]
+
+
+def test_job_streams_progress_until_done(client):
+    assert client.is_alive()
+    job_id = client.submit({"algorithm": "greedy_residual", "image": _image_bytes(), "size": 40, "num_pins": 16,
+                            "params": {"max_lines": 30, "frame_every": 10}})
+
+    events = list(client.events(job_id))
+
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "state" and kinds[-1] == "done"
+    assert "progress" in kinds
+    done = events[-1][1]
+    assert len(done["sequence"]) == 30
+    assert done["canvas"].shape == (40, 40)
+    assert client.status(job_id)["state"] == "done"
+    # A late subscriber gets the final state straight away.
+    assert [kind for kind, _ in client.events(job_id)][-1] == "done"
+
+
+# Annealing without frames yields only delta events until it is done, and a colour
+# job solves its channels on a pool of its own.
+@pytest.mark.parametrize("options, extra", [({}, {}), ({"final_only": True}, {}),
+                                            ({"final_only": True, "num_replicas": 2}, {}),
+                                            ({"final_only": True}, {"palette": "cmy"})])
+def test_running_job_can_be_cancelled(client, options, extra):
+    job_id = client.submit({"algorithm": "simulated_annealing", "image": _image_bytes(), "size": 40,
+                            "num_pins": 16, "params": {"max_lines": 50, "cooling_rate": 0.99999, **options},
+                            **extra})
+
+    for kind, _ in client.events(job_id):
+        if kind == "state":
+            client.cancel(job_id)
+    assert kind == "cancelled"
+    assert client.status(job_id)["state"] == "cancelled"
+
+
+def test_bad_requests(client):
+    with pytest.raises(ServiceError, match="404"):
+        client.status("missing")
+    with pytest.raises(ServiceError, match="400"):
+        client.submit({"algorithm": "no_such_algorithm", "image": _image_bytes()})
+
+
+# Annealing and relaxation only solve print sizes within a memory budget.
+@pytest.mark.parametrize("algorithm", ["simulated_annealing", "continuous_relaxation_eulerization"])
+def test_print_sizes_need_a_memory_budget(client, algorithm):
+    request = {"algorithm": algorithm, "image": _image_bytes(), "size": 1500, "num_pins": 16}
+    with pytest.raises(ServiceError, match="memory_budget"):
+        client.submit(request)
+
+    job_id = client.submit(dict(request, params={"memory_budget": "1K"}))
+    assert [kind for kind, _ in client.events(job_id)][-1] == "failed"
+    assert "MemoryBudgetError" in client.status(job_id)["status"]
+
+
+def test_a_killed_worker_fails_its_job_and_the_service_recovers():
+    service = JobService(workers=1)
+    client = ServiceClient(service.start_in_thread(), timeout=30)
+    try:
+        running = client.submit({"algorithm": "simulated_annealing", "image": _image_bytes(), "size": 40,
+                                 "num_pins": 16, "params": {"max_lines": 50, "cooling_rate": 0.99999}})
+        queued = client.submit({"algorithm": "greedy_residual", "image": _image_bytes(), "size": 40,
+                                "num_pins": 16, "params": {"max_lines": 10}})
+        for kind, data in client.events(running):
+            if kind == "state" and data["state"] == "running":
+                # As if the worker ran out of memory.
+                for pid in list(service._pool._processes):
+                    os.kill(pid, signal.SIGKILL)
+
+        assert kind == "failed"
+        assert client.status(running)["state"] == "failed"
+        # The queued job had not started; it runs on a fresh pool, as do new jobs.
+        assert [kind for kind, _ in client.events(queued)][-1] == "done"
+        later = client.submit({"algorithm": "greedy_residual", "image": _image_bytes(), "size": 40,
+                               "num_pins": 16, "params": {"max_lines": 10}})
+        assert [kind for kind, _ in client.events(later)][-1] == "done"
+    finally:
+        service.shutdown()
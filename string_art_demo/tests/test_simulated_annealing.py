@@ -1,6 +1,8 @@
 import numpy as np
+import random
 import pytest
 from string_art_demo.algorithms.simulated_annealing import SimulatedAnnealingAlgorithm
+from string_art_demo.algorithms.geometry import ChordGeometry
 from string_art_demo.algorithms.greedy import generate_pin_coords
 
 def test_simulated_annealing_run():
@@ -41,3 +43,121 @@ def test_simulated_annealing_run():
     assert final_result["canvas"].shape == image_shape
     # Check that the canvas is not all white
     assert np.sum(final_result["canvas"]) < np.sum(np.full(image_shape, 255))
+
+def test_simulated_annealing_tracks_error_incrementally():
+    """
+    Tests that the delta-updated canvas and error match a full recomputation
+    from the final sequence, including the rewritten successor lines.
+    """
+    random.seed(3)
+    algo = SimulatedAnnealingAlgorithm()
+    image_shape = (50, 50)
+    yy, xx = np.mgrid[:image_shape[0], :image_shape[1]]
+    target_image = ((xx * 5 + yy * 3) % 256).astype(np.uint8)
+    pin_coords = generate_pin_coords(15, image_shape)
+
+    final_result = list(algo.run(target_image, pin_coords, max_lines=40, start_temp=1e5, cooling_rate=0.995))[-1]
+    sequence = final_result["sequence"]
+
+    # The sequence stays a continuous thread.
+    assert all(a[1] == b[0] for a, b in zip(sequence[:-1], sequence[1:]))
+    geometry = ChordGeometry.from_pins(pin_coords, image_shape)
+    canvas = algo._get_canvas_from_sequence(sequence, geometry, 25)
+    assert final_result["total_error"] == algo._calculate_error(canvas, 255 - target_image)
+    np.testing.assert_array_equal(final_result["canvas"], 255 - np.clip(canvas, 0, 255).astype(np.uint8))
+
+def test_parallel_tempering_streams_best_canvas():
+    """
+    Tests that the replica mode streams monotonically improving best-so-far states
+    and that its final sequence reproduces the reported canvas and error.
+    """
+    random.seed(5)
+    algo = SimulatedAnnealingAlgorithm()
+    image_shape = (40, 40)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[15:25, 15:25] = 0
+    pin_coords = generate_pin_coords(12, image_shape)
+
+    results = list(algo.run(target_image, pin_coords, max_lines=20, start_temp=1e4, end_temp=1,
+                            cooling_rate=0.9, num_replicas=3, exchange_interval=20))
+    final_result = results[-1]
+    rounds = results[:-1]
+
+    assert len(rounds) == 5
+    errors = [r["total_error"] for r in rounds]
+    assert errors == sorted(errors, reverse=True)
+    assert final_result["progress"] == 1.0
+    assert final_result["total_error"] == errors[-1]
+
+    geometry = ChordGeometry.from_pins(pin_coords, image_shape)
+    canvas = algo._get_canvas_from_sequence(final_result["sequence"], geometry, 25)
+    assert final_result["total_error"] == algo._calculate_error(canvas, 255 - target_image)
+    np.testing.assert_array_equal(final_result["canvas"], rounds[-1]["canvas"])
+
+@pytest.mark.parametrize("accept", ["first", "best"])
+def test_batched_proposals_track_error_exactly(accept):
+    """
+    Tests that batches of proposals evaluated together keep the canvas and error in
+    step with the sequence, and that a seed makes the run reproducible.
+    """
+    algo = SimulatedAnnealingAlgorithm()
+    image_shape = (50, 50)
+    yy, xx = np.mgrid[:image_shape[0], :image_shape[1]]
+    target_image = ((xx * 5 + yy * 3) % 256).astype(np.uint8)
+    pin_coords = generate_pin_coords(15, image_shape)
+    options = dict(max_lines=40, start_temp=1e4, cooling_rate=0.98, proposals_per_step=16, accept=accept)
+
+    final_result = list(algo.run(target_image, pin_coords, seed=11, **options))[-1]
+    sequence = final_result["sequence"]
+
+    assert all(a[1] == b[0] for a, b in zip(sequence[:-1], sequence[1:]))
+    assert all(u != v for u, v in sequence)
+    geometry = ChordGeometry.from_pins(pin_coords, image_shape)
+    canvas = algo._get_canvas_from_sequence(sequence, geometry, 25)
+    assert final_result["total_error"] == algo._calculate_error(canvas, 255 - target_image)
+    assert list(algo.run(target_image, pin_coords, seed=11, **options))[-1]["sequence"] == sequence
+    assert list(algo.run(target_image, pin_coords, seed=12, **options))[-1]["sequence"] != sequence
+
+
+def test_batched_proposals_respect_a_pruned_index():
+    """
+    Tests that batched proposals only pick pins whose chords the pruned index holds.
+    """
+    algo = SimulatedAnnealingAlgorithm()
+    image_shape = (40, 40)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[10:30, 18:22] = 0
+    pin_coords = generate_pin_coords(20, image_shape)
+    geometry = ChordGeometry.from_pins(pin_coords, image_shape, chords=np.array(
+        [(i, j) for i in range(20) for j in range(i + 1, 20) if (i + j) % 3]))
+
+    final_result = list(algo.run(target_image, pin_coords, geometry=geometry, max_lines=30, start_temp=1e4,
+                                 cooling_rate=0.97, proposals_per_step=8, seed=4))[-1]
+
+    assert all(geometry.chord_id(u, v) >= 0 for u, v in final_result["sequence"])
+    canvas = algo._get_canvas_from_sequence(final_result["sequence"], geometry, 25)
+    assert final_result["total_error"] == algo._calculate_error(canvas, 255 - target_image)
+
+
+def test_warm_start_extends_an_earlier_sequence():
+    """
+    Tests that a shorter initial sequence is kept and extended with random lines up
+    to max_lines.
+    """
+    algo = SimulatedAnnealingAlgorithm()
+    image_shape = (40, 40)
+    target_image = np.full(image_shape, 255, dtype=np.uint8)
+    target_image[10:30, 18:22] = 0
+    pin_coords = generate_pin_coords(20, image_shape)
+    initial = [(0, 7), (7, 12), (12, 3)]
+
+    # With no cooling steps to take, the run returns its starting state.
+    untouched = list(algo.run(target_image, pin_coords, max_lines=10, start_temp=1, end_temp=2, seed=3,
+                              initial_sequence=initial))[-1]["sequence"]
+    assert untouched[:3] == initial and len(untouched) == 10
+    assert all(a[1] == b[0] for a, b in zip(untouched[:-1], untouched[1:]))
+
+    annealed = list(algo.run(target_image, pin_coords, max_lines=10, start_temp=100, cooling_rate=0.9,
+                             initial_sequence=untouched + [(5, 6)]))[-1]["sequence"]
+    assert len(annealed) == 10
+    assert all(a[1] == b[0] for a, b in zip(annealed[:-1], annealed[1:]))